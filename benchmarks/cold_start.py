@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: time-to-first-diagram of a fresh server process.
+
+Many MCP clients start a new stdio server per session, so the first
+visualize_tf_diff call of a process matters as much as steady-state
+throughput. Each run starts a fresh interpreter and measures:
+
+- import_s: importing cloud_diagram_mcp.server
+- first_call_s: the first visualize_tf_diff call, including render setup
+- second_call_s: a second call with a different plan (no cache hit)
+
+Two modes are compared: "cold" defers all render setup to the first call
+(CLOUD_DIAGRAM_WARMUP=0); "warm" starts the background warm-up as main()
+does and issues the first call after --idle seconds, standing in for the
+client's session initialisation.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 3] [--idle 1.0] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _plan(name: str) -> str:
+    return json.dumps(
+        {
+            "resource_changes": [
+                {
+                    "address": f"aws_instance.{name}",
+                    "type": "aws_instance",
+                    "name": name,
+                    "change": {"actions": ["create"]},
+                },
+                {
+                    "address": f"aws_s3_bucket.{name}",
+                    "type": "aws_s3_bucket",
+                    "name": name,
+                    "change": {"actions": ["no-op"]},
+                },
+            ]
+        }
+    )
+
+
+async def _child(mode: str, idle: float) -> dict:
+    """One measurement inside a fresh interpreter."""
+    start = time.perf_counter()
+    from fastmcp import Client
+
+    from cloud_diagram_mcp import render_pool, server
+
+    result = {"mode": mode, "import_s": time.perf_counter() - start}
+    result["diagrams_imported"] = "diagrams" in sys.modules
+
+    if mode == "warm":
+        import threading
+
+        threading.Thread(target=render_pool.warm_up, daemon=True).start()
+        await asyncio.sleep(idle)
+
+    async with Client(server.mcp) as client:
+        for key, name in (("first_call_s", "first"), ("second_call_s", "second")):
+            start = time.perf_counter()
+            response = await client.call_tool("visualize_tf_diff", {"plan": _plan(name)})
+            result[key] = time.perf_counter() - start
+            assert "_server_svg" in json.loads(response.content[0].text)
+    return result
+
+
+def _run(mode: str, idle: float) -> dict:
+    env = dict(os.environ)
+    env.pop("CLOUD_DIAGRAM_CACHE_DIR", None)  # a disk cache would hide the render
+    env["CLOUD_DIAGRAM_WARMUP"] = "1" if mode == "warm" else "0"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--idle", str(idle)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per mode")
+    parser.add_argument("--idle", type=float, default=1.0, help="seconds before the first call")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_child(args.child, args.idle))))
+        return
+
+    results = {}
+    for mode in ("cold", "warm"):
+        runs = [_run(mode, args.idle) for _ in range(args.runs)]
+        results[mode] = {
+            key: round(statistics.median(run[key] for run in runs), 4)
+            for key in ("import_s", "first_call_s", "second_call_s")
+        }
+        results[mode]["diagrams_imported"] = runs[0]["diagrams_imported"]
+        print(f"{mode:>5}: {results[mode]}", file=sys.stderr)
+
+    text = json.dumps({"runs": args.runs, "idle_s": args.idle, "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Result serialisation benchmark: the old json.dumps path against dumps_result.
+
+Builds a visualize_tf_diff result for synthetic plans of several sizes,
+with a real icon-embedded server SVG, and measures CPU time and peak traced
+allocations of:
+
+    legacy       the server's former path: the SVG re-encoded to UTF-8 and
+                 decoded back twice (surrogate strip, cache size), then
+                 json.dumps(ensure_ascii=True) of the whole result
+    splice_cold  dumps_result with an SVG it has not escaped before
+    splice_warm  dumps_result for a cache hit, whose SVG is already escaped
+
+All three produce JSON that decodes to the same data.
+
+Usage:
+    python benchmarks/result_serialization.py --sizes 100,1000,5000 [-o results.json]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_plan import add_generator_arguments, generate_plan, generator_options  # noqa: E402
+
+
+def _legacy(data: Dict[str, Any]) -> str:
+    svg = data["_server_svg"]
+    svg = svg.encode("utf-8", errors="ignore").decode("utf-8")
+    len(svg.encode("utf-8"))
+    return json.dumps(dict(data, _server_svg=svg), ensure_ascii=True)
+
+
+def _measure(fn: Callable[[], str], repeat: int, before: Callable[[], None]) -> Dict[str, Any]:
+    cpu: List[float] = []
+    for _ in range(repeat):
+        before()
+        start = time.process_time()
+        fn()
+        cpu.append(time.process_time() - start)
+    before()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"cpu_median_s": round(statistics.median(cpu), 6), "peak_bytes": peak}
+
+
+def bench_size(resources: int, generator: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    from cloud_diagram_mcp.layered_layout import render_layered_svg
+    from cloud_diagram_mcp.serialization import dumps_result, escape_svg
+    from cloud_diagram_mcp.svg_embedder import embed_icons_in_svg_content
+    from cloud_diagram_mcp.visualizer_hierarchical import _cluster_tree, _plan_graph
+
+    plan = generate_plan(resources, **generator)
+    layers, edges = _plan_graph(plan)
+    svg = embed_icons_in_svg_content(
+        render_layered_svg("Terraform Plan", _cluster_tree(layers), edges), dedupe=True
+    )
+    data = dict(plan, _server_svg=svg)
+    assert json.loads(_legacy(data)) == json.loads(dumps_result(data))
+
+    def nothing() -> None:
+        pass
+
+    def warm() -> None:
+        escape_svg(svg)
+
+    return {
+        "svg_bytes": len(svg),
+        "result_bytes": len(dumps_result(data)),
+        "legacy": _measure(lambda: _legacy(data), repeat, nothing),
+        "splice_cold": _measure(lambda: dumps_result(data), repeat, escape_svg.cache_clear),
+        "splice_warm": _measure(lambda: dumps_result(data), repeat, warm),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100,1000,5000", help="resource counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write the JSON results to this file")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        results[str(size)] = entry = bench_size(size, generator_options(args), args.repeat)
+        print(f"{size} resources, SVG {entry['svg_bytes'] / 1e6:.1f} MB", file=sys.stderr)
+        for mode in ("legacy", "splice_cold", "splice_warm"):
+            stats = entry[mode]
+            print(
+                f"  {mode:<12} cpu {stats['cpu_median_s'] * 1000:8.1f} ms"
+                f"  peak {stats['peak_bytes'] / 1e6:7.1f} MB",
+                file=sys.stderr,
+            )
+
+    text = json.dumps({"repeat": args.repeat, "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmarks over synthetic Terraform plans.
+
+For each plan size, times every stage of the visualize_tf_diff pipeline in
+isolation and then the whole tool call through the FastMCP in-memory
+Client:
+
+    json_parse        json.loads of the plan text
+    dependencies      resolve_dependencies over configuration + resource_changes
+    classification    _plan_graph: taxonomy lookup per resource plus edges
+    level_of_detail   collapse_plan to the server's default node budget
+    dot_build         Diagrams/Graphviz graph construction (no layout)
+    graphviz_layout   `dot` layout of that graph to SVG
+    layered_layout    the built-in layered engine, graph to SVG
+    svg_minify        minify_svg of the layout output
+    icon_embedding    embed_icons_in_svg_content with <defs> deduplication
+    serialization     dumps_result of the tool result including a not yet escaped SVG
+    end_to_end        visualize_tf_diff via Client, render cache cleared
+
+Stages that draw the diagram run on the full plan, without level-of-detail
+collapsing, so they show how each stage scales. Graphviz stages are skipped
+above --graphviz-max resources (or when `dot` is not installed) and are
+reported with the reason.
+
+Results are written as JSON for comparing builds; pass --baseline with an
+earlier results file to print per-stage ratios.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10,1000,10000,50000 -o results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_plan import add_generator_arguments, generate_plan, generator_options  # noqa: E402
+
+STAGES = (
+    "json_parse",
+    "dependencies",
+    "classification",
+    "level_of_detail",
+    "dot_build",
+    "graphviz_layout",
+    "layered_layout",
+    "svg_minify",
+    "icon_embedding",
+    "serialization",
+    "end_to_end",
+)
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Run fn `repeat` times; return timing stats and the last result."""
+    runs: List[float] = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {
+        "median_s": round(statistics.median(runs), 6),
+        "min_s": round(min(runs), 6),
+        "max_s": round(max(runs), 6),
+        "runs": len(runs),
+        "_result": result,
+    }
+
+
+def _skipped(reason: str) -> Dict[str, Any]:
+    return {"skipped": reason}
+
+
+def _metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "graphviz": shutil.which("dot") is not None,
+    }
+
+
+async def _end_to_end(plan_text: str, repeat: int) -> Dict[str, Any]:
+    from fastmcp import Client
+
+    from cloud_diagram_mcp.render_cache import get_render_cache
+    from cloud_diagram_mcp.server import mcp
+
+    async with Client(mcp) as client:
+        # Untimed: starts the render workers and loads the lazy imports
+        await client.call_tool("visualize_tf_diff", {"plan": json.dumps(generate_plan(2))})
+        runs: List[float] = []
+        response_bytes = 0
+        for _ in range(repeat):
+            get_render_cache().clear()
+            start = time.perf_counter()
+            result = await client.call_tool("visualize_tf_diff", {"plan": plan_text})
+            runs.append(time.perf_counter() - start)
+            response_bytes = len(result.content[0].text)
+    return {
+        "median_s": round(statistics.median(runs), 6),
+        "min_s": round(min(runs), 6),
+        "max_s": round(max(runs), 6),
+        "runs": len(runs),
+        "response_bytes": response_bytes,
+    }
+
+
+def bench_size(
+    resources: int,
+    generator: Dict[str, Any],
+    repeat: int,
+    graphviz_max: int,
+    stages: List[str],
+) -> Dict[str, Any]:
+    """Benchmark every selected stage on one synthetic plan."""
+    from cloud_diagram_mcp.dependencies import resolve_dependencies
+    from cloud_diagram_mcp.layered_layout import render_layered_svg
+    from cloud_diagram_mcp.level_of_detail import collapse_plan
+    from cloud_diagram_mcp.serialization import dumps_result, escape_svg
+    from cloud_diagram_mcp.server import _LOD_MAX_NODES
+    from cloud_diagram_mcp.svg_embedder import embed_icons_in_svg_content
+    from cloud_diagram_mcp.svg_minify import minify_svg
+    from cloud_diagram_mcp.visualizer_hierarchical import _cluster_tree, _plan_graph
+
+    plan_text = json.dumps(generate_plan(resources, **generator))
+    plan = json.loads(plan_text)
+    result: Dict[str, Any] = {"plan_bytes": len(plan_text), "stages": {}}
+    out = result["stages"]
+
+    def record(stage: str, fn: Callable[[], Any]) -> Any:
+        if stage not in stages:
+            return fn()
+        stats = _time(fn, repeat)
+        value = stats.pop("_result")
+        out[stage] = stats
+        return value
+
+    record("json_parse", lambda: json.loads(plan_text))
+    edges_by_address = record("dependencies", lambda: resolve_dependencies(plan))
+    result["edges"] = sum(len(deps) for deps in edges_by_address.values())
+    layers, edges = record("classification", lambda: _plan_graph(plan))
+    _, lod = record("level_of_detail", lambda: collapse_plan(plan, _LOD_MAX_NODES))
+    if lod is not None:
+        result["lod_nodes"] = lod["nodes"]
+    tree = _cluster_tree(layers)
+
+    svg: Optional[str] = None
+    if resources > graphviz_max:
+        for stage in ("dot_build", "graphviz_layout"):
+            if stage in stages:
+                out[stage] = _skipped(f"more than --graphviz-max={graphviz_max} resources")
+    elif "dot_build" in stages or "graphviz_layout" in stages:
+        # Building the graph needs Diagrams only; the layout needs the dot binary
+        from cloud_diagram_mcp.graphviz_layout import build_dot
+
+        dot = record("dot_build", lambda: build_dot("Terraform Plan", tree, edges))
+        if "graphviz_layout" in stages:
+            if shutil.which("dot") is None:
+                out["graphviz_layout"] = _skipped("Graphviz `dot` is not installed")
+            else:
+                svg = record(
+                    "graphviz_layout",
+                    lambda: dot.pipe(format="svg", quiet=True).decode("utf-8", errors="ignore"),
+                )
+
+    layered_svg = record(
+        "layered_layout", lambda: render_layered_svg("Terraform Plan", tree, edges)
+    )
+    svg = record("svg_minify", lambda: minify_svg(svg or layered_svg))
+    embedded = record("icon_embedding", lambda: embed_icons_in_svg_content(svg, dedupe=True))
+    result["svg_bytes"] = len(embedded)
+    payload = dict(plan, _server_svg=embedded)
+
+    def serialize() -> str:
+        escape_svg.cache_clear()  # time the escaping a fresh render pays
+        return dumps_result(payload)
+
+    record("serialization", serialize)
+
+    if "end_to_end" in stages:
+        out["end_to_end"] = asyncio.run(_end_to_end(plan_text, repeat))
+    return result
+
+
+def _compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print current / baseline median ratios per size and stage."""
+    print(f"\n{'size':>7} {'stage':<17} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for size, entry in current["results"].items():
+        base_stages = baseline.get("results", {}).get(size, {}).get("stages", {})
+        for stage, stats in entry["stages"].items():
+            base = base_stages.get(stage, {})
+            if "median_s" not in stats or "median_s" not in base:
+                continue
+            ratio = stats["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+            print(
+                f"{size:>7} {stage:<17} {base['median_s']:>10.4f} "
+                f"{stats['median_s']:>10.4f} {ratio:>6.2f}x"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the diagram pipeline")
+    parser.add_argument("--sizes", default="10,1000,10000,50000", help="resource counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage")
+    parser.add_argument("--stages", default=",".join(STAGES), help="stages to time")
+    parser.add_argument("--graphviz-max", type=int, default=2000)
+    parser.add_argument("-o", "--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = sorted(set(stages) - set(STAGES))
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    generator = generator_options(args)
+
+    report: Dict[str, Any] = {
+        "meta": _metadata(),
+        "generator": generator,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        print(f"Benchmarking {size} resources...", file=sys.stderr, flush=True)
+        report["results"][str(size)] = entry = bench_size(
+            size, generator, args.repeat, args.graphviz_max, stages
+        )
+        for stage, stats in entry["stages"].items():
+            shown = f"{stats['median_s']:.4f}s" if "median_s" in stats else stats["skipped"]
+            print(f"  {stage:<17} {shown}", file=sys.stderr, flush=True)
+
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        _compare(json.loads(Path(args.baseline).read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
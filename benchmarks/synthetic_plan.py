@@ -0,0 +1,300 @@
+"""
+Synthetic Terraform plans for benchmarks.
+
+Produces `terraform show -json` shaped plans of any size: resource_changes
+with before/after attribute bodies, and a configuration tree with nested
+module_calls, count/for_each instances, expression references, module
+outputs and explicit depends_on. Output is deterministic for a given seed.
+
+Usage:
+    python benchmarks/synthetic_plan.py --resources 1000 -o plan.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+# A spread of types over every diagram layer, per provider
+PROVIDER_TYPES: Dict[str, Tuple[str, ...]] = {
+    "aws": (
+        "aws_route53_record",
+        "aws_cloudfront_distribution",
+        "aws_vpc",
+        "aws_subnet",
+        "aws_nat_gateway",
+        "aws_route_table",
+        "aws_lb",
+        "aws_lb_target_group",
+        "aws_instance",
+        "aws_lambda_function",
+        "aws_ecs_service",
+        "aws_sqs_queue",
+        "aws_db_instance",
+        "aws_dynamodb_table",
+        "aws_elasticache_cluster",
+        "aws_s3_bucket",
+        "aws_ebs_volume",
+        "aws_security_group",
+        "aws_iam_role",
+        "aws_kms_key",
+        "aws_cloudwatch_log_group",
+    ),
+    "azurerm": (
+        "azurerm_dns_zone",
+        "azurerm_virtual_network",
+        "azurerm_subnet",
+        "azurerm_public_ip",
+        "azurerm_lb",
+        "azurerm_application_gateway",
+        "azurerm_linux_virtual_machine",
+        "azurerm_kubernetes_cluster",
+        "azurerm_linux_function_app",
+        "azurerm_mssql_database",
+        "azurerm_cosmosdb_account",
+        "azurerm_redis_cache",
+        "azurerm_storage_account",
+        "azurerm_key_vault",
+        "azurerm_network_security_group",
+        "azurerm_log_analytics_workspace",
+    ),
+    "google": (
+        "google_dns_record_set",
+        "google_compute_network",
+        "google_compute_subnetwork",
+        "google_compute_router_nat",
+        "google_compute_forwarding_rule",
+        "google_compute_backend_service",
+        "google_compute_instance",
+        "google_container_cluster",
+        "google_cloud_run_service",
+        "google_sql_database_instance",
+        "google_redis_instance",
+        "google_storage_bucket",
+        "google_service_account",
+        "google_kms_crypto_key",
+        "google_monitoring_alert_policy",
+    ),
+}
+
+# Share of resources per action
+ACTION_MIX: Tuple[Tuple[Tuple[str, ...], float], ...] = (
+    (("no-op",), 0.60),
+    (("create",), 0.20),
+    (("update",), 0.10),
+    (("delete",), 0.05),
+    (("delete", "create"), 0.05),
+)
+
+_NAMES = ("main", "app", "web", "api", "worker", "data", "logs", "edge", "core", "batch")
+
+
+def _weights(providers: Union[Sequence[str], Mapping[str, float]]) -> List[Tuple[str, float]]:
+    if isinstance(providers, Mapping):
+        weighted = [(p, float(w)) for p, w in providers.items() if w > 0]
+    else:
+        weighted = [(p, 1.0) for p in providers]
+    unknown = [p for p, _ in weighted if p not in PROVIDER_TYPES]
+    if unknown or not weighted:
+        raise ValueError(f"providers must be drawn from {sorted(PROVIDER_TYPES)}, got {unknown}")
+    return weighted
+
+
+def _payload(rng: random.Random, size: int, name: str) -> Dict[str, Any]:
+    """An attribute body of roughly `size` bytes when serialised."""
+    body: Dict[str, Any] = {
+        "id": f"{name}-{rng.getrandbits(48):012x}",
+        "tags": {"Name": name, "env": rng.choice(("dev", "staging", "prod"))},
+    }
+    filler = max(0, size - 80)
+    if filler:
+        body["description"] = "x" * filler
+    return body
+
+
+def _module_paths(depth: int, modules_per_level: int) -> List[List[str]]:
+    """Module paths (lists of call names) of a full tree, root first."""
+    paths: List[List[str]] = [[]]
+    level: List[List[str]] = [[]]
+    for d in range(depth):
+        level = [parent + [f"m{d}_{i}"] for parent in level for i in range(modules_per_level)]
+        paths.extend(level)
+    return paths
+
+
+def generate_plan(
+    resources: int = 100,
+    providers: Union[Sequence[str], Mapping[str, float]] = ("aws",),
+    module_depth: int = 1,
+    modules_per_level: int = 3,
+    fan_out: int = 4,
+    dependency_density: float = 1.5,
+    payload_bytes: int = 256,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Generate a synthetic Terraform plan.
+
+    Args:
+        resources: Number of resource instances (resource_changes entries)
+        providers: Provider names to draw types from ("aws", "azurerm",
+            "google"), or a mapping of provider name to relative weight
+        module_depth: Levels of nested module calls below the root module
+        modules_per_level: Module calls in each module that has children
+        fan_out: Instances per resource block; blocks alternate between
+            `count` and `for_each` addressing (1 = single instances)
+        dependency_density: Average references per resource block, to
+            earlier blocks of the same module or to child module outputs
+        payload_bytes: Approximate size of each before/after attribute body
+        seed: Random seed; equal arguments give identical plans
+
+    Returns:
+        The plan as parsed JSON
+    """
+    rng = random.Random(seed)
+    weighted = _weights(providers)
+    names, weights = zip(*weighted)
+    fan_out = max(1, fan_out)
+    actions = [a for a, _ in ACTION_MIX]
+    action_weights = [w for _, w in ACTION_MIX]
+
+    paths = _module_paths(module_depth, modules_per_level)
+    configs: Dict[Tuple[str, ...], Dict[str, Any]] = {
+        tuple(path): {"resources": [], "module_calls": {}, "outputs": {}} for path in paths
+    }
+    for path in paths[1:]:
+        configs[tuple(path[:-1])]["module_calls"][path[-1]] = {
+            "source": f"./modules/{path[-1]}",
+            "module": configs[tuple(path)],
+        }
+
+    resource_changes: List[Dict[str, Any]] = []
+    blocks = math.ceil(resources / fan_out) if resources > 0 else 0
+    for block in range(blocks):
+        path = paths[block % len(paths)]
+        config = configs[tuple(path)]
+        provider = rng.choices(names, weights)[0]
+        rtype = rng.choice(PROVIDER_TYPES[provider])
+        name = f"{rng.choice(_NAMES)}_{block}"
+        local = f"{rtype}.{name}"
+
+        # References to earlier blocks of this module and to child outputs
+        references: List[str] = []
+        n_refs = int(dependency_density) + (rng.random() < dependency_density % 1)
+        earlier = config["resources"]
+        children = list(config["module_calls"])
+        for _ in range(n_refs):
+            if children and (not earlier or rng.random() < 0.2):
+                child = rng.choice(children)
+                references += [f"module.{child}.id", f"module.{child}"]
+            elif earlier:
+                target = rng.choice(earlier)["address"]
+                references += [f"{target}.id", target]
+        entry: Dict[str, Any] = {
+            "address": local,
+            "mode": "managed",
+            "type": rtype,
+            "name": name,
+            "provider_config_key": provider,
+            "expressions": {"depends": {"references": references}} if references else {},
+            "schema_version": 0,
+        }
+        count = min(fan_out, resources - block * fan_out)
+        use_for_each = fan_out > 1 and block % 2 == 1
+        if fan_out > 1:
+            key = "for_each_expression" if use_for_each else "count_expression"
+            entry[key] = {"constant_value": count}
+        if earlier and rng.random() < 0.1:
+            entry["depends_on"] = [rng.choice(earlier)["address"]]
+        config["resources"].append(entry)
+        if not config["outputs"]:
+            config["outputs"]["id"] = {"expression": {"references": [f"{local}.id", local]}}
+
+        module_address = "".join(f"module.{call}." for call in path)
+        for i in range(count):
+            if fan_out == 1:
+                index: Optional[Union[int, str]] = None
+                suffix = ""
+            elif use_for_each:
+                index = f"k{i}"
+                suffix = f'["k{i}"]'
+            else:
+                index = i
+                suffix = f"[{i}]"
+            action = list(rng.choices(actions, action_weights)[0])
+            before = None if action == ["create"] else _payload(rng, payload_bytes, name)
+            after = None if action == ["delete"] else _payload(rng, payload_bytes, name)
+            rc: Dict[str, Any] = {
+                "address": f"{module_address}{local}{suffix}",
+                "mode": "managed",
+                "type": rtype,
+                "name": name,
+                "provider_name": f"registry.terraform.io/hashicorp/{provider}",
+                "change": {"actions": action, "before": before, "after": after},
+            }
+            if module_address:
+                rc["module_address"] = module_address[:-1]
+            if index is not None:
+                rc["index"] = index
+            resource_changes.append(rc)
+
+    return {
+        "format_version": "1.2",
+        "terraform_version": "1.7.5",
+        "resource_changes": resource_changes,
+        "configuration": {"root_module": configs[()]},
+    }
+
+
+def parse_providers(text: str) -> Dict[str, float]:
+    """Parse "aws=0.6,azurerm=0.2,google=0.2" (or "aws,google") into weights."""
+    weights: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        provider, _, weight = item.partition("=")
+        weights[provider] = float(weight) if weight else 1.0
+    return weights
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the generate_plan knobs as command line options."""
+    parser.add_argument("--providers", default="aws", help='e.g. "aws=0.6,azurerm=0.2,google=0.2"')
+    parser.add_argument("--module-depth", type=int, default=1)
+    parser.add_argument("--modules-per-level", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=4, help="instances per resource block")
+    parser.add_argument("--dependency-density", type=float, default=1.5)
+    parser.add_argument("--payload-bytes", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def generator_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """generate_plan keyword arguments from parsed add_generator_arguments options."""
+    return {
+        "providers": parse_providers(args.providers),
+        "module_depth": args.module_depth,
+        "modules_per_level": args.modules_per_level,
+        "fan_out": args.fan_out,
+        "dependency_density": args.dependency_density,
+        "payload_bytes": args.payload_bytes,
+        "seed": args.seed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Terraform plan JSON")
+    parser.add_argument("--resources", type=int, default=100)
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    text = json.dumps(generate_plan(args.resources, **generator_options(args)))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
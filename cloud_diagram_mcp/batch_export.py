@@ -0,0 +1,189 @@
+"""
+Batch export - Render many plans and architectures to SVG files in one call.
+
+Every item's render is started up front, so they run concurrently on the
+render worker pool (one process per core, see render_pool), and files are
+written as renders finish. Outputs are content-addressed twice over, so
+regenerating an unchanged set touches nothing:
+
+- an item whose layout key (its render id) and output file hash match the
+  previous run's manifest is skipped without rendering;
+- a rendered SVG whose hash equals the file already on disk is not
+  rewritten, so file timestamps stay put and git sees no churn.
+
+Each output file belongs to one item: a later item naming the same path
+fails instead of racing the first one for the file and its manifest entry.
+
+The manifest file records only stable fields (output, render id, SHA-256,
+bytes) for every output exported to it, sorted by path, and is itself only
+rewritten when they change; per-item timings are part of the returned
+summary.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import Future, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def file_sha256(path: Path) -> Optional[str]:
+    """Return the SHA-256 of a file's bytes, or None if it cannot be read."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def write_if_changed(path: Path, data: bytes, digest: str) -> bool:
+    """
+    Atomically write `data` to `path` unless the file already holds it.
+
+    Returns:
+        True if the file was written
+    """
+    if file_sha256(path) == digest:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def load_manifest(path: Optional[Path]) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the previous manifest's entries by absolute output path.
+
+    Outputs are stored relative to the manifest, so a manifest committed
+    next to the diagrams stays valid in every checkout. Missing or
+    unreadable manifests count as empty.
+    """
+    if path is None:
+        return {}
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8")).get("items", [])
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return {
+        str((path.parent / entry["output"]).resolve()): entry
+        for entry in entries
+        if isinstance(entry, dict) and "output" in entry
+    }
+
+
+def export_batch(
+    jobs: Iterable[Tuple[str, Optional[str], Any]], manifest_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Render a list of jobs to files, skipping unchanged outputs.
+
+    Args:
+        jobs: (output path, render id, start) tuples, where start() starts
+            the render and returns a Future of the SVG; items that could not
+            be prepared are passed as (output path, None, error message)
+        manifest_path: JSON manifest of the previous run to skip unchanged
+            items by, rewritten with this run's results
+
+    Returns:
+        Summary with one entry per job, in order: `status` ("written",
+        "unchanged", "skipped" or "failed"), `bytes`, `sha256` and
+        `render_ms`, plus per-status counts and the total time
+    """
+    start = time.perf_counter()
+    manifest = Path(manifest_path).resolve() if manifest_path else None
+    previous = load_manifest(manifest)
+    entries: List[Dict[str, Any]] = []
+    pending: Dict["Future[str]", Tuple[Dict[str, Any], Path, float]] = {}
+    # Output path -> index of the job that writes it
+    targets: Dict[str, int] = {}
+
+    for output, render_id, start_render in jobs:
+        if render_id is None:
+            output = str(Path(output).resolve()) if output else output
+            entries.append({"output": output, "status": "failed", "error": start_render})
+            continue
+        target = Path(output).resolve()
+        entry: Dict[str, Any] = {"output": str(target)}
+        entries.append(entry)
+        if str(target) in targets:
+            entry.update(
+                status="failed",
+                error=f"Same output as item {targets[str(target)]}; each item needs its own file",
+            )
+            continue
+        targets[str(target)] = len(entries) - 1
+        entry["render_id"] = render_id
+        known = previous.get(str(target))
+        if (
+            known is not None
+            and known.get("render_id") == render_id
+            and known.get("sha256") is not None
+            and file_sha256(target) == known["sha256"]
+        ):
+            entry.update(status="skipped", sha256=known["sha256"], bytes=known.get("bytes"))
+            continue
+        try:
+            future = start_render()
+        except Exception as e:
+            entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+            continue
+        pending[future] = (entry, target, time.perf_counter())
+
+    # Write in completion order, so a slow item does not hold up the others
+    remaining = set(pending)
+    while remaining:
+        done, remaining = wait(remaining, return_when="FIRST_COMPLETED")
+        for future in done:
+            entry, target, submitted = pending[future]
+            entry["render_ms"] = round((time.perf_counter() - submitted) * 1000, 1)
+            try:
+                data = future.result().encode("utf-8")
+                digest = hashlib.sha256(data).hexdigest()
+                written = write_if_changed(target, data, digest)
+            except Exception as e:
+                entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+                continue
+            entry.update(
+                status="written" if written else "unchanged", sha256=digest, bytes=len(data)
+            )
+
+    summary: Dict[str, Any] = {"items": entries}
+    for status in ("written", "unchanged", "skipped", "failed"):
+        summary[status] = sum(1 for entry in entries if entry["status"] == status)
+    if manifest is not None:
+        # Outputs this run did not touch keep their entries, so exporting a
+        # subset (e.g. the files a watcher saw change) forgets nothing
+        stable = {
+            output: {k: entry[k] for k in ("output", "render_id", "sha256", "bytes") if k in entry}
+            for output, entry in previous.items()
+        }
+        # Failed outputs are forgotten first, so a rejected duplicate does
+        # not drop the entry of the item that did write the file
+        for entry in entries:
+            if entry["status"] == "failed":
+                stable.pop(entry["output"], None)
+        for entry in entries:
+            if entry["status"] != "failed":
+                stable[entry["output"]] = {
+                    "output": os.path.relpath(entry["output"], manifest.parent),
+                    **{k: entry[k] for k in ("render_id", "sha256", "bytes")},
+                }
+        items = [stable[output] for output in sorted(stable)]
+        text = json.dumps({"items": items}, indent=2) + "\n"
+        data = text.encode("utf-8")
+        write_if_changed(manifest, data, hashlib.sha256(data).hexdigest())
+        summary["manifest"] = str(manifest)
+    summary["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return summary
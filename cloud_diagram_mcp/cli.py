@@ -0,0 +1,253 @@
+"""
+Command line - Subcommands of `cloud-diagram-mcp` besides the MCP server.
+
+    cloud-diagram-mcp                         run the MCP stdio server
+    cloud-diagram-mcp render FILE... -o OUTDIR render plans once, e.g. in CI
+    cloud-diagram-mcp watch DIR -o OUTDIR     re-render plans as they change
+
+`render` renders plan and architecture JSON files in-process, without MCP
+framing or a JSON round-trip of the plans, on `--jobs` render worker
+processes, and prints each file's render time. With `--format dzi` each
+diagram is also written as a deep-zoom tile pyramid (see raster_tiles).
+
+`watch` renders every plan and architecture JSON file under the watched
+directories to OUTDIR, then follows them with filesystem notifications
+(inotify, FSEvents or ReadDirectoryChangesW through the optional
+`watchfiles` package; `pip install cloud-diagram-mcp[watch]`). Bursts of
+writes, such as `terraform show -json` rewriting a plan, are debounced into
+one batch, and each batch goes through the batch export: a file whose
+layout-relevant content did not change keeps its render id and is skipped
+without rendering, and an output whose SVG did not change is not rewritten.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+COMMANDS = ("render", "watch")
+FORMATS = ("svg", "dzi")
+
+_DEFAULT_DEBOUNCE_MS = 300
+_MANIFEST = "manifest.json"
+
+
+def _item(source: Path, output: Path) -> Dict[str, Any]:
+    """Build an export item for a JSON file, classified as plan or architecture by its keys."""
+    try:
+        data = json.loads(source.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # Half-written or invalid: the batch export reports it as failed,
+        # and the write that completes it triggers another batch
+        return {"plan_file": str(source), "output_path": str(output)}
+    if isinstance(data, dict) and "resources" in data and "resource_changes" not in data:
+        return {"architecture": data, "output_path": str(output)}
+    return {"plan": data, "output_path": str(output)}
+
+
+def _sources(roots: Sequence[Path], output_dir: Path) -> List[Tuple[Path, Path]]:
+    """Return (JSON file, SVG output) pairs under the roots, skipping the output directory."""
+    pairs = []
+    for root in roots:
+        files = [root] if root.is_file() else sorted(root.rglob("*.json"))
+        for source in files:
+            if output_dir in source.parents:
+                continue
+            relative = source.relative_to(root) if root.is_dir() else Path(source.name)
+            pairs.append((source, output_dir / relative.with_suffix(".svg")))
+    return pairs
+
+
+def _report(summary: Dict[str, Any]) -> None:
+    """Print one line per item that was rendered or failed."""
+    for item in summary["items"]:
+        if item["status"] == "skipped":
+            continue
+        line = f"{item['status']:<9} {os.path.relpath(item['output'])}"
+        if "render_ms" in item:
+            line += f"  {item['render_ms']:.0f} ms"
+        if "bytes" in item:
+            line += f"  {item['bytes'] / 1024:.1f} KB"
+        if "error" in item:
+            line += f"  {item['error']}"
+        print(line, flush=True)
+
+
+def render(
+    files: Sequence[str],
+    output_dir: str,
+    layout_engine: str = "",
+    output_format: str = "svg",
+    manifest_path: str = "",
+) -> Dict[str, Any]:
+    """
+    Render plan and architecture JSON files to `output_dir`, concurrently.
+
+    Runs on the process-wide render pool; call
+    render_pool.configure_render_pool() before the first render to choose
+    the number of processes.
+
+    Args:
+        files: JSON files; each is written to `<output_dir>/<stem>.svg`, so
+            a file with the same name as an earlier one fails
+        output_dir: Directory for the diagrams
+        layout_engine: Layout engine for every diagram
+        output_format: "svg", or "dzi" to also write a tile pyramid per
+            diagram that was rewritten or has none yet
+        manifest_path: Optional batch export manifest for skipping unchanged files
+
+    Returns:
+        The batch export summary
+    """
+    from cloud_diagram_mcp.server import export_items
+
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown format {output_format!r}; expected one of {', '.join(FORMATS)}")
+    out = Path(output_dir).resolve()
+    items = [_item(Path(f), out / f"{Path(f).stem}.svg") for f in files]
+    summary = export_items(items, manifest_path, layout_engine)
+    if output_format == "dzi":
+        from cloud_diagram_mcp.raster_tiles import export_tiles
+
+        for entry in summary["items"]:
+            if entry["status"] == "failed":
+                continue
+            svg_path = Path(entry["output"])
+            dzi = out / f"{svg_path.stem}.dzi"
+            # An unchanged SVG keeps the pyramid tiled from it last time
+            if entry["status"] == "written" or not dzi.exists():
+                tiles = export_tiles(svg_path.read_text(encoding="utf-8"), str(out), svg_path.stem)
+                dzi = Path(tiles["manifest"])
+            entry["dzi"] = str(dzi)
+    return summary
+
+
+def watch(
+    roots: Sequence[str],
+    output_dir: str,
+    layout_engine: str = "",
+    debounce_ms: int = _DEFAULT_DEBOUNCE_MS,
+    stop_event: Optional[threading.Event] = None,
+    on_batch: Callable[[Dict[str, Any]], None] = _report,
+) -> None:
+    """
+    Render the JSON files under `roots` to `output_dir` and re-render them as they change.
+
+    Args:
+        roots: Directories (searched recursively for *.json) or single files
+        output_dir: Directory for the SVGs, mirroring the layout under each root
+        layout_engine: Layout engine for every diagram
+        debounce_ms: Changes within this window are rendered as one batch
+        stop_event: Stops watching once set
+        on_batch: Called with the batch export summary of every batch,
+            the initial one included
+    """
+    try:
+        from watchfiles import Change
+        from watchfiles import watch as watch_changes
+    except ImportError:
+        raise SystemExit(
+            "watch needs the watchfiles package: pip install cloud-diagram-mcp[watch]"
+        ) from None
+    from cloud_diagram_mcp.server import export_items
+
+    paths = [Path(root).resolve() for root in roots]
+    out = Path(output_dir).resolve()
+    manifest = str(out / _MANIFEST)
+    outputs = dict(_sources(paths, out))
+
+    def render(sources: List[Path]) -> None:
+        items = [_item(source, outputs[source]) for source in sources]
+        on_batch(export_items(items, manifest, layout_engine))
+
+    render(list(outputs))
+
+    def relevant(change: Any, path: str) -> bool:
+        return path.endswith(".json") and not Path(path).is_relative_to(out)
+
+    for changes in watch_changes(
+        *paths,
+        watch_filter=relevant,
+        debounce=debounce_ms,
+        stop_event=stop_event,
+        yield_on_timeout=False,
+    ):
+        # New files get an output; deleted ones leave their last SVG behind
+        outputs = dict(_sources(paths, out))
+        changed = sorted(
+            {Path(path) for change, path in changes if change != Change.deleted} & set(outputs)
+        )
+        if changed:
+            render(changed)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run a subcommand; returns the process exit status."""
+    parser = argparse.ArgumentParser(
+        prog="cloud-diagram-mcp",
+        description="Without a subcommand, runs the MCP stdio server.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = commands.add_parser(
+        "render", help="render plan and architecture JSON files without an MCP client"
+    )
+    render_parser.add_argument("files", nargs="+", help="plan or architecture JSON files")
+    render_parser.add_argument(
+        "-o", "--output-dir", required=True, help="directory for the diagrams"
+    )
+    render_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="render worker processes (default: CPU count; 0 renders in this process)",
+    )
+    render_parser.add_argument("--format", choices=FORMATS, default="svg", dest="output_format")
+    render_parser.add_argument("--layout-engine", default="", help="graphviz or layered")
+    render_parser.add_argument(
+        "--manifest", default="", help="skip files unchanged since this manifest"
+    )
+
+    watch_parser = commands.add_parser(
+        "watch", help="re-render plan and architecture JSON files as they change"
+    )
+    watch_parser.add_argument("paths", nargs="+", help="directories or JSON files to watch")
+    watch_parser.add_argument("-o", "--output-dir", required=True, help="directory for the SVGs")
+    watch_parser.add_argument("--layout-engine", default="", help="graphviz or layered")
+    watch_parser.add_argument(
+        "--debounce-ms",
+        type=int,
+        default=_DEFAULT_DEBOUNCE_MS,
+        help=f"group changes within this window (default {_DEFAULT_DEBOUNCE_MS})",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "render":
+        from cloud_diagram_mcp.render_pool import configure_render_pool
+
+        try:
+            configure_render_pool(max(0, args.jobs))
+        except RuntimeError as exc:
+            parser.error(str(exc))
+        start = time.perf_counter()
+        summary = render(
+            args.files, args.output_dir, args.layout_engine, args.output_format, args.manifest
+        )
+        _report(summary)
+        print(
+            f"{len(summary['items'])} files in {time.perf_counter() - start:.2f}s: "
+            f"{summary['written']} written, {summary['unchanged'] + summary['skipped']} "
+            f"unchanged, {summary['failed']} failed",
+            flush=True,
+        )
+        return 1 if summary["failed"] else 0
+
+    try:
+        watch(args.paths, args.output_dir, args.layout_engine, args.debounce_ms)
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,363 @@
+"""
+Dependency extraction - Resource-to-resource edges of a Terraform plan.
+
+`configuration` describes dependencies per configuration block: explicit
+`depends_on` lists and the `references` of every expression, nested under
+`module_calls` for each module, with addresses relative to the module.
+The diagram needs edges between the instance addresses of
+`resource_changes` (`module.app["x"].aws_instance.web[0]`) instead.
+
+The extractor walks the module tree once, resolves each reference to the
+configuration address it points at — following `var.*` into the calling
+module and `module.*.output` into the called one — and maps configuration
+addresses to instance addresses through an index built once from
+`resource_changes`. Edge construction is therefore proportional to the
+number of edges, not to resources times references.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# One dot-separated address segment with its instance keys: name[0]["a.b"]
+_SEGMENT_RE = re.compile(r'([^.\[\]]+)((?:\[(?:"(?:[^"\\]|\\.)*"|[^\]]*)\])*)')
+
+# Reference roots that never name a resource
+_NON_RESOURCE_ROOTS = frozenset({"var", "local", "each", "count", "path", "self", "terraform"})
+
+# A resolved reference: ("instance", address) for an exact instance address,
+# or ("config", configuration address, instance key or "")
+Target = Tuple[str, str, str]
+
+
+class _Instance:
+    __slots__ = ("address", "module_path", "key", "paths", "order")
+
+    def __init__(self, address: str, module_path: str, key: str, paths: List[str]) -> None:
+        self.address = address
+        self.module_path = module_path
+        self.key = key
+        # Module instance paths from the root down to module_path, both included
+        self.paths = paths
+        # Position in resource_changes, set when indexed
+        self.order = 0
+
+
+def _segments(address: str) -> List[Tuple[str, str]]:
+    return _SEGMENT_RE.findall(address)
+
+
+def _parse_instance(address: str) -> Tuple[str, _Instance]:
+    """Return the configuration address of an instance address and its parts."""
+    segments = _segments(address)
+    config: List[str] = []
+    module_path = ""
+    paths = [module_path]
+    i = 0
+    while i + 2 < len(segments) and segments[i][0] == "module":
+        name, keys = segments[i + 1]
+        config += ["module", name]
+        module_path += f"module.{name}{keys}."
+        paths.append(module_path)
+        i += 2
+    config += [name for name, _ in segments[i:]]
+    key = segments[-1][1] if segments else ""
+    return ".".join(config), _Instance(address, module_path, key, paths)
+
+
+def _most_specific(references: Iterable[str]) -> List[str]:
+    """
+    Drop references that only repeat a longer one from the same expression.
+
+    Terraform lists every prefix of a traversal: `aws_subnet.private[0].id`
+    comes with `aws_subnet.private[0]` and `aws_subnet.private`, and
+    `module.app.dns` with `module.app`. Only the longest form says which
+    instance or output is meant.
+    """
+    references = list(references)
+    return [
+        ref
+        for ref in references
+        if not any(
+            other.startswith(ref + ".") or other.startswith(ref + "[") for other in references
+        )
+    ]
+
+
+def _expression_references(node: Any, out: List[str]) -> None:
+    """Collect every `references` list found in a (nested) expressions value."""
+    if isinstance(node, dict):
+        references = node.get("references")
+        if isinstance(references, list):
+            out.extend(_most_specific(r for r in references if isinstance(r, str)))
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                _expression_references(value, out)
+    elif isinstance(node, list):
+        for value in node:
+            _expression_references(value, out)
+
+
+def _block_references(block: Dict[str, Any]) -> List[str]:
+    refs = list(block.get("depends_on", []))
+    for key in ("expressions", "count_expression", "for_each_expression"):
+        if key in block:
+            _expression_references(block[key], refs)
+    return refs
+
+
+class _Module:
+    """One module of the configuration tree, addressed by its config prefix."""
+
+    __slots__ = ("prefix", "config", "parent", "call", "children", "resources")
+
+    def __init__(
+        self,
+        prefix: str,
+        config: Dict[str, Any],
+        parent: Optional["_Module"],
+        call: Optional[Dict[str, Any]],
+    ) -> None:
+        self.prefix = prefix
+        self.config = config
+        self.parent = parent
+        self.call = call
+        self.children: Dict[str, "_Module"] = {}
+        # Configuration addresses of all resources in this module's subtree
+        self.resources: List[str] = []
+
+
+class _Resolver:
+    """Resolves references to configuration addresses, memoising module indirections."""
+
+    def __init__(self, root: Dict[str, Any], instances: Dict[str, Any]) -> None:
+        self.instances = instances
+        self.modules: List[_Module] = []
+        self.root = self._build("", root, None, None)
+        self._memo: Dict[Tuple[str, str, str], List[Target]] = {}
+
+    def _build(
+        self,
+        prefix: str,
+        config: Dict[str, Any],
+        parent: Optional[_Module],
+        call: Optional[Dict[str, Any]],
+    ) -> _Module:
+        module = _Module(prefix, config, parent, call)
+        self.modules.append(module)
+        for res in config.get("resources", []):
+            address = res.get("address")
+            if address:
+                module.resources.append(self.absolute(prefix, address))
+        for name, child_call in config.get("module_calls", {}).items():
+            child = self._build(
+                f"{prefix}module.{name}.", child_call.get("module", {}), module, child_call
+            )
+            module.children[name] = child
+            module.resources.extend(child.resources)
+        return module
+
+    @staticmethod
+    def absolute(prefix: str, address: str) -> str:
+        return address if not prefix or address.startswith(prefix) else prefix + address
+
+    def resolve(self, module: _Module, ref: str) -> List[Target]:
+        """Resolve one reference or depends_on entry made inside a module."""
+        absolute = self.absolute(module.prefix, ref)
+        if absolute in self.instances:
+            return [("instance", absolute, "")]
+
+        segments = _segments(ref)
+        if not segments:
+            return []
+        root = segments[0][0]
+        if root == "module" and len(segments) >= 2:
+            child = module.children.get(segments[1][0])
+            if child is None:
+                return []
+            if len(segments) >= 3:
+                output = self._output(child, segments[2][0])
+                if output is not None:
+                    return output
+            return [("config", address, "") for address in child.resources]
+        if root == "var":
+            return self._variable(module, segments[1][0]) if len(segments) >= 2 else []
+        if root in _NON_RESOURCE_ROOTS:
+            return []
+
+        # type.name or data.type.name, then attributes
+        length = 3 if root == "data" else 2
+        if len(segments) < length:
+            return []
+        config = ".".join(name for name, _ in segments[:length])
+        return [("config", module.prefix + config, segments[length - 1][1])]
+
+    def _resolve_all(self, module: _Module, refs: Iterable[str]) -> List[Target]:
+        targets: List[Target] = []
+        for ref in refs:
+            targets.extend(self.resolve(module, ref))
+        return targets
+
+    def _output(self, module: _Module, name: str) -> Optional[List[Target]]:
+        """Targets of a module output, or None when the output is not described."""
+        output = module.config.get("outputs", {}).get(name)
+        if output is None:
+            return None
+        memo_key = ("output", module.prefix, name)
+        if memo_key not in self._memo:
+            self._memo[memo_key] = []  # cycle guard
+            refs: List[str] = []
+            _expression_references(output.get("expression", {}), refs)
+            refs.extend(output.get("depends_on", []))
+            self._memo[memo_key] = self._resolve_all(module, refs)
+        return self._memo[memo_key]
+
+    def _variable(self, module: _Module, name: str) -> List[Target]:
+        """Targets of a module input variable, via the calling module's arguments."""
+        if module.parent is None or module.call is None:
+            return []
+        memo_key = ("var", module.prefix, name)
+        if memo_key not in self._memo:
+            self._memo[memo_key] = []  # cycle guard
+            refs: List[str] = []
+            _expression_references(module.call.get("expressions", {}).get(name, {}), refs)
+            self._memo[memo_key] = self._resolve_all(module.parent, refs)
+        return self._memo[memo_key]
+
+    def resource_targets(self) -> Iterable[Tuple[str, List[Target]]]:
+        """Yield (absolute resource address, targets) for every configured resource."""
+        for module in self.modules:
+            # Dependencies of the module call apply to everything inside it
+            inherited: List[Target] = []
+            if module.call is not None and module.parent is not None:
+                inherited = self._resolve_all(module.parent, module.call.get("depends_on", []))
+            for res in module.config.get("resources", []):
+                address = res.get("address")
+                if not address:
+                    continue
+                targets = self._resolve_all(module, _block_references(res))
+                yield self.absolute(module.prefix, address), targets + inherited
+
+
+class _InstanceIndex:
+    """
+    Instances by configuration address and instance key ("" for any key).
+
+    Each is also filed under its own module instance path and under every
+    ancestor of it, so the instances on one branch of the module tree are
+    a few dictionary lookups away rather than a scan of all of them.
+    """
+
+    def __init__(self) -> None:
+        self.instances: Dict[Tuple[str, str], List[_Instance]] = {}
+        # (config, key, module path) -> instances in exactly that module instance
+        self._at: Dict[Tuple[str, str, str], List[_Instance]] = {}
+        # (config, key, module path) -> instances in it or in a module below it
+        self._below: Dict[Tuple[str, str, str], List[_Instance]] = {}
+        self._count = 0
+
+    def add(self, config: str, instance: _Instance) -> None:
+        instance.order = self._count
+        self._count += 1
+        for key in ("", instance.key) if instance.key else ("",):
+            self.instances.setdefault((config, key), []).append(instance)
+            self._at.setdefault((config, key, instance.module_path), []).append(instance)
+            for path in instance.paths:
+                self._below.setdefault((config, key, path), []).append(instance)
+
+    def get(self, config: str, key: str = "") -> List[_Instance]:
+        return self.instances.get((config, key), [])
+
+    def candidates(self, config: str, key: str, source: _Instance) -> List[_Instance]:
+        """
+        Instances of `config` a reference made by `source` points at.
+
+        Those on the source's branch of the module tree: in its module
+        instance, below it, or in one of its ancestors. All of them when
+        none is, or when there is only one.
+        """
+        candidates = self.get(config, key)
+        if len(candidates) <= 1:
+            return candidates
+        found = self._below.get((config, key, source.module_path), [])
+        above = [
+            instance
+            for path in source.paths[:-1]
+            for instance in self._at.get((config, key, path), ())
+        ]
+        if above:
+            found = sorted(found + above, key=lambda instance: instance.order)
+        return found or candidates
+
+
+def resolve_dependencies(plan_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Map each resource instance address to the instance addresses it depends on.
+
+    Explicit depends_on and expression references are collected from the
+    root module and, recursively, from every module call. A reference with
+    a constant key (`aws_subnet.private[0]`) points at that instance; other
+    references point at every instance of the resource that lies in the same
+    module instance as the referencing one (or at all of them if none does).
+
+    An unkeyed reference from a counted resource to another counted one
+    therefore yields every pairing, N x M edges. That is deliberate: the
+    plan records `aws_subnet.private[count.index]` as `aws_subnet.private`,
+    so it does not say which instance each one uses, and Terraform itself
+    orders every instance of the one after every instance of the other.
+    Each pair is emitted once.
+
+    Args:
+        plan_data: Parsed Terraform plan, or a projection of one
+
+    Returns:
+        Dict of address -> depends_on addresses, both as in resource_changes
+    """
+    index = _InstanceIndex()
+    instances: Dict[str, _Instance] = {}
+    for rc in plan_data.get("resource_changes", []):
+        address = rc.get("address")
+        if address and address not in instances:
+            config, instance = _parse_instance(address)
+            instances[address] = instance
+            index.add(config, instance)
+
+    resolver = _Resolver(plan_data.get("configuration", {}).get("root_module", {}), instances)
+
+    edges: Dict[str, Dict[str, None]] = {}
+    for address, targets in resolver.resource_targets():
+        if not targets:
+            continue
+        if address in instances:
+            sources = [instances[address]]
+        else:
+            sources = index.get(_parse_instance(address)[0])
+        for source in sources:
+            deps = edges.setdefault(source.address, {})
+            for kind, target, key in targets:
+                if kind == "instance":
+                    candidates = [instances[target]]
+                else:
+                    candidates = index.candidates(target, key, source)
+                for candidate in candidates:
+                    if candidate.address != source.address:
+                        deps[candidate.address] = None
+
+    return {address: list(deps) for address, deps in edges.items() if deps}
+
+
+def dependency_configuration(plan_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resolve a plan's dependencies into a flat root-module configuration.
+
+    The result keeps the `configuration` shape the diagram code reads, with
+    one resource entry per instance that has dependencies and instance
+    addresses in depends_on. Resolving it again returns the same edges.
+    """
+    return {
+        "root_module": {
+            "resources": [
+                {"address": address, "depends_on": deps}
+                for address, deps in resolve_dependencies(plan_data).items()
+            ]
+        }
+    }
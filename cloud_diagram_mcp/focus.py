@@ -0,0 +1,207 @@
+"""
+Focus - Renders the changed part of a plan and its dependency neighbourhood.
+
+A plan that changes 12 of 4,000 resources is mostly context, yet drawing it
+lays out all 4,000. Focusing keeps the seed resources (the ones the caller
+names, and/or every changed resource) plus everything within `hops`
+dependency edges of them, in either direction, and summarises the rest:
+
+1. omitted resources adjacent to the kept ones become one stub node per
+   module, wired to the kept resources they are connected to
+2. all other omitted resources become a single unconnected stub node
+
+Stub nodes carry their member count and per-action counts like level of
+detail aggregates. The dependency index is built once and the neighbourhood
+found by breadth-first search, so layout time and payload scale with the
+size of the change rather than with the size of the estate.
+"""
+
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from cloud_diagram_mcp.dependencies import resolve_dependencies
+from cloud_diagram_mcp.level_of_detail import _aggregate_actions, _count_suffix, split_address
+from cloud_diagram_mcp.visualizer_hierarchical import get_primary_action
+
+# Stub for omitted resources that are not adjacent to the kept ones
+_REST_STUB = "(omitted)"
+
+# Top-level plan keys that describe the whole estate; a focused result
+# replaces them with the kept resource changes and their `_dependencies`
+_ESTATE_KEYS = ("resource_changes", "configuration", "prior_state", "planned_values")
+
+
+def _matches(address: str, focus: str) -> bool:
+    """True if `address` is `focus`, one of its instances, or inside the module it names."""
+    return address == focus or address.startswith(focus + ".") or address.startswith(focus + "[")
+
+
+def neighbourhood(adjacency: Dict[str, Set[str]], seeds: Iterable[str], hops: int) -> Set[str]:
+    """Return the addresses within `hops` edges of the seeds, seeds included."""
+    distance = dict.fromkeys(seeds, 0)
+    queue = deque(distance)
+    while queue:
+        address = queue.popleft()
+        d = distance[address]
+        if d == hops:
+            continue
+        for neighbour in adjacency.get(address, ()):
+            if neighbour not in distance:
+                distance[neighbour] = d + 1
+                queue.append(neighbour)
+    return set(distance)
+
+
+def _stub_group(address: str) -> str:
+    """Stub address for an omitted resource next to the focus: one per module path."""
+    modules, _ = split_address(address)
+    return f"{'.'.join(modules) or 'root'} (omitted)"
+
+
+def focus_plan(
+    plan_data: Dict[str, Any],
+    focus: Iterable[str] = (),
+    changes_only: bool = False,
+    hops: int = 1,
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Reduce a plan to the neighbourhood of its changed or requested resources.
+
+    Args:
+        plan_data: Parsed (or streamed) Terraform plan
+        focus: Addresses to center on. A resource address without instance
+            keys selects all its instances, and a module address everything
+            inside the module.
+        changes_only: Also center on every resource that changes
+        hops: Dependency edges to follow out from the centers (0 = centers only)
+
+    Returns:
+        (result, plan, summary). result is plan_data restricted to the kept
+        resources, with a flat `_dependencies` map instead of the estate-wide
+        configuration and state. plan has the shape generate_svg expects,
+        with stub nodes for the omitted resources. summary describes the
+        focus and the stubs.
+
+    Raises:
+        ValueError: If hops is negative, or focus matches no resource and
+            changes_only is not set
+    """
+    if hops < 0:
+        raise ValueError(f"hops must be 0 or more, got {hops}")
+    focus = list(dict.fromkeys(focus))
+    resource_changes = plan_data.get("resource_changes", [])
+    by_address = {rc["address"]: rc for rc in resource_changes}
+
+    seeds: Dict[str, None] = {}
+    matched: Set[str] = set()
+    for address, rc in by_address.items():
+        if changes_only and get_primary_action(rc["change"]["actions"]) != "no-op":
+            seeds[address] = None
+        for f in focus:
+            if _matches(address, f):
+                seeds[address] = None
+                matched.add(f)
+    unmatched = [f for f in focus if f not in matched]
+    if focus and not matched and not changes_only:
+        raise ValueError(f"No resources match focus: {', '.join(unmatched)}")
+
+    # Dependency index, built once: edges both ways for the search
+    depends_on = resolve_dependencies(plan_data)
+    dependents: Dict[str, List[str]] = {}
+    adjacency: Dict[str, Set[str]] = {}
+    for address, deps in depends_on.items():
+        for dep in deps:
+            dependents.setdefault(dep, []).append(address)
+            adjacency.setdefault(address, set()).add(dep)
+            adjacency.setdefault(dep, set()).add(address)
+    within = neighbourhood(adjacency, seeds, hops)
+    # In plan order, so the diagram plan (and its render key) is deterministic
+    kept = {address: None for address in by_address if address in within}
+
+    # Edges among kept resources, and to the stubs of adjacent omitted ones
+    edges: Dict[str, Dict[str, None]] = {}
+    boundary: Dict[str, str] = {}
+    for address in kept:
+        for dep in depends_on.get(address, ()):
+            if dep in kept:
+                edges.setdefault(address, {})[dep] = None
+            elif dep in by_address:
+                stub = boundary.setdefault(dep, _stub_group(dep))
+                edges.setdefault(address, {})[stub] = None
+        for dependent in dependents.get(address, ()):
+            if dependent not in kept and dependent in by_address:
+                stub = boundary.setdefault(dependent, _stub_group(dependent))
+                edges.setdefault(stub, {})[address] = None
+
+    # stub address -> member count, per-action counts, member types
+    stubs: Dict[str, Dict[str, Any]] = {}
+    nodes = []
+    kept_changes = []
+    for address, rc in by_address.items():
+        if address in kept:
+            kept_changes.append(rc)
+            nodes.append(
+                {
+                    "address": address,
+                    "type": rc["type"],
+                    "name": rc["name"],
+                    "change": {"actions": list(rc["change"]["actions"])},
+                }
+            )
+            continue
+        stub = stubs.setdefault(
+            boundary.get(address, _REST_STUB),
+            {"count": 0, "actions": Counter(), "types": Counter()},
+        )
+        stub["count"] += 1
+        stub["actions"][get_primary_action(rc["change"]["actions"])] += 1
+        stub["types"][rc["type"]] += 1
+
+    for address, stub in stubs.items():
+        count = stub["count"]
+        noun = "resource" if count == 1 else "resources"
+        if address == _REST_STUB:
+            name = f"{count} other {noun}"
+        else:
+            name = f"{address[: -len(' (omitted)')]}: {count} more {noun}"
+        nodes.append(
+            {
+                "address": address,
+                # Stubs take the icon and layer of their most common type
+                "type": stub["types"].most_common(1)[0][0],
+                "name": name + _count_suffix(stub["actions"]),
+                "change": {"actions": _aggregate_actions(stub["actions"])},
+            }
+        )
+
+    plan = {
+        "resource_changes": nodes,
+        "configuration": {
+            "root_module": {
+                "resources": [
+                    {"address": address, "depends_on": list(deps)}
+                    for address, deps in edges.items()
+                ]
+            }
+        },
+    }
+    result = {k: v for k, v in plan_data.items() if k not in _ESTATE_KEYS}
+    result["resource_changes"] = kept_changes
+    dependencies = {
+        address: [dep for dep in edges.get(address, ()) if dep in kept] for address in kept
+    }
+    result["_dependencies"] = {address: deps for address, deps in dependencies.items() if deps}
+    summary: Dict[str, Any] = {
+        "resources": len(by_address),
+        "seeds": len(seeds),
+        "hops": hops,
+        "kept": len(kept_changes),
+        "nodes": len(nodes),
+        "stubs": {
+            address: {"count": stub["count"], "actions": dict(stub["actions"])}
+            for address, stub in stubs.items()
+        },
+    }
+    if unmatched:
+        summary["unmatched"] = unmatched
+    return result, plan, summary
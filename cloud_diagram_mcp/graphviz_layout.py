@@ -0,0 +1,337 @@
+"""
+Graphviz layout engine - Renders hierarchical diagrams with Diagrams and `dot`.
+
+The cluster tree from `visualizer_hierarchical` becomes nested Diagrams
+clusters with one icon node per resource, and the DOT source is piped
+through Graphviz in memory. Diagrams and the graphviz package are only
+imported with this module, i.e. on the first Graphviz render.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from diagrams import Cluster, Diagram, Edge, setdiagram
+
+from cloud_diagram_mcp.metrics import stage
+from cloud_diagram_mcp.visualizer_hierarchical import EDGE_COLORS, _render_label, get_icon_class
+
+Box = Tuple[float, float, float, float]
+
+# Node box in points: node_attr width 1.5in, and Diagrams makes icon nodes
+# 1.9in tall plus 0.4in per extra label line
+_NODE_W = 108.0
+_NODE_H = 136.8
+_LINE_H = 28.8
+
+# Grid pitch for new nodes of a seeded layout: a node plus nodesep / ranksep
+_PITCH_X = _NODE_W + 57.6
+_PITCH_Y = _NODE_H + 72.0
+
+# Cluster padding around its members (Graphviz's default margin), room for
+# the 12pt cluster label, and the label's approximate width per character
+_CLUSTER_MARGIN = 8.0
+_CLUSTER_LABEL_H = 24.0
+_CLUSTER_CHAR_W = 7.0
+
+
+def _make_edge(action: str = "no-op", label: Optional[str] = None) -> Edge:
+    """Create a styled Edge based on the connection action."""
+    color = EDGE_COLORS.get(action, "gray")
+    style = "dashed" if action == "no-op" else "bold"
+    penwidth = "1.0" if action == "no-op" else "2.0"
+    kwargs: Dict[str, Any] = {"color": color, "style": style, "penwidth": penwidth}
+    if label:
+        kwargs["label"] = label
+        kwargs["fontsize"] = "9"
+        kwargs["fontcolor"] = color
+    return Edge(**kwargs)
+
+
+def _place_cluster(
+    cluster: Dict[str, Any], node_objects: Dict[str, Any], boxes: Optional[Dict[int, Box]] = None
+) -> None:
+    graph_attr: Dict[str, str] = {}
+    if boxes is not None:
+        # Seeded layouts are not laid out by dot, so clusters get explicit boxes
+        x0, y0, x1, y1 = boxes[id(cluster)]
+        label_w = len(cluster["label"]) * _CLUSTER_CHAR_W
+        graph_attr["bb"] = "%g,%g,%g,%g" % (x0, y0, x1, y1)
+        graph_attr["lp"] = "%g,%g" % (
+            x0 + _CLUSTER_MARGIN + label_w / 2,
+            y1 - _CLUSTER_LABEL_H / 2,
+        )
+    with Cluster(cluster["label"], graph_attr=graph_attr):
+        for child in cluster["children"]:
+            if "children" in child:
+                _place_cluster(child, node_objects, boxes)
+            else:
+                _place_one(child, node_objects)
+
+
+def _place_one(item: Dict[str, Any], node_objects: Dict[str, Any]) -> None:
+    """Place a single resource node in the diagram."""
+    icon_class = get_icon_class(item["type"])
+    label = _render_label(item["name"], item.get("action", "no-op"))
+    # An invisible border makes the node's box part of the SVG, so layout
+    # memory reads the exact node centre rather than the icon's
+    attrs: Dict[str, str] = {"peripheries": "1", "color": "transparent"}
+    if item.get("pos"):
+        attrs["pos"] = "%g,%g!" % item["pos"]
+    node_objects[item["address"]] = icon_class(label, nodeid=item["address"], **attrs)
+
+
+def _node_height(item: Dict[str, Any]) -> float:
+    return _NODE_H + _LINE_H * _render_label(item["name"], item.get("action", "no-op")).count("\n")
+
+
+def _slots_around() -> Iterator[Tuple[int, int]]:
+    """Grid offsets in square rings of growing size, the same row first in each ring."""
+    yield 0, 0
+    ring = 1
+    while True:
+        perimeter = [
+            (i, j)
+            for i in range(-ring, ring + 1)
+            for j in range(-ring, ring + 1)
+            if max(abs(i), abs(j)) == ring
+        ]
+        # Right before left, and below (y up) before above
+        yield from sorted(
+            perimeter, key=lambda slot: (abs(slot[1]), abs(slot[0]), -slot[0], slot[1])
+        )
+        ring += 1
+
+
+def _seed_layout(
+    tree: List[Dict[str, Any]], edges: List[Tuple[str, str, str, Optional[str]]]
+) -> Dict[int, Box]:
+    """
+    Position the new nodes of a seeded diagram and size its clusters.
+
+    Nodes with a remembered `pos` stay exactly there. Each new node goes to
+    the nearest free grid slot in the row of its cluster (a new row below the
+    diagram for a cluster with no placed nodes), next to its placed
+    neighbours, so the cost depends on the number of new nodes. Items get
+    their `pos` set in place.
+
+    Returns:
+        Bounding box (points, y up) of every cluster by id()
+    """
+    members: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+
+    def walk(cluster: Dict[str, Any]) -> None:
+        for child in cluster["children"]:
+            if "children" in child:
+                walk(child)
+            else:
+                members.append((child, cluster))
+
+    for cluster in tree:
+        walk(cluster)
+
+    placed = {item["address"]: item["pos"] for item, _ in members if item.get("pos")}
+    grid: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+
+    def occupy(x: float, y: float) -> None:
+        grid.setdefault((int(x // _PITCH_X), int(y // _PITCH_Y)), []).append((x, y))
+
+    def free(x: float, y: float) -> bool:
+        cx, cy = int(x // _PITCH_X), int(y // _PITCH_Y)
+        return not any(
+            abs(px - x) < _PITCH_X and abs(py - y) < _PITCH_Y
+            for i in (-1, 0, 1)
+            for j in (-1, 0, 1)
+            for px, py in grid.get((cx + i, cy + j), ())
+        )
+
+    rows: Dict[int, List[Tuple[float, float]]] = {}
+    for item, cluster in members:
+        if item.get("pos"):
+            occupy(*item["pos"])
+            rows.setdefault(id(cluster), []).append(item["pos"])
+    neighbours: Dict[str, List[str]] = {}
+    for src, dst, _, _ in edges:
+        neighbours.setdefault(src, []).append(dst)
+        neighbours.setdefault(dst, []).append(src)
+    bottom = min((y for _, y in placed.values()), default=0.0)
+
+    for item, cluster in members:
+        if item.get("pos"):
+            continue
+        row = rows.setdefault(id(cluster), [])
+        if row:
+            y = sum(py for _, py in row) / len(row)
+        else:
+            bottom -= _PITCH_Y
+            y = bottom
+        near = [placed[n] for n in neighbours.get(item["address"], ()) if n in placed]
+        if near:
+            x = sum(px for px, _ in near) / len(near)
+        else:
+            x = max((px for px, _ in row), default=-_PITCH_X) + _PITCH_X
+        slot = next(
+            (x + i * _PITCH_X, y + j * _PITCH_Y)
+            for i, j in _slots_around()
+            if free(x + i * _PITCH_X, y + j * _PITCH_Y)
+        )
+        item["pos"] = placed[item["address"]] = (round(slot[0], 2), round(slot[1], 2))
+        occupy(*item["pos"])
+        row.append(item["pos"])
+
+    boxes: Dict[int, Box] = {}
+
+    def size(cluster: Dict[str, Any]) -> Box:
+        extents = []
+        for child in cluster["children"]:
+            if "children" in child:
+                extents.append(size(child))
+            else:
+                x, y = child["pos"]
+                h = _node_height(child)
+                extents.append((x - _NODE_W / 2, y - h / 2, x + _NODE_W / 2, y + h / 2))
+        if extents:
+            x0 = min(e[0] for e in extents) - _CLUSTER_MARGIN
+            y0 = min(e[1] for e in extents) - _CLUSTER_MARGIN
+            x1 = max(e[2] for e in extents) + _CLUSTER_MARGIN
+            y1 = max(e[3] for e in extents) + _CLUSTER_MARGIN + _CLUSTER_LABEL_H
+        else:
+            x0 = y0 = x1 = y1 = 0.0
+        boxes[id(cluster)] = (round(x0, 2), round(y0, 2), round(x1, 2), round(y1, 2))
+        return boxes[id(cluster)]
+
+    for cluster in tree:
+        size(cluster)
+    return boxes
+
+
+class _PipedDiagram(Diagram):
+    """
+    Diagram rendered through Graphviz's stdin/stdout instead of the filesystem.
+
+    The stock Diagram writes a .dot and an output file next to `filename`
+    and removes only the .dot on exit. Here the DOT source is piped to the
+    layout engine and the SVG is kept in memory on `self.svg`, so a render
+    never creates files or directories.
+    """
+
+    svg = ""
+    # 2 for seeded layouts: every node has its position, neato only routes edges
+    neato_no_op: Optional[int] = None
+
+    def render(self) -> None:
+        with stage("graphviz_layout"):
+            self.svg = self.dot.pipe(format="svg", neato_no_op=self.neato_no_op, quiet=True).decode(
+                "utf-8", errors="ignore"
+            )
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.render()
+        finally:
+            setdiagram(None)
+
+
+def _diagram_attrs(title: str) -> Dict[str, Any]:
+    """Return common Diagram constructor kwargs."""
+    return dict(
+        name=title,
+        # Only names the DOT source; nothing is written
+        filename="diagram",
+        show=False,
+        direction="TB",
+        graph_attr={
+            "fontsize": "14",
+            "bgcolor": "white",
+            "pad": "0.8",
+            "rankdir": "TB",
+            "splines": "spline",
+            "nodesep": "0.8",
+            "ranksep": "1.0",
+        },
+        node_attr={"width": "1.5", "height": "1.8", "fixedsize": "true", "fontsize": "11"},
+        edge_attr={"minlen": "2"},
+        outformat="svg",
+    )
+
+
+def _use_seeded_layout(diagram: "_PipedDiagram") -> None:
+    """
+    Switch a diagram to `neato -n2`, which renders the given node positions.
+
+    dot always computes a fresh layered layout. In a seeded diagram every
+    node already has its position (see _seed_layout) and every cluster its
+    box, so no layout runs at all: neato keeps the nodes exactly in place and
+    only routes the edges.
+    """
+    diagram.dot.engine = "neato"
+    diagram.neato_no_op = 2
+    diagram.dot.graph_attr["inputscale"] = "72"  # pos values are in points
+
+
+class _DotOnlyDiagram(_PipedDiagram):
+    """Diagram that only builds its DOT graph; nothing is laid out."""
+
+    def render(self) -> None:
+        pass
+
+
+def _build(
+    diagram_class: Any,
+    title: str,
+    tree: List[Dict[str, Any]],
+    edges: List[Tuple[str, str, str, Optional[str]]],
+    seeded: bool,
+) -> Any:
+    node_objects: Dict[str, Any] = {}
+
+    # The diagram lays itself out on leaving the `with`, after dot_build
+    with diagram_class(**_diagram_attrs(title)) as diagram:
+        with stage("dot_build"):
+            boxes = None
+            if seeded:
+                _use_seeded_layout(diagram)
+                boxes = _seed_layout(tree, edges)
+            for cluster in tree:
+                _place_cluster(cluster, node_objects, boxes)
+            for src, dst, action, label in edges:
+                node_objects[src] >> _make_edge(action, label) >> node_objects[dst]
+
+    return diagram
+
+
+def build_dot(
+    title: str,
+    tree: List[Dict[str, Any]],
+    edges: List[Tuple[str, str, str, Optional[str]]],
+    seeded: bool = False,
+) -> Any:
+    """
+    Build the Graphviz graph of a cluster tree without running the layout.
+
+    Returns:
+        The graphviz.Digraph; `.source` is the DOT text, `.pipe()` lays it out
+        (pass `neato_no_op=2` for a seeded graph)
+    """
+    return _build(_DotOnlyDiagram, title, tree, edges, seeded).dot
+
+
+def render_graphviz_svg(
+    title: str,
+    tree: List[Dict[str, Any]],
+    edges: List[Tuple[str, str, str, Optional[str]]],
+    seeded: bool = False,
+) -> str:
+    """
+    Lay out and render a cluster tree with Diagrams and Graphviz.
+
+    Args:
+        title: Diagram title
+        tree: Top-level clusters from `_cluster_tree`
+        edges: (from address, to address, action, label) tuples
+        seeded: Some items carry a pinned `pos`; keep them there and place
+            only the others (see _seed_layout)
+
+    Returns:
+        SVG content as a string
+    """
+    return _build(_PipedDiagram, title, tree, edges, seeded).svg
@@ -6,7 +6,7 @@ Orchestrates the full pipeline: SVG generation → icon embedding → HTML wrapp
 import json
 from typing import Any, Dict
 
-from cloud_diagram_mcp.visualizer_hierarchical import generate_svg
+from cloud_diagram_mcp.visualizer_hierarchical import generate_svg, get_primary_action
 from cloud_diagram_mcp.svg_embedder import embed_icons_in_svg_content
 
 
@@ -39,17 +39,7 @@ def generate_interactive_html(plan_data: Dict[str, Any]) -> str:
         address = resource["address"]
         change = resource["change"]
         actions = change.get("actions", [])
-
-        if "create" in actions and "delete" in actions:
-            action = "replace"
-        elif "delete" in actions:
-            action = "delete"
-        elif "create" in actions:
-            action = "create"
-        elif "update" in actions:
-            action = "update"
-        else:
-            action = "no-op"
+        action = get_primary_action(actions)
 
         resources_by_address[address] = {
             "type": resource["type"],
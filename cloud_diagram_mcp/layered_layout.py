@@ -0,0 +1,288 @@
+"""
+Layered layout engine - Renders hierarchical diagrams without Graphviz.
+
+A Sugiyama-style layout specialised to this diagram: the architectural tiers
+of LAYER_MAPPING are the ranks, so rank assignment is free, and the only real
+work is ordering nodes inside their clusters to reduce edge crossings. That
+is done with barycenter sweeps over the dependency edges, each sweep being a
+sort per cluster, so the whole layout is O(E + n log n) and emits the SVG
+directly in the same shape Graphviz produces (`class="node"` groups titled
+with the resource address, `class="cluster"` and `class="edge"` groups).
+"""
+
+import html
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from cloud_diagram_mcp.visualizer_hierarchical import (
+    EDGE_COLORS,
+    get_icon_class,
+    get_icon_path,
+    get_resource_label,
+)
+
+Edge = Tuple[str, str, str, Optional[str]]
+
+# Geometry in points, matching the Graphviz attributes in graphviz_layout._diagram_attrs
+_NODE_W = 108.0  # width 1.5in
+_NODE_H = 136.8  # diagrams node height 1.9in
+_ICON = 96.0
+_NODESEP = 57.6  # nodesep 0.8in
+_RANKSEP = 72.0  # ranksep 1.0in
+_PAD = 57.6  # pad 0.8in
+_ROW_GAP = 28.8
+_CLUSTER_MARGIN = 16.0
+_CLUSTER_LABEL = 22.0
+_TITLE_H = 32.0
+
+# Runs of nodes wrap into a roughly square grid instead of one endless row
+_MIN_WRAP = 12
+
+# Alternating down/up barycenter sweeps
+_SWEEPS = 4
+
+# Same palette as diagrams.Cluster, by nesting depth
+_CLUSTER_COLORS = ("#E5F5FD", "#EBF3E7", "#ECE8F6", "#FDF7E3")
+
+_FONT = 'font-family="Sans-Serif"'
+
+
+class _Run:
+    """Consecutive resource items of one cluster, laid out as a grid."""
+
+    __slots__ = ("items", "rank", "cols", "rows", "w", "h", "slots")
+
+    def __init__(self, items: List[Dict[str, Any]], rank: int) -> None:
+        self.items = items
+        self.rank = rank
+        n = len(items)
+        self.cols = n if n <= _MIN_WRAP else max(_MIN_WRAP, math.ceil(math.sqrt(2 * n)))
+        self.rows = math.ceil(n / self.cols)
+        self.w = self.cols * _NODE_W + (self.cols - 1) * _NODESEP
+        self.h = self.rows * _NODE_H + (self.rows - 1) * _ROW_GAP
+        self.slots: List[Tuple[float, float]] = []
+
+    def place(self, x: float, y: float) -> None:
+        # Left-to-right slot order, so sorted items map onto increasing x
+        slots = [
+            (
+                x + (i % self.cols) * (_NODE_W + _NODESEP),
+                y + (i // self.cols) * (_NODE_H + _ROW_GAP),
+            )
+            for i in range(len(self.items))
+        ]
+        slots.sort()
+        self.slots = slots
+
+
+class _Box:
+    """A cluster: label, nesting depth, and children laid out side by side."""
+
+    __slots__ = ("label", "depth", "children", "w", "h", "x", "y")
+
+    def __init__(self, cluster: Dict[str, Any], depth: int, rank: int) -> None:
+        self.label = cluster["label"]
+        self.depth = depth
+        self.children: List[Any] = []
+        pending: List[Dict[str, Any]] = []
+        for child in cluster["children"]:
+            if "children" in child:
+                if pending:
+                    self.children.append(_Run(pending, rank))
+                    pending = []
+                self.children.append(_Box(child, depth + 1, rank))
+            else:
+                pending.append(child)
+        if pending:
+            self.children.append(_Run(pending, rank))
+
+        inner_w = sum(c.w for c in self.children) + _NODESEP * max(0, len(self.children) - 1)
+        inner_h = max((c.h for c in self.children), default=0.0)
+        self.w = inner_w + 2 * _CLUSTER_MARGIN
+        self.h = inner_h + 2 * _CLUSTER_MARGIN + _CLUSTER_LABEL
+        self.x = self.y = 0.0
+
+    def place(self, x: float, y: float, boxes: List["_Box"], runs: List[_Run]) -> None:
+        self.x, self.y = x, y
+        boxes.append(self)
+        top = y + _CLUSTER_LABEL + _CLUSTER_MARGIN
+        inner_h = self.h - 2 * _CLUSTER_MARGIN - _CLUSTER_LABEL
+        cx = x + _CLUSTER_MARGIN
+        for child in self.children:
+            cy = top + (inner_h - child.h) / 2
+            if isinstance(child, _Box):
+                child.place(cx, cy, boxes, runs)
+            else:
+                child.place(cx, cy)
+                runs.append(child)
+            cx += child.w + _NODESEP
+
+
+def _order(runs: List[_Run], edges: List[Edge]) -> Dict[str, Tuple[float, float]]:
+    """Assign items to slots with barycenter sweeps; return node top-left corners."""
+    rank: Dict[str, int] = {}
+    pos: Dict[str, Tuple[float, float]] = {}
+    for run in runs:
+        for item, slot in zip(run.items, run.slots):
+            rank[item["address"]] = run.rank
+            pos[item["address"]] = slot
+
+    neighbours: Dict[str, List[str]] = {}
+    for src, dst, _, _ in edges:
+        if rank[src] != rank[dst]:
+            neighbours.setdefault(src, []).append(dst)
+            neighbours.setdefault(dst, []).append(src)
+    if not neighbours:
+        return pos
+
+    for sweep in range(_SWEEPS):
+        downward = sweep % 2 == 0
+        for run in sorted(runs, key=lambda r: r.rank, reverse=not downward):
+            if len(run.items) < 2:
+                continue
+            keys = {}
+            for index, item in enumerate(run.items):
+                address = item["address"]
+                xs = [
+                    pos[n][0]
+                    for n in neighbours.get(address, ())
+                    if (rank[n] < run.rank) == downward
+                ]
+                keys[id(item)] = (sum(xs) / len(xs) if xs else pos[address][0], index)
+            run.items.sort(key=lambda item: keys[id(item)])
+            for item, slot in zip(run.items, run.slots):
+                pos[item["address"]] = slot
+    return pos
+
+
+def _edge_path(
+    start: Tuple[float, float], end: Tuple[float, float], vertical: bool
+) -> Tuple[str, str, Tuple[float, float]]:
+    """Return the curve, arrowhead polygon points and label anchor of an edge."""
+    (sx, sy), (tx, ty) = start, end
+    if vertical:
+        c1, c2 = (sx, (sy + ty) / 2), (tx, (sy + ty) / 2)
+    else:
+        c1, c2 = ((sx + tx) / 2, sy), ((sx + tx) / 2, ty)
+
+    # Stop the curve at the arrow base, 10pt before the target
+    dx, dy = tx - c2[0], ty - c2[1]
+    length = math.hypot(dx, dy) or 1.0
+    ux, uy = dx / length, dy / length
+    bx, by = tx - 10 * ux, ty - 10 * uy
+    path = f"M{sx:.2f},{sy:.2f} C{c1[0]:.2f},{c1[1]:.2f} {c2[0]:.2f},{c2[1]:.2f} {bx:.2f},{by:.2f}"
+    arrow = (
+        f"{tx:.2f},{ty:.2f} {bx - 3.5 * uy:.2f},{by + 3.5 * ux:.2f} "
+        f"{bx + 3.5 * uy:.2f},{by - 3.5 * ux:.2f} {tx:.2f},{ty:.2f}"
+    )
+    mid = ((sx + 3 * c1[0] + 3 * c2[0] + tx) / 8, (sy + 3 * c1[1] + 3 * c2[1] + ty) / 8)
+    return path, arrow, mid
+
+
+def _anchors(
+    src: Tuple[float, float], dst: Tuple[float, float]
+) -> Tuple[Tuple[float, float], Tuple[float, float], bool]:
+    """Pick the sides of two node boxes (top-left corners) an edge connects."""
+    (sx, sy), (tx, ty) = src, dst
+    if ty >= sy + _NODE_H:
+        return (sx + _NODE_W / 2, sy + _NODE_H), (tx + _NODE_W / 2, ty), True
+    if ty + _NODE_H <= sy:
+        return (sx + _NODE_W / 2, sy), (tx + _NODE_W / 2, ty + _NODE_H), True
+    mid_s, mid_t = sy + _NODE_H / 2, ty + _NODE_H / 2
+    if tx >= sx:
+        return (sx + _NODE_W, mid_s), (tx, mid_t), False
+    return (sx, mid_s), (tx + _NODE_W, mid_t), False
+
+
+def render_layered_svg(title: str, tree: List[Dict[str, Any]], edges: List[Edge]) -> str:
+    """
+    Lay out a cluster tree with the layered engine and render it to SVG.
+
+    Args:
+        title: Diagram title, drawn below the diagram like Graphviz's graph label
+        tree: Top-level clusters from _cluster_tree, one rank each, top to bottom
+        edges: (from, to, action, label) tuples between addresses in the tree
+
+    Returns:
+        SVG content as a string, with icons referenced by PNG path
+    """
+    tops = [_Box(cluster, 0, rank) for rank, cluster in enumerate(tree)]
+    content_w = max((box.w for box in tops), default=0.0)
+    content_h = sum(box.h for box in tops) + _RANKSEP * max(0, len(tops) - 1)
+    width = content_w + 2 * _PAD
+    height = content_h + 2 * _PAD + _TITLE_H
+
+    # Graphviz convention: origin bottom-left, y negative upwards
+    boxes: List[_Box] = []
+    runs: List[_Run] = []
+    y = -height + _PAD
+    for box in tops:
+        box.place(_PAD + (content_w - box.w) / 2, y, boxes, runs)
+        y += box.h + _RANKSEP
+
+    pos = _order(runs, edges)
+
+    out = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+        f'<svg width="{width:.0f}pt" height="{height:.0f}pt" viewBox="0.00 0.00 {width:.2f} '
+        f'{height:.2f}" xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink">',
+        f'<g id="graph0" class="graph" transform="translate(0 {height:.2f})">',
+        f"<title>{html.escape(title)}</title>",
+        f'<rect fill="white" stroke="none" x="0" y="{-height:.2f}" '
+        f'width="{width:.2f}" height="{height:.2f}"/>',
+        f'<text text-anchor="middle" x="{width / 2:.2f}" y="{-_PAD / 2:.2f}" {_FONT} '
+        f'font-size="14.00" fill="#2D3436">{html.escape(title)}</text>',
+    ]
+
+    for i, box in enumerate(boxes, 1):
+        label = html.escape(box.label)
+        out.append(
+            f'<g id="clust{i}" class="cluster"><title>cluster_{label}</title>'
+            f'<rect fill="{_CLUSTER_COLORS[box.depth % len(_CLUSTER_COLORS)]}" '
+            f'stroke="#AEB6BE" rx="8" x="{box.x:.2f}" y="{box.y:.2f}" '
+            f'width="{box.w:.2f}" height="{box.h:.2f}"/>'
+            f'<text text-anchor="start" x="{box.x + 8:.2f}" y="{box.y + 16:.2f}" {_FONT} '
+            f'font-size="12.00" fill="#2D3436">{label}</text></g>'
+        )
+
+    icons: Dict[str, str] = {}
+    node_id = 0
+    for run in runs:
+        for item in run.items:
+            node_id += 1
+            rtype = item["type"]
+            if rtype not in icons:
+                icons[rtype] = html.escape(get_icon_path(get_icon_class(rtype)))
+            x, y = pos[item["address"]]
+            label = html.escape(get_resource_label(item, item.get("action", "no-op")))
+            out.append(
+                f'<g id="node{node_id}" class="node"><title>{html.escape(item["address"])}'
+                f'</title><image xlink:href="{icons[rtype]}" width="{_ICON:.0f}px" '
+                f'height="{_ICON:.0f}px" preserveAspectRatio="xMinYMin meet" '
+                f'x="{x + (_NODE_W - _ICON) / 2:.2f}" y="{y + 4:.2f}"/>'
+                f'<text text-anchor="middle" x="{x + _NODE_W / 2:.2f}" y="{y + _NODE_H - 8:.2f}" '
+                f'{_FONT} font-size="11.00" fill="#2D3436">{label}</text></g>'
+            )
+
+    for i, (src, dst, action, label) in enumerate(edges, 1):
+        color = EDGE_COLORS.get(action, "gray")
+        dashed = ' stroke-dasharray="5,2"' if action == "no-op" else ""
+        stroke_width = "1" if action == "no-op" else "2"
+        start, end, vertical = _anchors(pos[src], pos[dst])
+        path, arrow, mid = _edge_path(start, end, vertical)
+        out.append(
+            f'<g id="edge{i}" class="edge"><title>{html.escape(f"{src}->{dst}")}</title>'
+            f'<path fill="none" stroke="{color}" stroke-width="{stroke_width}"{dashed} d="{path}"/>'
+            f'<polygon fill="{color}" stroke="{color}" stroke-width="{stroke_width}" '
+            f'points="{arrow}"/>'
+        )
+        if label:
+            out.append(
+                f'<text text-anchor="middle" x="{mid[0]:.2f}" y="{mid[1]:.2f}" {_FONT} '
+                f'font-size="9.00" fill="{color}">{html.escape(label)}</text>'
+            )
+        out.append("</g>")
+
+    out.append("</g>\n</svg>\n")
+    return "\n".join(out)
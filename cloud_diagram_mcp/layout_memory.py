@@ -0,0 +1,141 @@
+"""
+Layout memory - Node positions from the previous render of each workspace.
+
+Consecutive plans of the same workspace usually differ by a handful of
+resources. Remembering where every address was placed lets the next render
+pin those nodes in place and only lay out what is new, which keeps diagrams
+visually stable and makes re-render cost depend on the size of the change.
+"""
+
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+Positions = Dict[str, Tuple[float, float]]
+
+_DEFAULT_MAX_WORKSPACES = 64
+
+# Seed only when most of the new diagram is already known; otherwise a fresh
+# layered layout is better than a handful of pins
+_MIN_SEED_COVERAGE = 0.5
+
+_NODE_RE = re.compile(r'<g id="[^"]*" class="node">\s*<title>([^<]*)</title>(.*?)</g>', re.S)
+_BOX_RE = re.compile(r'<polygon\b[^>]*\bpoints="([^"]+)"')
+_ICON_RE = re.compile(r"<(?:image|use)\b([^>]*)/?>")
+_DEF_RE = re.compile(r'<image id="([^"]+)"([^>]*)/?>')
+_ATTR_RE = re.compile(r'([\w:-]+)="([^"]*)"')
+
+
+def _length(value: str) -> float:
+    return float(value[:-2] if value.endswith("px") else value)
+
+
+def positions_from_svg(svg: str) -> Positions:
+    """
+    Recover node centre positions from a rendered diagram.
+
+    The centre is that of the node's box, which Graphviz nodes carry as an
+    invisible border polygon. Element coordinates inside the graph group are
+    Graphviz points with y negated (the group's translate only moves the
+    drawing onto the page), so they round-trip exactly into pinned `pos`
+    values. SVGs without node boxes fall back to the icon centre. Works on
+    raw Graphviz output and on SVGs whose icons were moved into <defs> by
+    the embedder.
+
+    Returns:
+        Mapping of resource address to (x, y) in Graphviz points, y up
+    """
+    def_sizes = {def_id: dict(_ATTR_RE.findall(attrs)) for def_id, attrs in _DEF_RE.findall(svg)}
+    positions: Positions = {}
+    for title, body in _NODE_RE.findall(svg):
+        box = _BOX_RE.search(body)
+        if box is not None:
+            try:
+                points = [tuple(map(float, p.split(","))) for p in box.group(1).split()]
+            except ValueError:
+                points = []
+            if points:
+                xs = [x for x, _ in points]
+                ys = [y for _, y in points]
+                cx, cy = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+                positions[html.unescape(title)] = (round(cx, 2), round(-cy, 2))
+                continue
+        icon = _ICON_RE.search(body)
+        if icon is None:
+            continue
+        attrs = dict(_ATTR_RE.findall(icon.group(1)))
+        href = attrs.get("xlink:href", "")
+        if href.startswith("#"):
+            attrs = {**def_sizes.get(href[1:], {}), **attrs}
+        try:
+            cx = _length(attrs.get("x", "0")) + _length(attrs["width"]) / 2
+            cy = _length(attrs.get("y", "0")) + _length(attrs["height"]) / 2
+        except (KeyError, ValueError):
+            continue
+        # SVG output negates Graphviz's y axis
+        positions[html.unescape(title)] = (round(cx, 2), round(-cy, 2))
+    return positions
+
+
+def seed_positions(previous: Optional[Positions], addresses: Iterable[str]) -> Optional[Positions]:
+    """
+    Select the remembered positions that still apply to a new render.
+
+    Returns:
+        Positions for the addresses that were placed before, or None when too
+        few of them are known for seeding to be worthwhile
+    """
+    if not previous:
+        return None
+    addresses = list(addresses)
+    seed = {a: previous[a] for a in addresses if a in previous}
+    if not addresses or len(seed) / len(addresses) < _MIN_SEED_COVERAGE:
+        return None
+    return seed
+
+
+class LayoutMemory:
+    """Thread-safe, LRU-bounded map of workspace name to node positions."""
+
+    def __init__(self, max_workspaces: int = _DEFAULT_MAX_WORKSPACES) -> None:
+        self.max_workspaces = max_workspaces
+        self._workspaces: "OrderedDict[str, Positions]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, workspace: str) -> Optional[Positions]:
+        with self._lock:
+            positions = self._workspaces.get(workspace)
+            if positions is not None:
+                self._workspaces.move_to_end(workspace)
+            return positions
+
+    def update(self, workspace: str, positions: Positions) -> None:
+        if not positions:
+            return
+        with self._lock:
+            self._workspaces[workspace] = positions
+            self._workspaces.move_to_end(workspace)
+            while len(self._workspaces) > self.max_workspaces:
+                self._workspaces.popitem(last=False)
+
+
+_memory: Optional[LayoutMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_layout_memory() -> LayoutMemory:
+    """
+    Return the process-wide layout memory.
+
+    Configured via CLOUD_DIAGRAM_LAYOUT_WORKSPACES (default 64 workspaces).
+    """
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = LayoutMemory(
+                int(os.environ.get("CLOUD_DIAGRAM_LAYOUT_WORKSPACES", _DEFAULT_MAX_WORKSPACES))
+            )
+        return _memory
@@ -0,0 +1,192 @@
+"""
+Level of detail - Collapses large plans into aggregate nodes before layout.
+
+Real plans address resources like `module.app.aws_instance.web[17]`. Drawing
+every instance gives diagrams with thousands of nodes that take Graphviz
+minutes and cannot be read. Collapsing happens in two steps:
+
+1. instances of one resource (count / for_each keys) become one node
+2. if that is still too many, module subtrees below a depth become one node
+
+Each aggregate node carries the number of members and per-action counts,
+and dependency edges are merged between groups, so layout cost depends on
+the number of distinct resources or modules rather than on instances.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from cloud_diagram_mcp.dependencies import resolve_dependencies
+from cloud_diagram_mcp.visualizer_hierarchical import get_primary_action
+
+# Instance keys: [0], ["eu-west-1"], ["a\"b"]
+_INDEX_RE = re.compile(r'\[(?:"(?:[^"\\]|\\.)*"|[^\]]*)\]')
+
+_ACTION_SYMBOLS = (("create", "+"), ("update", "~"), ("replace", "*"), ("delete", "-"))
+
+# Aggregate action, most significant first, as a Terraform actions list
+_AGGREGATE_ACTIONS = (
+    ("replace", ["delete", "create"]),
+    ("delete", ["delete"]),
+    ("create", ["create"]),
+    ("update", ["update"]),
+)
+
+
+def split_address(address: str) -> Tuple[List[str], str]:
+    """
+    Split a resource address into its module path and resource part.
+
+    Instance keys are dropped, so every instance of a resource (and the
+    configuration address of the resource itself) gives the same result.
+
+    Example:
+        'module.app["x"].module.db.aws_db_instance.main[0]' ->
+        (["module.app", "module.db"], "aws_db_instance.main")
+    """
+    parts = _INDEX_RE.sub("", address).split(".")
+    modules = []
+    i = 0
+    while i + 2 < len(parts) and parts[i] == "module":
+        modules.append(f"module.{parts[i + 1]}")
+        i += 2
+    return modules, ".".join(parts[i:])
+
+
+def _group_key(modules: List[str], resource: str, depth: Optional[int]) -> Tuple[str, bool]:
+    """Return (group address, is module group) at a module depth (None: no module groups)."""
+    if depth is not None and len(modules) > depth:
+        return ".".join(modules[: depth + 1]), True
+    return ".".join(modules + [resource]), False
+
+
+def _count_suffix(actions: Counter) -> str:
+    changes = " ".join(f"{symbol}{actions[a]}" for a, symbol in _ACTION_SYMBOLS if actions[a])
+    return f" ({changes})" if changes else ""
+
+
+def _aggregate_actions(actions: Counter) -> List[str]:
+    for action, terraform_actions in _AGGREGATE_ACTIONS:
+        if actions[action]:
+            return list(terraform_actions)
+    return ["no-op"]
+
+
+def collapse_plan(
+    plan_data: Dict[str, Any], max_nodes: int, module_depth: Optional[int] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Collapse a plan's resources into aggregate nodes for the diagram.
+
+    Args:
+        plan_data: Parsed (or streamed) Terraform plan
+        max_nodes: Collapse automatically when the plan has more resources
+            than this: first instances, then module subtrees from the deepest
+            level up until the node count fits
+        module_depth: Explicit level of detail instead of the automatic one:
+            instances are always collapsed, and modules nested deeper than
+            this many levels become one node (0 = one node per top-level module)
+
+    Returns:
+        (plan, summary). plan has the shape generate_svg expects, with one
+        resource_changes entry per node; summary describes the aggregates, or
+        is None when nothing was collapsed and plan is plan_data itself.
+    """
+    resource_changes = plan_data.get("resource_changes", [])
+    if module_depth is None and len(resource_changes) <= max_nodes:
+        return plan_data, None
+
+    split = [split_address(rc["address"]) for rc in resource_changes]
+    if module_depth is None:
+        depth: Optional[int] = None
+        levels = max((len(modules) for modules, _ in split), default=0)
+        candidates = [None] + list(range(levels - 1, -1, -1))
+        for depth in candidates:
+            if len({_group_key(m, r, depth)[0] for m, r in split}) <= max_nodes:
+                break
+    else:
+        depth = module_depth
+
+    # group address -> members, per-action counts, member types, is module group
+    groups: Dict[str, Dict[str, Any]] = {}
+    for rc, (modules, resource) in zip(resource_changes, split):
+        key, is_module = _group_key(modules, resource, depth)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "members": [],
+                "actions": Counter(),
+                "types": Counter(),
+                "module": is_module,
+            }
+        group["members"].append(rc)
+        group["actions"][get_primary_action(rc["change"]["actions"])] += 1
+        group["types"][rc["type"]] += 1
+
+    # A group of one keeps its own address, so it stays clickable
+    node_address = {
+        key: group["members"][0]["address"] if len(group["members"]) == 1 else key
+        for key, group in groups.items()
+    }
+
+    collapsed = []
+    aggregates: Dict[str, Dict[str, Any]] = {}
+    for key, group in groups.items():
+        members = group["members"]
+        if len(members) == 1:
+            rc = members[0]
+            collapsed.append(
+                {
+                    "address": rc["address"],
+                    "type": rc["type"],
+                    "name": rc["name"],
+                    "change": {"actions": list(rc["change"]["actions"])},
+                }
+            )
+            continue
+        count = len(members)
+        if group["module"]:
+            name = f"{key.rsplit('.', 1)[-1]}: {count} resources"
+        else:
+            name = f"{members[0]['name']} ×{count}"
+        collapsed.append(
+            {
+                "address": key,
+                # Module groups take the icon and layer of their most common type
+                "type": group["types"].most_common(1)[0][0],
+                "name": name + _count_suffix(group["actions"]),
+                "change": {"actions": _aggregate_actions(group["actions"])},
+            }
+        )
+        aggregates[key] = {"count": count, "actions": dict(group["actions"])}
+
+    # Merge dependency edges between groups, dropping edges inside a group
+    depends_on: Dict[str, Dict[str, None]] = {}
+    for address, deps in resolve_dependencies(plan_data).items():
+        src = node_address.get(_group_key(*split_address(address), depth)[0])
+        if src is None:
+            continue
+        for dep in deps:
+            target = node_address.get(_group_key(*split_address(dep), depth)[0])
+            if target is not None and target != src:
+                depends_on.setdefault(src, {})[target] = None
+
+    plan = {
+        "resource_changes": collapsed,
+        "configuration": {
+            "root_module": {
+                "resources": [
+                    {"address": address, "depends_on": list(deps)}
+                    for address, deps in depends_on.items()
+                ]
+            }
+        },
+    }
+    summary = {
+        "resources": len(resource_changes),
+        "nodes": len(collapsed),
+        "module_depth": depth,
+        "aggregates": aggregates,
+    }
+    return plan, summary
@@ -0,0 +1,307 @@
+"""
+Metrics - Per-stage timing and memory instrumentation of the render pipeline.
+
+Each pipeline stage (parsing, classification, layout, icon embedding,
+serialisation, ...) runs inside `stage(name)`, which records its wall time,
+CPU time and optionally its peak traced allocations. Stages are aggregated
+into per-stage histograms for the whole process and, during a tool call
+wrapped with `timed_tool`, collected per call so they can be attached to
+the result as `_timings`. `prometheus()` renders the aggregates together
+with the render cache and render pool counters in the Prometheus text
+exposition format.
+
+Stages that run in a render worker process are collected there and merged
+into the calling thread's call by the render pool.
+
+Configured via environment variables:
+    CLOUD_DIAGRAM_METRICS: "0" disables all instrumentation (default on);
+        `stage()` then returns a shared no-op context manager
+    CLOUD_DIAGRAM_METRICS_MEMORY: "1" also records peak allocations per
+        stage with tracemalloc, which slows Python allocation noticeably
+    CLOUD_DIAGRAM_TIMINGS: "1" attaches `_timings` to tool results
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from cloud_diagram_mcp.serialization import splice
+
+# Upper bounds, in seconds, of the histogram buckets (+Inf is implicit)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stage name -> [wall seconds, CPU seconds, peak bytes or None] of the current call
+_call_stages: ContextVar[Optional[Dict[str, List[Any]]]] = ContextVar(
+    "cloud_diagram_call_stages", default=None
+)
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class _Histogram:
+    """Cumulative bucket counts plus sum and count, as Prometheus expects."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> Iterator[str]:
+        cumulative = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.total:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class _Stage:
+    """Context manager measuring one stage; see Metrics.stage."""
+
+    __slots__ = ("_metrics", "_name", "_wall", "_cpu", "_base")
+
+    def __init__(self, metrics: "Metrics", name: str) -> None:
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self) -> None:
+        if self._metrics.trace_memory:
+            self._base = self._metrics._push_peak()
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        peak = self._metrics._pop_peak(self._base) if self._metrics.trace_memory else None
+        self._metrics.observe(self._name, wall, cpu, peak)
+
+
+class Metrics:
+    """
+    Process-wide stage and tool-call aggregates.
+
+    Args:
+        enabled: Record anything at all
+        trace_memory: Record peak traced allocations per stage (starts tracemalloc)
+        attach_timings: timed_tool adds `_timings` to JSON object results
+    """
+
+    def __init__(
+        self, enabled: bool = True, trace_memory: bool = False, attach_timings: bool = False
+    ) -> None:
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.attach_timings = enabled and attach_timings
+        self._lock = threading.Lock()
+        self._stage_wall: Dict[str, _Histogram] = {}
+        self._stage_cpu: Dict[str, float] = {}
+        self._stage_peak: Dict[str, int] = {}
+        self._tool_wall: Dict[str, _Histogram] = {}
+        self._tool_errors: Dict[str, int] = {}
+        # Per-thread stack of [traced bytes at entry, highest peak of finished children]
+        self._peaks = threading.local()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # -- recording --------------------------------------------------------
+
+    def stage(self, name: str) -> Any:
+        """Return a context manager that measures the stage `name`."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def observe(self, name: str, wall: float, cpu: float, peak: Optional[int] = None) -> None:
+        """Record one finished stage in the aggregates and the current call."""
+        with self._lock:
+            histogram = self._stage_wall.get(name)
+            if histogram is None:
+                histogram = self._stage_wall[name] = _Histogram()
+            histogram.observe(wall)
+            self._stage_cpu[name] = self._stage_cpu.get(name, 0.0) + cpu
+            if peak is not None and peak > self._stage_peak.get(name, -1):
+                self._stage_peak[name] = peak
+        stages = _call_stages.get()
+        if stages is not None:
+            entry = stages.get(name)
+            if entry is None:
+                stages[name] = [wall, cpu, peak]
+            else:
+                # A stage that runs several times in one call is summed
+                entry[0] += wall
+                entry[1] += cpu
+                if peak is not None:
+                    entry[2] = max(entry[2] or 0, peak)
+
+    def merge(self, stages: Dict[str, List[Any]]) -> None:
+        """Record stages collected elsewhere, e.g. in a render worker process."""
+        for name, (wall, cpu, peak) in stages.items():
+            self.observe(name, wall, cpu, peak)
+
+    @contextlib.contextmanager
+    def collect(self) -> Iterator[Dict[str, List[Any]]]:
+        """Collect the stages that finish inside the block into a fresh dict."""
+        stages: Dict[str, List[Any]] = {}
+        token = _call_stages.set(stages)
+        try:
+            yield stages
+        finally:
+            _call_stages.reset(token)
+
+    def _push_peak(self) -> int:
+        stack = getattr(self._peaks, "stack", None)
+        if stack is None:
+            stack = self._peaks.stack = []
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # reset_peak() below would lose the enclosing stage's peak so far
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        stack.append([current, 0])
+        return current
+
+    def _pop_peak(self, base: int) -> int:
+        stack = self._peaks.stack
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, stack.pop()[1])
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        return max(0, peak - base)
+
+    def record_call(self, tool: str, wall: float, error: bool) -> None:
+        with self._lock:
+            histogram = self._tool_wall.get(tool)
+            if histogram is None:
+                histogram = self._tool_wall[tool] = _Histogram()
+            histogram.observe(wall)
+            if error:
+                self._tool_errors[tool] = self._tool_errors.get(tool, 0) + 1
+
+    # -- reporting --------------------------------------------------------
+
+    def prometheus(self, extra: Optional[Dict[str, Tuple[str, str, float]]] = None) -> str:
+        """
+        Render the aggregates in the Prometheus text exposition format.
+
+        Args:
+            extra: Additional metric name -> (type, help, value) samples
+        """
+        lines: List[str] = []
+        with self._lock:
+            lines += [
+                "# HELP cloud_diagram_stage_seconds Wall time per pipeline stage.",
+                "# TYPE cloud_diagram_stage_seconds histogram",
+            ]
+            for name, histogram in sorted(self._stage_wall.items()):
+                lines += histogram.lines("cloud_diagram_stage_seconds", f'stage="{name}"')
+            lines += [
+                "# HELP cloud_diagram_stage_cpu_seconds_total CPU time per pipeline stage.",
+                "# TYPE cloud_diagram_stage_cpu_seconds_total counter",
+            ]
+            for name, cpu in sorted(self._stage_cpu.items()):
+                lines.append(f'cloud_diagram_stage_cpu_seconds_total{{stage="{name}"}} {cpu:.6f}')
+            if self.trace_memory:
+                lines += [
+                    "# HELP cloud_diagram_stage_peak_bytes Highest traced allocation peak per stage.",
+                    "# TYPE cloud_diagram_stage_peak_bytes gauge",
+                ]
+                for name, peak in sorted(self._stage_peak.items()):
+                    lines.append(f'cloud_diagram_stage_peak_bytes{{stage="{name}"}} {peak}')
+            lines += [
+                "# HELP cloud_diagram_tool_seconds Wall time per tool call.",
+                "# TYPE cloud_diagram_tool_seconds histogram",
+            ]
+            for tool, histogram in sorted(self._tool_wall.items()):
+                lines += histogram.lines("cloud_diagram_tool_seconds", f'tool="{tool}"')
+            lines += [
+                "# HELP cloud_diagram_tool_errors_total Tool calls that returned an error.",
+                "# TYPE cloud_diagram_tool_errors_total counter",
+            ]
+            for tool, errors in sorted(self._tool_errors.items()):
+                lines.append(f'cloud_diagram_tool_errors_total{{tool="{tool}"}} {errors}')
+        for name, (kind, help_text, value) in (extra or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+
+def timings_block(stages: Dict[str, List[Any]], total: float) -> Dict[str, Any]:
+    """Compact `_timings` entry: milliseconds per stage, and kB when traced."""
+    block: Dict[str, Any] = {"total_ms": round(total * 1000, 2)}
+    for name, (wall, cpu, peak) in stages.items():
+        entry: Dict[str, Any] = {"wall_ms": round(wall * 1000, 2), "cpu_ms": round(cpu * 1000, 2)}
+        if peak is not None:
+            entry["peak_kb"] = round(peak / 1024, 1)
+        block[name] = entry
+    return block
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance, configured from the environment
+# ---------------------------------------------------------------------------
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide Metrics, configured on first use; see module docstring."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics(
+                    enabled=os.environ.get("CLOUD_DIAGRAM_METRICS", "1") != "0",
+                    trace_memory=os.environ.get("CLOUD_DIAGRAM_METRICS_MEMORY") == "1",
+                    attach_timings=os.environ.get("CLOUD_DIAGRAM_TIMINGS") == "1",
+                )
+    return _metrics
+
+
+def stage(name: str) -> Any:
+    """Measure a pipeline stage on the process-wide Metrics."""
+    return (_metrics or get_metrics()).stage(name)
+
+
+def timed_tool(fn: Callable[..., str]) -> Callable[..., str]:
+    """
+    Instrument a tool that returns a JSON string.
+
+    Records the call's wall time and collects its stages; with
+    CLOUD_DIAGRAM_TIMINGS=1 they are added to a JSON object result as
+    `_timings`, after serialisation so that serialisation is included.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> str:
+        metrics = _metrics or get_metrics()
+        if not metrics.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        with metrics.collect() as stages:
+            result = fn(*args, **kwargs)
+        total = time.perf_counter() - start
+        metrics.record_call(fn.__name__, total, result.startswith('{"error"'))
+        if metrics.attach_timings and result.endswith("}") and not result.startswith('{"error"'):
+            # Splice into the serialised object instead of re-encoding it
+            result = splice(result, "_timings", json.dumps(timings_block(stages, total)))
+        return result
+
+    return wrapper
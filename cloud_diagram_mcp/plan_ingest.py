@@ -0,0 +1,238 @@
+"""
+Streaming Terraform plan ingestion.
+
+`terraform show -json` output is dominated by `prior_state`, `planned_values`
+and the `before`/`after` blobs of every resource change, none of which affect
+the diagram. This module scans the raw document and materialises only the
+fields generate_svg needs, so peak memory stays close to the size of the
+input buffer instead of several times it:
+
+- `prior_state`, `planned_values` and other large top-level values are
+  skipped with a bracket-matching scanner without building any objects
+- each `resource_changes` element is decoded on its own and projected to
+  address/type/name/actions before the next one is read
+- `configuration` is reduced to the resolved resource dependencies
+
+Files are memory-mapped, so a plan on disk never has to be read into a
+Python string at all.
+"""
+
+import json
+import mmap
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from cloud_diagram_mcp.dependencies import dependency_configuration
+
+Buffer = Union[str, bytes, mmap.mmap]
+
+# Unrolled-loop string pattern: fast on long strings, no catastrophic backtracking
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+_PATTERNS = {
+    kind: {
+        "ws": re.compile(conv(r"[ \t\n\r]*")),
+        "string": re.compile(conv(_STRING)),
+        # Consumes everything up to the next structural bracket in one match,
+        # so the Python-level loop runs once per bracket, not once per string.
+        # Unrolled like _STRING: without a following bracket (a truncated
+        # document) it fails in linear time instead of backtracking
+        "bracket": re.compile(conv(r'[^"\[\]{}]*(?:' + _STRING + r'[^"\[\]{}]*)*([\[\]{}])')),
+        "scalar": re.compile(conv(r"[^,\]}\s]+")),
+    }
+    for kind, conv in (("str", lambda p: p), ("bytes", lambda p: p.encode("ascii")))
+}
+
+_DECODER = json.JSONDecoder()
+
+# Top-level keys that are decoded as-is (small scalars)
+_SCALAR_KEYS = ("format_version", "terraform_version")
+
+
+class _Scanner:
+    """Minimal JSON scanner that locates values without decoding them."""
+
+    def __init__(self, buf: Buffer) -> None:
+        self.buf = buf
+        self.is_text = isinstance(buf, str)
+        patterns = _PATTERNS["str" if self.is_text else "bytes"]
+        self._ws = patterns["ws"]
+        self._string = patterns["string"]
+        self._bracket = patterns["bracket"]
+        self._scalar = patterns["scalar"]
+        self.pos = 0
+
+    def error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, "", self.pos)
+
+    def peek(self) -> str:
+        self.pos = self._ws.match(self.buf, self.pos).end()
+        if self.pos >= len(self.buf):
+            raise self.error("Unexpected end of document")
+        char = self.buf[self.pos : self.pos + 1]
+        return char if self.is_text else char.decode("ascii", errors="replace")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def decode(self, start: int, end: int) -> Any:
+        return json.loads(self.buf[start:end])
+
+    def read_value(self) -> Tuple[Any, int, int]:
+        """Decode the next value and return it with its (start, end) span."""
+        self.peek()
+        start = self.pos
+        if self.is_text:
+            # The C decoder finds the end of the value itself in a single pass
+            value, self.pos = _DECODER.raw_decode(self.buf, start)
+            return value, start, self.pos
+        start, end = self.skip_value()
+        return self.decode(start, end), start, end
+
+    def read_key(self) -> str:
+        if self.peek() != '"':
+            raise self.error("Expecting property name enclosed in double quotes")
+        match = self._string.match(self.buf, self.pos)
+        if match is None:
+            raise self.error("Unterminated string")
+        self.pos = match.end()
+        self.expect(":")
+        return self.decode(match.start(), match.end())
+
+    def skip_value(self) -> Tuple[int, int]:
+        """Advance past the next value and return its (start, end) span."""
+        char = self.peek()
+        start = self.pos
+        if char == '"':
+            match = self._string.match(self.buf, start)
+            if match is None:
+                raise self.error("Unterminated string")
+            self.pos = match.end()
+        elif char in "{[":
+            depth = 0
+            pos = start
+            while True:
+                # Anchored: matches tile the value, and a failed match is not
+                # retried at every later offset as a search would be
+                match = self._bracket.match(self.buf, pos)
+                if match is None:
+                    raise self.error("Unterminated object or array")
+                pos = match.end()
+                if match.group(1) in ("{", "[", b"{", b"["):
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = pos
+                        break
+        else:
+            match = self._scalar.match(self.buf, start)
+            if match is None:
+                raise self.error("Expecting value")
+            self.pos = match.end()
+        return start, self.pos
+
+    def iter_members(self, open_char: str, close_char: str) -> Any:
+        """Yield once per member of the object or array at the cursor."""
+        self.expect(open_char)
+        if self.peek() == close_char:
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == close_char:
+                return
+            if char != ",":
+                self.pos -= 1
+                raise self.error(f"Expecting ',' or {close_char!r} delimiter")
+
+
+# ---------------------------------------------------------------------------
+# Projections onto the fields the diagram needs
+# ---------------------------------------------------------------------------
+
+
+def _project_resource_change(rc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "address": rc.get("address"),
+        "type": rc.get("type"),
+        "name": rc.get("name"),
+        "change": {"actions": list(rc.get("change", {}).get("actions", []))},
+    }
+
+
+def _project_configuration(
+    configuration: Dict[str, Any], resource_changes: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    # Resolve module_calls and expression references to instance edges once,
+    # so the full configuration tree is not kept
+    return dependency_configuration(
+        {"resource_changes": resource_changes, "configuration": configuration}
+    )
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def scan_plan(buf: Buffer) -> Tuple[Dict[str, Any], Dict[str, Tuple[int, int]]]:
+    """
+    Scan a Terraform plan document and extract the diagram-relevant fields.
+
+    Args:
+        buf: The plan JSON as str, bytes or a memory map
+
+    Returns:
+        A tuple of (plan_data, offsets). plan_data has the same shape as a
+        parsed plan, restricted to resource_changes[*].{address, type, name,
+        change.actions} and the dependencies resolved to instance addresses
+        (see dependencies.dependency_configuration). offsets maps each
+        resource address to the (start, end) span of its full resource_changes
+        element in buf, so attribute details can be decoded lazily.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid plan JSON
+    """
+    scanner = _Scanner(buf)
+    plan_data: Dict[str, Any] = {}
+    resource_changes: List[Dict[str, Any]] = []
+    offsets: Dict[str, Tuple[int, int]] = {}
+    configuration: Optional[Dict[str, Any]] = None
+
+    for _ in scanner.iter_members("{", "}"):
+        key = scanner.read_key()
+        if key == "resource_changes":
+            plan_data["resource_changes"] = resource_changes
+            for _ in scanner.iter_members("[", "]"):
+                value, start, end = scanner.read_value()
+                rc = _project_resource_change(value)
+                resource_changes.append(rc)
+                offsets[rc["address"]] = (start, end)
+        elif key == "configuration":
+            # Resolved once resource_changes, which may come later, are known
+            configuration, _, _ = scanner.read_value()
+        elif key in _SCALAR_KEYS:
+            plan_data[key], _, _ = scanner.read_value()
+        else:
+            scanner.skip_value()
+
+    if configuration is not None:
+        plan_data["configuration"] = _project_configuration(configuration, resource_changes)
+    return plan_data, offsets
+
+
+def ingest_plan_text(plan: Union[str, bytes]) -> Dict[str, Any]:
+    """Extract the diagram-relevant fields from an in-memory plan document."""
+    return scan_plan(plan)[0]
+
+
+def ingest_plan_file(path: str) -> Dict[str, Any]:
+    """Extract the diagram-relevant fields from a plan file without reading it into memory."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return scan_plan(buf)[0]
@@ -0,0 +1,167 @@
+"""
+Plan store - Upload-once storage for Terraform plans, addressed by content hash.
+
+A plan is ingested a single time and gets a handle. Later tool calls pass
+the handle instead of re-sending megabytes of JSON, and attribute details
+for a single resource are decoded on demand from the stored document using
+the offsets recorded by the streaming ingester.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+from cloud_diagram_mcp.plan_ingest import scan_plan
+
+_DEFAULT_MAX_MB = 512
+_DEFAULT_TTL_SECONDS = 3600.0
+
+
+def _byte_offsets(text: str, offsets: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+    """Convert character spans in `text` to spans in its UTF-8 encoding."""
+    positions: Dict[int, int] = {}
+    char = byte = 0
+    for position in sorted({p for span in offsets.values() for p in span}):
+        byte += len(text[char:position].encode("utf-8"))
+        char = position
+        positions[position] = byte
+    return {
+        address: (positions[start], positions[end]) for address, (start, end) in offsets.items()
+    }
+
+
+class StoredPlan:
+    """A stored plan document (UTF-8 bytes) with its diagram fields and per-resource offsets."""
+
+    def __init__(
+        self,
+        handle: str,
+        document: bytes,
+        plan_data: Dict[str, Any],
+        offsets: Dict[str, Tuple[int, int]],
+    ) -> None:
+        self.handle = handle
+        self.document = document
+        self.plan_data = plan_data
+        self.offsets = offsets
+        self.size = len(document)
+        self.last_access = time.monotonic()
+
+    def resource_detail(self, address: str) -> Optional[Dict[str, Any]]:
+        """Decode the full resource_changes entry for one address."""
+        span = self.offsets.get(address)
+        if span is None:
+            return None
+        return json.loads(self.document[span[0] : span[1]])
+
+
+class PlanStore:
+    """
+    Thread-safe plan store with TTL- and memory-bounded eviction.
+
+    Args:
+        max_bytes: Maximum total size of stored plan documents
+        ttl_seconds: Plans not accessed for this long are evicted
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = _DEFAULT_MAX_MB * 1024 * 1024,
+        ttl_seconds: float = _DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._plans: "OrderedDict[str, StoredPlan]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, document: Union[str, bytes]) -> StoredPlan:
+        """
+        Ingest a plan document, or return the existing entry for identical content.
+
+        Raises:
+            json.JSONDecodeError: If the document is not valid plan JSON
+        """
+        # Encoded once: hashed, stored, and counted against max_bytes
+        raw = document.encode("utf-8") if isinstance(document, str) else document
+        handle = hashlib.sha256(raw).hexdigest()[:32]
+
+        existing = self.get(handle)
+        if existing is not None:
+            return existing
+
+        # Text scans fastest; its offsets only differ from the bytes' beyond ASCII
+        plan_data, offsets = scan_plan(document)
+        if isinstance(document, str) and len(raw) != len(document):
+            offsets = _byte_offsets(document, offsets)
+        stored = StoredPlan(handle, raw, plan_data, offsets)
+        with self._lock:
+            # A concurrent upload of the same plan may have stored it meanwhile
+            existing = self._plans.get(handle)
+            if existing is not None:
+                existing.last_access = time.monotonic()
+                self._plans.move_to_end(handle)
+                return existing
+            self._plans[handle] = stored
+            self._bytes += stored.size
+            self._evict()
+        return stored
+
+    def get(self, handle: str) -> Optional[StoredPlan]:
+        """Return a stored plan and refresh its TTL, or None if unknown or expired."""
+        with self._lock:
+            self._evict()
+            stored = self._plans.get(handle)
+            if stored is None:
+                return None
+            stored.last_access = time.monotonic()
+            self._plans.move_to_end(handle)
+            return stored
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number and total size of stored plans."""
+        with self._lock:
+            return {"plans": len(self._plans), "bytes": self._bytes}
+
+    def _evict(self) -> None:
+        """Drop expired plans, then least recently used ones over the size limit."""
+        deadline = time.monotonic() - self.ttl_seconds
+        for handle in [h for h, p in self._plans.items() if p.last_access < deadline]:
+            self._bytes -= self._plans.pop(handle).size
+        while len(self._plans) > 1 and self._bytes > self.max_bytes:
+            _, evicted = self._plans.popitem(last=False)
+            self._bytes -= evicted.size
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance, configured from the environment
+# ---------------------------------------------------------------------------
+
+_store: Optional[PlanStore] = None
+_store_lock = threading.Lock()
+
+
+def get_plan_store() -> PlanStore:
+    """
+    Return the process-wide plan store.
+
+    Configured via environment variables:
+        CLOUD_DIAGRAM_PLAN_STORE_MB: total size limit in MB (default 512)
+        CLOUD_DIAGRAM_PLAN_STORE_TTL: idle time-to-live in seconds (default 3600)
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PlanStore(
+                max_bytes=int(os.environ.get("CLOUD_DIAGRAM_PLAN_STORE_MB", _DEFAULT_MAX_MB))
+                * 1024
+                * 1024,
+                ttl_seconds=float(
+                    os.environ.get("CLOUD_DIAGRAM_PLAN_STORE_TTL", _DEFAULT_TTL_SECONDS)
+                ),
+            )
+        return _store
@@ -0,0 +1,70 @@
+"""
+Response projection - Trims tool results down to what the MCP App UI reads.
+
+The UI (`ui/src/types.ts` parsePlanData) only uses the version, each resource
+change's address/type/name/actions/before/after, and the dependency list of
+each resource. Everything else in a Terraform plan — `prior_state`,
+`planned_values`, the full `configuration` tree — is dead weight on the wire
+and in the LLM context.
+"""
+
+from typing import Any, Dict, List
+
+from cloud_diagram_mcp.dependencies import resolve_dependencies
+
+# Top-level keys passed through unchanged
+_PASSTHROUGH_KEYS = (
+    "terraform_version",
+    "_streamed",
+    "_plan_handle",
+    "_lod",
+    "_focus",
+    "_server_svg",
+    "_server_svg_status",
+    "_svg_stats",
+)
+
+
+def dependency_map(plan_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Map each resource address to the resource addresses it depends on."""
+    return resolve_dependencies(plan_data)
+
+
+def lean_plan(plan_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Project a Terraform plan onto exactly the fields the UI consumes.
+
+    Attribute bodies are kept only for resources that change; no-op resources
+    carry null before/after. The configuration tree is replaced by a flat
+    `_dependencies` map of address to the addresses it depends on, including
+    dependencies inside modules and from expression references.
+
+    Args:
+        plan_data: Parsed (or streamed) Terraform plan
+
+    Returns:
+        The lean plan data
+    """
+    resource_changes = []
+    for rc in plan_data.get("resource_changes", []):
+        change = rc.get("change", {})
+        actions = list(change.get("actions", []))
+        unchanged = not actions or actions == ["no-op"] or actions == ["read"]
+        resource_changes.append(
+            {
+                "address": rc.get("address"),
+                "type": rc.get("type"),
+                "name": rc.get("name"),
+                "change": {
+                    "actions": actions,
+                    "before": None if unchanged else change.get("before"),
+                    "after": None if unchanged else change.get("after"),
+                },
+            }
+        )
+
+    lean: Dict[str, Any] = {k: plan_data[k] for k in _PASSTHROUGH_KEYS if k in plan_data}
+    lean["resource_changes"] = resource_changes
+    # Focused results carry the dependencies of the kept resources already
+    lean["_dependencies"] = plan_data.get("_dependencies") or dependency_map(plan_data)
+    return lean
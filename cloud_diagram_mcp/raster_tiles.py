@@ -0,0 +1,712 @@
+"""
+Raster tiles - Deep-zoom tile pyramids of very large diagrams.
+
+An estate with thousands of resources produces an SVG that browsers and
+documentation sites struggle to open. This module rasterises the rendered
+diagram into a Deep Zoom (DZI) pyramid instead: levels of fixed-size PNG or
+WebP tiles, each level half the resolution of the next, of which a viewer
+such as OpenSeadragon only loads the tiles in its viewport. A `.dzi`
+manifest and a low-resolution overview image are written alongside.
+
+Pillow cannot read SVG, so the rendered SVG is parsed once into a flat list
+of drawing primitives (the subset both layout engines emit: rects,
+polygons, paths, ellipses, text and icons) with a grid index over their
+bounding boxes. Every tile is then drawn directly from the primitives that
+intersect it, at its level's scale, so no full-resolution bitmap is ever
+held in memory and tiles can be drawn in parallel by worker processes.
+
+Configured via environment variables:
+    CLOUD_DIAGRAM_TILE_WORKERS: processes drawing tiles (default: CPU
+        count); "1" draws every tile in the calling process
+"""
+
+import base64
+import io
+import math
+import multiprocessing
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont, features
+
+from cloud_diagram_mcp.metrics import stage
+
+TILE_FORMATS = ("png", "webp")
+
+_DEFAULT_TILE_SIZE = 256
+_DEFAULT_OVERLAP = 1
+_DEFAULT_OVERVIEW_PX = 1024
+
+# World units (SVG points) per cell of the primitive index
+_CELL = 512.0
+
+# Tiles drawn per worker task; pyramids with fewer than a few batches are
+# drawn in-process, where starting workers would cost more than it saves
+_BATCH = 16
+_MIN_PARALLEL_TILES = 4 * _BATCH
+
+# Below these sizes in pixels, primitives are skipped, dashed lines are drawn
+# solid, text is skipped and icons become a grey block
+_MIN_PX = 0.5
+_MIN_DASH_PX = 3.0
+_MIN_TEXT_PX = 4.0
+_MIN_ICON_PX = 6.0
+_ICON_BLOCK = (174, 182, 190)
+
+# Resized icons kept per scene: icons times the pyramid levels they show at
+_ICON_SIZES = 512
+
+_SVG = "{http://www.w3.org/2000/svg}"
+_XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+_TRANSFORM_RE = re.compile(r"(translate|scale)\(\s*([^)]*)\)")
+_PATH_TOKEN_RE = re.compile(r"[MmLlHhVvCcZz]|-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_NUMBER_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+Color = Optional[Tuple[int, ...]]
+Box = Tuple[float, float, float, float]
+# (scale x, scale y, translate x, translate y): p -> (sx * px + tx, sy * py + ty)
+Transform = Tuple[float, float, float, float]
+
+
+# ---------------------------------------------------------------------------
+# SVG -> scene
+# ---------------------------------------------------------------------------
+
+
+class Scene:
+    """
+    Drawing primitives of one diagram in world units, with a spatial index.
+
+    Primitives are tuples starting with their kind and bounding box, in
+    document (paint) order; `icons` maps an icon key to a file path or the
+    PNG bytes of an embedded icon. Icon keys are only unique within one
+    scene, so decoded and resized icons are cached on the scene as well.
+    """
+
+    def __init__(self, width: float, height: float) -> None:
+        self.width = width
+        self.height = height
+        self.primitives: List[Tuple[Any, ...]] = []
+        self.icons: Dict[str, Any] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._icon_images: Dict[str, Optional[Image.Image]] = {}
+        self._icon_sizes: "OrderedDict[Tuple[str, int, int], Optional[Image.Image]]" = OrderedDict()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Workers get the primitives and icon sources, and decode icons themselves
+        state = dict(self.__dict__)
+        state["_icon_images"] = {}
+        state["_icon_sizes"] = OrderedDict()
+        return state
+
+    def add(self, primitive: Tuple[Any, ...]) -> None:
+        index = len(self.primitives)
+        self.primitives.append(primitive)
+        x0, y0, x1, y1 = primitive[1]
+        for cx in range(int(x0 // _CELL), int(x1 // _CELL) + 1):
+            for cy in range(int(y0 // _CELL), int(y1 // _CELL) + 1):
+                self._cells.setdefault((cx, cy), []).append(index)
+
+    def query(self, box: Box) -> List[Tuple[Any, ...]]:
+        """Return the primitives whose bounding box meets `box`, in paint order."""
+        x0, y0, x1, y1 = box
+        found = set()
+        for cx in range(int(x0 // _CELL), int(x1 // _CELL) + 1):
+            for cy in range(int(y0 // _CELL), int(y1 // _CELL) + 1):
+                found.update(self._cells.get((cx, cy), ()))
+        hits = []
+        for index in sorted(found):
+            primitive = self.primitives[index]
+            bx0, by0, bx1, by1 = primitive[1]
+            if bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0:
+                hits.append(primitive)
+        return hits
+
+
+def _color(value: Optional[str]) -> Color:
+    if not value or value in ("none", "transparent"):
+        return None
+    try:
+        return ImageColor.getrgb(value)
+    except ValueError:
+        return None
+
+
+def _floats(text: Optional[str]) -> List[float]:
+    return [float(n) for n in _NUMBER_RE.findall(text or "")]
+
+
+def _compose(outer: Transform, transform: Optional[str]) -> Transform:
+    """Apply an SVG transform attribute (translate and scale only) inside `outer`."""
+    sx, sy, tx, ty = outer
+    for name, args in _TRANSFORM_RE.findall(transform or ""):
+        values = _floats(args) or [0.0]
+        if name == "translate":
+            dx, dy = values[0], values[1] if len(values) > 1 else 0.0
+            tx, ty = sx * dx + tx, sy * dy + ty
+        else:
+            kx, ky = values[0], values[1] if len(values) > 1 else values[0]
+            sx, sy = sx * kx, sy * ky
+    return sx, sy, tx, ty
+
+
+def _apply(t: Transform, points: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    sx, sy, tx, ty = t
+    return [(sx * x + tx, sy * y + ty) for x, y in points]
+
+
+def _bounds(points: Sequence[Tuple[float, float]], pad: float = 0.0) -> Box:
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad
+
+
+def _cubic(
+    p0: Tuple[float, float],
+    p1: Tuple[float, float],
+    p2: Tuple[float, float],
+    p3: Tuple[float, float],
+) -> List[Tuple[float, float]]:
+    """Flatten a cubic Bezier segment, excluding its start point."""
+    chord = math.dist(p0, p3) + math.dist(p0, p1) + math.dist(p2, p3)
+    steps = max(4, min(32, math.ceil(chord / 20)))
+    points = []
+    for i in range(1, steps + 1):
+        t = i / steps
+        u = 1 - t
+        a, b, c, d = u * u * u, 3 * u * u * t, 3 * u * t * t, t * t * t
+        points.append(
+            (
+                a * p0[0] + b * p1[0] + c * p2[0] + d * p3[0],
+                a * p0[1] + b * p1[1] + c * p2[1] + d * p3[1],
+            )
+        )
+    return points
+
+
+def _path_polylines(d: str) -> List[List[Tuple[float, float]]]:
+    """Flatten SVG path data (M, L, H, V, C, Z) into polylines."""
+    tokens = _PATH_TOKEN_RE.findall(d)
+    lines: List[List[Tuple[float, float]]] = []
+    current: List[Tuple[float, float]] = []
+    x = y = 0.0
+    command = "M"
+    i = 0
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+            if command in "Zz":
+                if current:
+                    current.append(current[0])
+                    x, y = current[0]
+                continue
+        relative = command.islower()
+        op = command.upper()
+        arity = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6}.get(op)
+        if arity is None or i + arity > len(tokens):
+            break
+        try:
+            args = [float(token) for token in tokens[i : i + arity]]
+        except ValueError:
+            break
+        i += arity
+        if relative:
+            if op == "H":
+                args[0] += x
+            elif op == "V":
+                args[0] += y
+            else:
+                args = [a + (x if k % 2 == 0 else y) for k, a in enumerate(args)]
+        if op == "M":
+            if len(current) > 1:
+                lines.append(current)
+            x, y = args
+            current = [(x, y)]
+            # Further coordinate pairs after a moveto are linetos
+            command = "l" if relative else "L"
+        elif op in "LHV":
+            if op == "L":
+                x, y = args
+            elif op == "H":
+                x = args[0]
+            else:
+                y = args[0]
+            current.append((x, y))
+        else:
+            start = current[-1] if current else (x, y)
+            current.extend(
+                _cubic(start, (args[0], args[1]), (args[2], args[3]), (args[4], args[5]))
+            )
+            x, y = args[4], args[5]
+    if len(current) > 1:
+        lines.append(current)
+    return lines
+
+
+def _dash(line: List[Tuple[float, float]], pattern: List[float]) -> List[List[Tuple[float, float]]]:
+    """Split a polyline into the "on" segments of a dash pattern."""
+    if len(pattern) % 2:
+        pattern = pattern * 2
+    if not pattern or sum(pattern) <= 0:
+        return [line]
+    dashes: List[List[Tuple[float, float]]] = []
+    index, left, on = 0, pattern[0], True
+    current = [line[0]]
+    for (ax, ay), (bx, by) in zip(line, line[1:]):
+        length = math.hypot(bx - ax, by - ay)
+        done = 0.0
+        while length - done > left:
+            done += left
+            point = (ax + (bx - ax) * done / length, ay + (by - ay) * done / length)
+            if on:
+                current.append(point)
+                dashes.append(current)
+            current = [point]
+            index = (index + 1) % len(pattern)
+            left, on = pattern[index], not on
+        left -= length - done
+        current.append((bx, by))
+    if on and len(current) > 1:
+        dashes.append(current)
+    return dashes
+
+
+def _icon_source(href: str, scene: Scene, keys: Dict[str, Optional[str]]) -> Optional[str]:
+    """Register an <image> href with the scene and return its icon key."""
+    key = keys.get(href, "")
+    if key != "":
+        return key
+    if href.startswith("data:"):
+        header, _, payload = href.partition(",")
+        # Every <use> of an embedded icon shares one key, so it is decoded
+        # and resized once rather than once per node
+        key = f"data:{len(keys)}" if ";base64" in header else None
+        if key is not None:
+            scene.icons[key] = base64.b64decode(payload)
+    else:
+        key = href
+        scene.icons[key] = href
+    keys[href] = key
+    return key
+
+
+def parse_svg(svg: str) -> Scene:
+    """
+    Parse a diagram SVG into a Scene.
+
+    Handles what the layered engine and Graphviz's SVG output use: nested
+    groups with translate/scale transforms, rect, polygon, polyline, path,
+    ellipse, text and image elements, and <use> references to icons in
+    <defs> (embedded icons).
+    """
+    root = ET.fromstring(svg)
+    view = _floats(root.get("viewBox"))
+    if len(view) == 4:
+        min_x, min_y, width, height = view
+    else:
+        min_x = min_y = 0.0
+        width = (_floats(root.get("width")) or [0.0])[0]
+        height = (_floats(root.get("height")) or [0.0])[0]
+    scene = Scene(width, height)
+
+    defs: Dict[str, ET.Element] = {}
+    icon_keys: Dict[str, Optional[str]] = {}
+    for element in root.iter(f"{_SVG}image"):
+        if element.get("id"):
+            defs[element.get("id", "")] = element
+
+    def image(element: ET.Element, t: Transform, x: float, y: float) -> None:
+        href = element.get(_XLINK_HREF) or element.get("href") or ""
+        key = _icon_source(href, scene, icon_keys)
+        w = _floats(element.get("width"))
+        h = _floats(element.get("height"))
+        if key is None or not w or not h:
+            return
+        (x0, y0), (x1, y1) = _apply(t, [(x, y), (x + w[0], y + h[0])])
+        box = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        scene.add(("image", box, key))
+
+    def walk(element: ET.Element, t: Transform) -> None:
+        for child in element:
+            tag = child.tag
+            if not isinstance(tag, str) or not tag.startswith(_SVG):
+                continue
+            tag = tag[len(_SVG) :]
+            if tag in ("defs", "title"):
+                continue
+            ct = _compose(t, child.get("transform"))
+            fill = child.get("fill", "black")
+            stroke = child.get("stroke")
+            stroke_width = float(child.get("stroke-width", "1") or 1)
+            if tag in ("g", "a"):
+                walk(child, ct)
+            elif tag == "rect":
+                x, y, w, h = (float(child.get(a, "0")) for a in ("x", "y", "width", "height"))
+                (x0, y0), (x1, y1) = _apply(ct, [(x, y), (x + w, y + h)])
+                box = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+                radius = float(child.get("rx", "0")) * abs(ct[0])
+                scene.add(("rect", box, _color(fill), _color(stroke), stroke_width, radius))
+            elif tag in ("polygon", "polyline"):
+                numbers = _floats(child.get("points"))
+                points = _apply(ct, list(zip(numbers[::2], numbers[1::2])))
+                if len(points) < 2:
+                    continue
+                if tag == "polyline":
+                    scene.add(
+                        (
+                            "line",
+                            _bounds(points, stroke_width),
+                            points,
+                            _color(stroke or fill),
+                            stroke_width,
+                        )
+                    )
+                else:
+                    scene.add(
+                        (
+                            "polygon",
+                            _bounds(points, stroke_width),
+                            points,
+                            _color(fill),
+                            _color(stroke),
+                            stroke_width,
+                        )
+                    )
+            elif tag == "path":
+                dash = _floats(child.get("stroke-dasharray"))
+                color, fill_color = _color(stroke), _color(child.get("fill", "black"))
+                for line in _path_polylines(child.get("d", "")):
+                    points = _apply(ct, line)
+                    if fill_color is not None and len(points) > 2:
+                        scene.add(("polygon", _bounds(points), points, fill_color, None, 0.0))
+                    if color is not None:
+                        # One primitive per path: tiles too coarse to show the
+                        # dashes draw the solid line instead
+                        dashes = (_dash(points, dash), sum(dash)) if dash else None
+                        scene.add(
+                            (
+                                "line",
+                                _bounds(points, stroke_width),
+                                points,
+                                color,
+                                stroke_width,
+                                dashes,
+                            )
+                        )
+            elif tag == "ellipse":
+                cx, cy, rx, ry = (float(child.get(a, "0")) for a in ("cx", "cy", "rx", "ry"))
+                (x0, y0), (x1, y1) = _apply(ct, [(cx - rx, cy - ry), (cx + rx, cy + ry)])
+                box = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+                scene.add(("ellipse", box, _color(fill), _color(stroke), stroke_width))
+            elif tag == "text":
+                text = "".join(child.itertext()).strip()
+                if not text:
+                    continue
+                size = float(child.get("font-size", "14") or 14) * abs(ct[1])
+                ((x, y),) = _apply(ct, [(float(child.get("x", "0")), float(child.get("y", "0")))])
+                anchor = child.get("text-anchor", "start")
+                w = 0.6 * size * len(text)
+                x0 = x - w / 2 if anchor == "middle" else x - w if anchor == "end" else x
+                box = (x0, y - size, x0 + w, y + 0.3 * size)
+                scene.add(("text", box, x, y, anchor, size, _color(fill), text))
+            elif tag == "image":
+                image(child, ct, float(child.get("x", "0")), float(child.get("y", "0")))
+            elif tag == "use":
+                ref = (child.get(_XLINK_HREF) or child.get("href") or "").lstrip("#")
+                if ref in defs:
+                    image(defs[ref], ct, float(child.get("x", "0")), float(child.get("y", "0")))
+
+    walk(root, (1.0, 1.0, -min_x, -min_y))
+    return scene
+
+
+# ---------------------------------------------------------------------------
+# Drawing
+# ---------------------------------------------------------------------------
+
+_fonts: Dict[int, Any] = {}
+
+
+def _font(size: int) -> Any:
+    font = _fonts.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype("DejaVuSans.ttf", size)
+        except OSError:
+            try:
+                font = ImageFont.load_default(size)
+            except TypeError:  # Pillow < 10.1 has a single bitmap font
+                font = ImageFont.load_default()
+        _fonts[size] = font
+    return font
+
+
+def _icon(scene: Scene, key: str, w: int, h: int) -> Optional[Image.Image]:
+    sizes = scene._icon_sizes
+    sized = sizes.get((key, w, h), False)
+    if sized is not False:
+        sizes.move_to_end((key, w, h))
+        return sized  # type: ignore[return-value]
+    images = scene._icon_images
+    if key not in images:
+        source = scene.icons.get(key)
+        try:
+            raw = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+            images[key] = raw.convert("RGBA")
+        except (OSError, ValueError, TypeError):
+            images[key] = None
+    image = images[key]
+    # Icons are drawn at a handful of sizes, one per pyramid level
+    sized = image.resize((w, h), Image.LANCZOS) if image is not None else None
+    sizes[(key, w, h)] = sized
+    if len(sizes) > _ICON_SIZES:
+        sizes.popitem(last=False)
+    return sized
+
+
+def draw_region(scene: Scene, box: Box, scale: float, size: Tuple[int, int]) -> Image.Image:
+    """
+    Draw the part of the scene inside `box` (world units) at `scale` pixels per unit.
+
+    Args:
+        scene: Parsed diagram
+        box: (x0, y0, x1, y1) world rectangle mapped to the image
+        scale: Pixels per world unit
+        size: Image size in pixels
+    """
+    canvas = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(canvas)
+    ox, oy = box[0], box[1]
+
+    def px(points: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        return [((x - ox) * scale, (y - oy) * scale) for x, y in points]
+
+    for primitive in scene.query(box):
+        kind, (x0, y0, x1, y1) = primitive[0], primitive[1]
+        if (x1 - x0) * scale < _MIN_PX and (y1 - y0) * scale < _MIN_PX:
+            continue
+        rect = ((x0 - ox) * scale, (y0 - oy) * scale, (x1 - ox) * scale, (y1 - oy) * scale)
+        if kind == "rect":
+            fill, outline, width, radius = primitive[2:]
+            width = max(1, round(width * scale)) if outline else 0
+            if radius * scale >= 1:
+                draw.rounded_rectangle(rect, radius * scale, fill, outline, width)
+            else:
+                draw.rectangle(rect, fill, outline, width)
+        elif kind == "polygon":
+            points, fill, outline, width = primitive[2:]
+            draw.polygon(px(points), fill, outline, max(1, round(width * scale)))
+        elif kind == "line":
+            points, color, width, dashes = primitive[2:]
+            width = max(1, round(width * scale))
+            if dashes is None or dashes[1] * scale < _MIN_DASH_PX:
+                draw.line(px(points), color, width)
+                continue
+            parts, period = dashes
+            for part in parts:
+                x, y = part[0]
+                if (
+                    box[0] - period <= x <= box[2] + period
+                    and box[1] - period <= y <= box[3] + period
+                ):
+                    draw.line(px(part), color, width)
+        elif kind == "ellipse":
+            fill, outline, width = primitive[2:]
+            draw.ellipse(rect, fill, outline, max(1, round(width * scale)) if outline else 0)
+        elif kind == "text":
+            x, y, anchor, font_size, fill, text = primitive[2:]
+            if font_size * scale < _MIN_TEXT_PX:
+                continue
+            draw.text(
+                ((x - ox) * scale, (y - oy) * scale),
+                text,
+                fill=fill or (0, 0, 0),
+                font=_font(round(font_size * scale)),
+                anchor={"middle": "ms", "end": "rs"}.get(anchor, "ls"),
+            )
+        elif kind == "image":
+            w, h = round(rect[2] - rect[0]), round(rect[3] - rect[1])
+            if min(w, h) < _MIN_ICON_PX:
+                if min(w, h) >= 1:
+                    draw.rectangle(rect, _ICON_BLOCK)
+                continue
+            icon = _icon(scene, primitive[2], w, h)
+            if icon is not None:
+                canvas.paste(icon, (round(rect[0]), round(rect[1])), icon)
+    return canvas
+
+
+# ---------------------------------------------------------------------------
+# Pyramid
+# ---------------------------------------------------------------------------
+
+# Per worker process: (scene, files directory, format, tile size, overlap)
+_job: Optional[Tuple[Scene, str, str, int, int]] = None
+_blank: Dict[Tuple[int, int], bytes] = {}
+
+
+def _init_worker(scene: Scene, files_dir: str, fmt: str, tile_size: int, overlap: int) -> None:
+    global _job
+    _job = (scene, files_dir, fmt, tile_size, overlap)
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=85, method=4)
+    else:
+        image.save(buffer, "PNG", optimize=False, compress_level=6)
+    return buffer.getvalue()
+
+
+def _draw_tiles(tasks: List[Tuple[int, float, int, int, int, int]]) -> Tuple[int, int]:
+    """Draw and write a batch of (level, scale, col, row, level width, level height) tiles."""
+    assert _job is not None
+    scene, files_dir, fmt, tile_size, overlap = _job
+    written = 0
+    for level, scale, col, row, level_w, level_h in tasks:
+        x0 = max(0, col * tile_size - overlap)
+        y0 = max(0, row * tile_size - overlap)
+        x1 = min(level_w, (col + 1) * tile_size + overlap)
+        y1 = min(level_h, (row + 1) * tile_size + overlap)
+        box = (x0 / scale, y0 / scale, x1 / scale, y1 / scale)
+        if scene.query(box):
+            data = _encode(draw_region(scene, box, scale, (x1 - x0, y1 - y0)), fmt)
+        else:
+            # Sparse estates leave many tiles empty; encode each blank size once
+            data = _blank.get((x1 - x0, y1 - y0), b"")
+            if not data:
+                data = _blank[(x1 - x0, y1 - y0)] = _encode(
+                    Image.new("RGB", (x1 - x0, y1 - y0), "white"), fmt
+                )
+        path = os.path.join(files_dir, str(level), f"{col}_{row}.{fmt}")
+        with open(path, "wb") as f:
+            f.write(data)
+        written += len(data)
+    return len(tasks), written
+
+
+def _batches(tasks: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(tasks), size):
+        yield tasks[start : start + size]
+
+
+def export_tiles(
+    svg: str,
+    output_dir: str,
+    name: str = "diagram",
+    tile_size: int = _DEFAULT_TILE_SIZE,
+    tile_format: str = "png",
+    scale: float = 1.0,
+    overlap: int = _DEFAULT_OVERLAP,
+    overview_px: int = _DEFAULT_OVERVIEW_PX,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Rasterise a diagram SVG into a Deep Zoom tile pyramid.
+
+    Writes `<name>.dzi`, the tiles under `<name>_files/<level>/<col>_<row>.<format>`
+    and `<name>_overview.png` into output_dir.
+
+    Args:
+        svg: Rendered diagram SVG, icons embedded or referenced by path
+        output_dir: Directory for the pyramid; created if missing
+        name: Base name of the manifest, tile directory and overview
+        tile_size: Tile edge in pixels, without overlap
+        tile_format: "png" or "webp"
+        scale: Pixels per SVG point at the deepest level
+        overlap: Pixels each tile shares with its neighbours
+        overview_px: Longest edge of the overview image
+        workers: Tile-drawing processes; None reads CLOUD_DIAGRAM_TILE_WORKERS
+
+    Returns:
+        Summary with the written paths, full-resolution size, levels, tiles and bytes
+    """
+    if tile_format not in TILE_FORMATS:
+        raise ValueError(
+            f"Unknown tile format {tile_format!r}; expected one of {', '.join(TILE_FORMATS)}"
+        )
+    if tile_format == "webp" and not features.check("webp"):
+        raise ValueError("This Pillow build cannot write WebP; use tile_format 'png'")
+    if tile_size < 16 or scale <= 0 or overlap < 0:
+        raise ValueError("tile_size must be at least 16, scale positive and overlap non-negative")
+    if workers is None:
+        workers = int(os.environ.get("CLOUD_DIAGRAM_TILE_WORKERS", "0")) or os.cpu_count() or 1
+
+    with stage("tile_scene"):
+        scene = parse_svg(svg)
+    width = max(1, math.ceil(scene.width * scale))
+    height = max(1, math.ceil(scene.height * scale))
+    max_level = math.ceil(math.log2(max(width, height)))
+
+    out = Path(output_dir).resolve()
+    files_dir = out / f"{name}_files"
+    tasks = []
+    for level in range(max_level + 1):
+        factor = 2 ** (max_level - level)
+        level_w, level_h = math.ceil(width / factor), math.ceil(height / factor)
+        (files_dir / str(level)).mkdir(parents=True, exist_ok=True)
+        for col in range(math.ceil(level_w / tile_size)):
+            for row in range(math.ceil(level_h / tile_size)):
+                tasks.append((level, scale / factor, col, row, level_w, level_h))
+
+    init = (scene, str(files_dir), tile_format, tile_size, overlap)
+    with stage("tiles"):
+        if workers <= 1 or len(tasks) < _MIN_PARALLEL_TILES:
+            _init_worker(*init)
+            tiles, written = _draw_tiles(tasks)
+        else:
+            # Deepest level first: its tiles are the cheapest, so batches of
+            # the costly shallow levels are not left for the end
+            tasks.reverse()
+            tiles = written = 0
+            with ProcessPoolExecutor(
+                max_workers=min(workers, math.ceil(len(tasks) / _BATCH)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=init,
+            ) as pool:
+                for count, size in pool.map(_draw_tiles, _batches(tasks, _BATCH)):
+                    tiles += count
+                    written += size
+
+    manifest = out / f"{name}.dzi"
+    manifest.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{tile_format}" '
+        f'Overlap="{overlap}" TileSize="{tile_size}">\n'
+        f'  <Size Width="{width}" Height="{height}"/>\n'
+        "</Image>\n",
+        encoding="utf-8",
+    )
+
+    with stage("overview"):
+        overview_scale = min(scale, overview_px / max(scene.width, scene.height, 1.0))
+        overview = out / f"{name}_overview.png"
+        draw_region(
+            scene,
+            (0.0, 0.0, scene.width, scene.height),
+            overview_scale,
+            (
+                max(1, math.ceil(scene.width * overview_scale)),
+                max(1, math.ceil(scene.height * overview_scale)),
+            ),
+        ).save(overview, "PNG")
+
+    return {
+        "manifest": str(manifest),
+        "tiles_dir": str(files_dir),
+        "overview": str(overview),
+        "width": width,
+        "height": height,
+        "levels": max_level + 1,
+        "tiles": tiles,
+        "size_kb": round(written / 1024, 1),
+    }
@@ -0,0 +1,300 @@
+"""
+Render cache - Content-addressed cache for rendered SVG diagrams.
+
+Keys are a canonical hash of only the fields that affect the diagram layout
+(addresses, types, names, actions, dependencies and connections), so agents
+re-sending the same plan with different attribute values still hit the cache.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from cloud_diagram_mcp.dependencies import dependency_configuration
+from cloud_diagram_mcp.svg_minify import minify_precision
+
+# Bump when the render pipeline changes in a way that invalidates old entries
+_KEY_VERSION = "4"
+
+_DEFAULT_MAX_ENTRIES = 128
+_DEFAULT_MAX_MB = 256
+_DEFAULT_DISK_MAX_MB = 1024
+
+
+# ---------------------------------------------------------------------------
+# Canonical layout keys
+# ---------------------------------------------------------------------------
+
+
+def layout_key(kind: str, payload: Any) -> str:
+    """
+    Hash an already-projected layout subset (see the *_layout_subset helpers).
+
+    Cached SVGs are stored minified, so the effective minify settings are
+    part of the key: changing them misses entries made with the old ones.
+    """
+    canonical = json.dumps(
+        [_KEY_VERSION, minify_precision(), kind, payload],
+        separators=(",", ":"),
+        ensure_ascii=True,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def plan_layout_subset(plan_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Project a Terraform plan onto the fields that affect the diagram layout.
+
+    The result has the same shape as a plan, so it can be passed straight to
+    generate_svg without carrying before/after attribute payloads around.
+    """
+    resource_changes = [
+        {
+            "address": rc.get("address"),
+            "type": rc.get("type"),
+            "name": rc.get("name"),
+            "change": {"actions": list(rc.get("change", {}).get("actions", []))},
+        }
+        for rc in plan_data.get("resource_changes", [])
+    ]
+    return {
+        "resource_changes": resource_changes,
+        # Dependencies resolved to instance addresses, so module trees and
+        # expression references are reduced to the edges that are drawn
+        "configuration": dependency_configuration(plan_data),
+    }
+
+
+def architecture_layout_subset(arch_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Project an architecture description onto the fields that affect the layout."""
+    subset: Dict[str, Any] = {
+        "resources": [
+            {k: res[k] for k in ("address", "type", "name") if k in res}
+            for res in arch_data.get("resources", [])
+        ],
+        "connections": [
+            {k: conn[k] for k in ("from", "to", "label", "action") if k in conn}
+            for conn in arch_data.get("connections", [])
+        ],
+    }
+    if "title" in arch_data:
+        subset["title"] = arch_data["title"]
+    return subset
+
+
+def plan_layout_key(plan_data: Dict[str, Any]) -> str:
+    """Hash the layout-relevant subset of a Terraform plan."""
+    return layout_key("plan", plan_layout_subset(plan_data))
+
+
+def architecture_layout_key(arch_data: Dict[str, Any]) -> str:
+    """Hash the layout-relevant subset of an architecture description."""
+    return layout_key("architecture", architecture_layout_subset(arch_data))
+
+
+# ---------------------------------------------------------------------------
+# Two-tier cache: bounded in-memory LRU + optional on-disk store
+# ---------------------------------------------------------------------------
+
+
+class RenderCache:
+    """
+    Thread-safe SVG cache with an in-memory LRU tier and an optional disk tier.
+
+    Args:
+        max_entries: Maximum number of SVGs kept in memory
+        max_bytes: Maximum total size of in-memory SVGs (UTF-8 bytes)
+        disk_dir: Directory for the persistent tier; None disables it
+        disk_max_bytes: Maximum total size of the disk tier before the
+            least recently used files are evicted
+    """
+
+    def __init__(
+        self,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+        max_bytes: int = _DEFAULT_MAX_MB * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = _DEFAULT_DISK_MAX_MB * 1024 * 1024,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached SVG for a key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        svg = self._disk_get(key)
+        with self._lock:
+            if svg is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, svg)
+        return svg
+
+    def put(self, key: str, svg: str) -> None:
+        """Store an SVG in both tiers."""
+        with self._lock:
+            self._memory_put(key, svg)
+        self._disk_put(key, svg)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current tier sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._memory),
+                "bytes": self._memory_bytes,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+            }
+
+    # -- memory tier (caller holds the lock) --------------------------------
+
+    def _memory_put(self, key: str, svg: str) -> None:
+        size = len(svg) if svg.isascii() else len(svg.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+        self._memory[key] = (svg, size)
+        self._memory_bytes += size
+        while self._memory and (
+            len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes
+        ):
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.evictions += 1
+
+    # -- disk tier -----------------------------------------------------------
+
+    def _disk_path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / f"{key}.svg"
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            os.utime(path)  # mtime doubles as the LRU timestamp
+        except OSError:
+            return None
+        return raw.decode("utf-8", errors="ignore")
+
+    def _disk_put(self, key: str, svg: str) -> None:
+        if self.disk_dir is None:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(svg.encode("utf-8"))
+            os.replace(tmp, self._disk_path(key))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        assert self.disk_dir is not None
+        entries = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if not entry.name.endswith(".svg"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        if total <= self.disk_max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance, configured from the environment
+# ---------------------------------------------------------------------------
+
+_cache: Optional[RenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """
+    Return the process-wide render cache.
+
+    Configured via environment variables:
+        CLOUD_DIAGRAM_CACHE_ENTRIES: in-memory entry limit (default 128)
+        CLOUD_DIAGRAM_CACHE_MB: in-memory size limit in MB (default 256)
+        CLOUD_DIAGRAM_CACHE_DIR: enables the on-disk tier in this directory
+        CLOUD_DIAGRAM_CACHE_DISK_MB: on-disk size limit in MB (default 1024)
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache(
+                max_entries=int(
+                    os.environ.get("CLOUD_DIAGRAM_CACHE_ENTRIES", _DEFAULT_MAX_ENTRIES)
+                ),
+                max_bytes=int(os.environ.get("CLOUD_DIAGRAM_CACHE_MB", _DEFAULT_MAX_MB))
+                * 1024
+                * 1024,
+                disk_dir=os.environ.get("CLOUD_DIAGRAM_CACHE_DIR") or None,
+                disk_max_bytes=int(
+                    os.environ.get("CLOUD_DIAGRAM_CACHE_DISK_MB", _DEFAULT_DISK_MAX_MB)
+                )
+                * 1024
+                * 1024,
+            )
+        return _cache
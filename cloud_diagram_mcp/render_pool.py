@@ -0,0 +1,416 @@
+"""
+Render pool - Pre-warmed worker processes for Graphviz rendering.
+
+Building a Diagrams graph and running `dot` is CPU-bound and can take seconds
+for large plans. Rendering in separate processes keeps the MCP server
+responsive and lets throughput scale with the number of cores. Each job has
+a timeout; a worker that hangs, crashes or exceeds its memory limit is
+killed and replaced. On POSIX each worker leads its own process group, and
+the whole group is killed, so a `dot` it was waiting on does not outlive it.
+"""
+
+import atexit
+import contextvars
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from cloud_diagram_mcp.metrics import get_metrics, stage
+
+_DEFAULT_TIMEOUT = 120.0
+_DEFAULT_MEMORY_MB = 2048
+_STARTUP_TIMEOUT = 60.0
+
+
+class RenderError(RuntimeError):
+    """Raised when a render job fails inside a worker."""
+
+
+class RenderTimeout(RenderError):
+    """Raised when a render job exceeds its timeout; the worker is replaced."""
+
+
+class RenderWorkerCrashed(RenderError):
+    """Raised when a worker process dies mid-job; the worker is replaced."""
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+
+def render_job(kind: str, data: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render a plan or architecture to an icon-embedded SVG in this process.
+
+    Args:
+        kind: "plan" or "architecture"
+        data: Layout subset of the plan or architecture
+        options: Extra keyword arguments for the generator, e.g. seed
+            positions or the layout engine
+    """
+    from cloud_diagram_mcp.visualizer_hierarchical import (
+        generate_architecture_svg,
+        generate_svg,
+    )
+    from cloud_diagram_mcp.svg_embedder import embed_icons_in_svg_content
+    from cloud_diagram_mcp.serialization import sanitize_svg
+    from cloud_diagram_mcp.svg_minify import minify_svg
+
+    if kind == "plan":
+        svg = generate_svg(data, **(options or {}))
+    elif kind == "architecture":
+        svg = generate_architecture_svg(data, **(options or {}))
+    else:
+        raise ValueError(f"Unknown render kind: {kind!r}")
+    # Before embedding, so the single pass never walks the icons' base64
+    with stage("minify"):
+        svg = minify_svg(svg)
+    # One <defs> entry per distinct icon keeps payloads proportional to the
+    # number of resource types rather than the number of resources
+    with stage("embed_icons"):
+        svg = embed_icons_in_svg_content(svg, dedupe=True)
+    # Sanitised once here, so the server can cache and splice it as is
+    return sanitize_svg(svg)
+
+
+def _limit_memory(memory_mb: int) -> None:
+    """Cap the worker's address space; inherited by the `dot` subprocess."""
+    if memory_mb <= 0 or sys.platform == "win32":
+        return
+    import resource
+
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+# One-resource plan rendered and discarded to warm a process up
+_WARMUP_PLAN = {
+    "resource_changes": [
+        {
+            "address": "aws_instance.warmup",
+            "type": "aws_instance",
+            "name": "warmup",
+            "change": {"actions": ["create"]},
+        }
+    ]
+}
+
+
+def _warm_process() -> None:
+    """
+    Pay this process's one-time render costs up front.
+
+    Imports Diagrams and the mapped icon modules, encodes their icons, and
+    runs a tiny throwaway render so the layout engine (and Graphviz's font
+    cache) is loaded before the first real job.
+    """
+    from cloud_diagram_mcp.visualizer_hierarchical import ICON_MAPPING, get_icon_path
+    from cloud_diagram_mcp.svg_embedder import preload_icons
+
+    preload_icons({get_icon_path(icon_class) for icon_class in ICON_MAPPING.values()})
+    try:
+        render_job("plan", _WARMUP_PLAN)
+    except Exception:
+        # A broken render surfaces on the first real job with its own error
+        pass
+
+
+def _worker_main(conn: Any, memory_mb: int) -> None:
+    """Worker loop: warm up, then serve jobs."""
+    if hasattr(os, "setsid"):
+        # Lead a process group of its own, which the `dot` subprocesses it
+        # starts join, so replacing the worker kills a hung `dot` with it
+        os.setsid()
+    _limit_memory(memory_mb)
+    _warm_process()
+
+    conn.send(("ready", None))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        kind, data, options = job
+        try:
+            # Stage timings travel back with the SVG for the caller's metrics
+            with get_metrics().collect() as stages:
+                svg = render_job(kind, data, options)
+            conn.send(("ok", (svg, stages)))
+        except MemoryError:
+            # The heap may be fragmented or inconsistent now: report, then exit
+            # so the pool replaces this worker as it does after a crash
+            conn.send(("exiting", f"render exceeded the {memory_mb} MB worker memory limit"))
+            break
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+# ---------------------------------------------------------------------------
+# Pool side
+# ---------------------------------------------------------------------------
+
+
+class _Worker:
+    """One worker process and the parent end of its pipe."""
+
+    def __init__(self, ctx: Any, memory_mb: int) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self) -> bool:
+        """Block until the worker has finished its imports."""
+        if not self.ready and self.conn.poll(_STARTUP_TIMEOUT):
+            status, _ = self.conn.recv()
+            self.ready = status == "ready"
+        return self.ready
+
+    def _kill(self) -> None:
+        """SIGKILL the worker's process group, or just the worker where there is none."""
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                return
+            except OSError:
+                # Killed before it started its group
+                pass
+        self.process.kill()
+
+    def kill(self) -> None:
+        try:
+            self._kill()
+            self.process.join(timeout=5)
+        finally:
+            self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self._kill()
+        self.conn.close()
+
+
+class RenderPool:
+    """
+    A fixed-size pool of pre-warmed render worker processes.
+
+    Args:
+        workers: Number of worker processes
+        timeout: Per-job timeout in seconds
+        memory_mb: Per-worker address-space limit in MB (0 disables it)
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        timeout: float = _DEFAULT_TIMEOUT,
+        memory_mb: int = _DEFAULT_MEMORY_MB,
+    ) -> None:
+        self.size = workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.restarts = 0
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers_lock = threading.Lock()
+        self._workers = [_Worker(self._ctx, memory_mb) for _ in range(workers)]
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._dispatcher = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="render-dispatch"
+        )
+
+    def submit(
+        self,
+        kind: str,
+        data: Dict[str, Any],
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """Queue a render job and return a Future resolving to the SVG."""
+        # The caller's context carries its metrics call, which _run adds to
+        context = contextvars.copy_context()
+        return self._dispatcher.submit(
+            context.run, self._run, kind, data, options, timeout or self.timeout
+        )
+
+    def render(
+        self,
+        kind: str,
+        data: Dict[str, Any],
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Render synchronously on a worker process."""
+        return self.submit(kind, data, options, timeout).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size, idle workers and restart count."""
+        return {"workers": self.size, "idle": self._idle.qsize(), "restarts": self.restarts}
+
+    def shutdown(self) -> None:
+        """Stop all worker processes."""
+        self._dispatcher.shutdown(wait=False, cancel_futures=True)
+        with self._workers_lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers.clear()
+
+    def _run(
+        self, kind: str, data: Dict[str, Any], options: Optional[Dict[str, Any]], timeout: float
+    ) -> str:
+        worker = self._idle.get()
+        try:
+            if not worker.wait_ready():
+                worker = self._replace(worker)
+                raise RenderWorkerCrashed("render worker did not start in time")
+            worker.conn.send((kind, data, options))
+            if not worker.conn.poll(timeout):
+                worker = self._replace(worker)
+                raise RenderTimeout(f"render exceeded the {timeout:g}s timeout")
+            status, payload = worker.conn.recv()
+            if status == "exiting":
+                worker = self._replace(worker)
+        except (EOFError, OSError):
+            worker = self._replace(worker)
+            raise RenderWorkerCrashed("render worker exited unexpectedly")
+        finally:
+            self._idle.put(worker)
+        if status != "ok":
+            raise RenderError(payload)
+        svg, stages = payload
+        get_metrics().merge(stages)
+        return svg
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        replacement = _Worker(self._ctx, self.memory_mb)
+        with self._workers_lock:
+            self._workers = [w for w in self._workers if w is not worker] + [replacement]
+            self.restarts += 1
+        return replacement
+
+
+# ---------------------------------------------------------------------------
+# Process-wide pool, configured from the environment
+# ---------------------------------------------------------------------------
+
+_pool: Optional[RenderPool] = None
+_pool_lock = threading.Lock()
+# Worker count set by configure_render_pool(); None reads the environment
+_workers: Optional[int] = None
+
+
+def configure_render_pool(workers: Optional[int]) -> None:
+    """
+    Set the process-wide pool's worker count, before it starts.
+
+    Args:
+        workers: Number of worker processes (0 renders in-process), or None
+            to go back to CLOUD_DIAGRAM_RENDER_WORKERS
+
+    Raises:
+        RuntimeError: If the pool is already running with another size
+    """
+    global _workers
+    with _pool_lock:
+        if workers is not None and _pool is not None and _pool.size != workers:
+            raise RuntimeError(
+                f"Render pool already running with {_pool.size} workers; cannot use {workers}"
+            )
+        _workers = workers
+
+
+def get_render_pool() -> Optional[RenderPool]:
+    """
+    Return the process-wide render pool, starting it on first use.
+
+    Configured via environment variables:
+        CLOUD_DIAGRAM_RENDER_WORKERS: number of worker processes
+            (default min(4, CPU count); 0 renders in-process), unless
+            configure_render_pool() has set it
+        CLOUD_DIAGRAM_RENDER_TIMEOUT: per-job timeout in seconds (default 120)
+        CLOUD_DIAGRAM_RENDER_MEMORY_MB: per-worker memory limit (default 2048)
+
+    Returns:
+        The pool, or None when rendering in-process
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = _workers
+            if workers is None:
+                default_workers = min(4, os.cpu_count() or 1)
+                workers = int(os.environ.get("CLOUD_DIAGRAM_RENDER_WORKERS", default_workers))
+            if workers <= 0:
+                return None
+            _pool = RenderPool(
+                workers,
+                timeout=float(os.environ.get("CLOUD_DIAGRAM_RENDER_TIMEOUT", _DEFAULT_TIMEOUT)),
+                memory_mb=int(os.environ.get("CLOUD_DIAGRAM_RENDER_MEMORY_MB", _DEFAULT_MEMORY_MB)),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def pool_stats() -> Optional[Dict[str, Any]]:
+    """Return the process-wide pool's stats, or None if it has not been started."""
+    with _pool_lock:
+        return _pool.stats() if _pool is not None else None
+
+
+def warm_up() -> None:
+    """
+    Get the first render off the critical path.
+
+    Starts the process-wide pool, whose workers warm themselves up while the
+    server waits for its first request, or warms this process when the pool
+    is disabled. Meant to run on a background thread at server start.
+    """
+    if get_render_pool() is None:
+        _warm_process()
+
+
+_local_executor: Optional[ThreadPoolExecutor] = None
+
+
+def submit(kind: str, data: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Future:
+    """
+    Start a render and return a Future resolving to the SVG.
+
+    Runs on the process-wide pool, or on a background thread of this process
+    when the pool is disabled, so callers can wait with a timeout either way.
+    """
+    global _local_executor
+    pool = get_render_pool()
+    if pool is not None:
+        return pool.submit(kind, data, options)
+    with _pool_lock:
+        if _local_executor is None:
+            _local_executor = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="render-local"
+            )
+    context = contextvars.copy_context()
+    return _local_executor.submit(context.run, render_job, kind, data, options)
+
+
+def render(kind: str, data: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> str:
+    """Render on the process-wide pool, or in-process when the pool is disabled."""
+    pool = get_render_pool()
+    if pool is None:
+        return render_job(kind, data, options)
+    return pool.render(kind, data, options)
@@ -0,0 +1,122 @@
+"""
+Serialization - JSON encoding of tool results that carry a large SVG.
+
+The server-side SVG is usually most of a tool result. Rather than letting
+json.dumps rescan it inside the result dict on every call, the result is
+encoded without it and the SVG's JSON string literal, escaped once per SVG
+and memoised, is spliced into the object text. The rest of the result is
+encoded with orjson when it is installed, falling back to the standard
+library; either way the output is pure ASCII like json.dumps(ensure_ascii=True).
+
+SVGs are sanitised once, when the renderer produces them (`sanitize_svg`),
+so no later stage has to re-encode them.
+
+Clients that can inflate it may ask for the SVG compressed instead
+(`svg_encoding`): it is then gzip- or zlib-deflate-compressed, base64
+encoded, and marked with `_server_svg_encoding` ("gzip+base64" or
+"deflate+base64"), the formats the browser's DecompressionStream reads.
+
+Configured via environment variables:
+    CLOUD_DIAGRAM_JSON_BACKEND: "auto" (default; orjson when installed),
+        "orjson" or "json"
+"""
+
+import base64
+import gzip
+import json
+import os
+import zlib
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: pip install cloud-diagram-mcp[fast]
+    orjson = None
+
+_BACKEND = os.environ.get("CLOUD_DIAGRAM_JSON_BACKEND", "auto")
+_USE_ORJSON = orjson is not None and _BACKEND in ("auto", "orjson")
+
+SVG_FIELD = "_server_svg"
+SVG_ENCODING_FIELD = "_server_svg_encoding"
+
+# Transport encodings of the SVG; "none" sends it as plain text
+SVG_ENCODINGS = ("none", "gzip", "deflate")
+_COMPRESS_LEVEL = 6
+
+
+def sanitize_svg(svg: str) -> str:
+    """Drop lone surrogates, which cannot be encoded as UTF-8, from rendered SVG text."""
+    if svg.isascii():
+        return svg
+    return svg.encode("utf-8", errors="ignore").decode("utf-8")
+
+
+@lru_cache(maxsize=8)
+def escape_svg(svg: str) -> str:
+    """
+    Return the SVG as an ASCII JSON string literal, quotes included.
+
+    Memoised on the SVG text: cache hits hand back the same string object,
+    whose hash Python keeps, so repeat lookups cost no scan of the SVG.
+    """
+    return encode_basestring_ascii(svg)
+
+
+@lru_cache(maxsize=8)
+def compress_svg(svg: str, encoding: str) -> str:
+    """Return the SVG compressed with "gzip" or "deflate" (zlib format), base64-encoded."""
+    raw = svg.encode("utf-8")
+    if encoding == "gzip":
+        packed = gzip.compress(raw, compresslevel=_COMPRESS_LEVEL, mtime=0)
+    elif encoding == "deflate":
+        packed = zlib.compress(raw, _COMPRESS_LEVEL)
+    else:
+        raise ValueError(f"Unknown SVG encoding {encoding!r}")
+    return base64.b64encode(packed).decode("ascii")
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Encode a JSON value as ASCII text with the fastest available backend."""
+    if _USE_ORJSON:
+        try:
+            text = orjson.dumps(obj, default=default).decode("utf-8")
+        except (TypeError, orjson.JSONEncodeError):
+            pass  # e.g. lone surrogates or integers beyond 64 bits
+        else:
+            # orjson writes non-ASCII characters as UTF-8; only escape when needed
+            if text.isascii():
+                return text
+    return json.dumps(obj, ensure_ascii=True, default=default)
+
+
+def splice(text: str, key: str, literal: str) -> str:
+    """Append `"key": literal` to the serialised JSON object `text`."""
+    separator = ", " if text != "{}" else ""
+    return "".join((text[:-1], separator, encode_basestring_ascii(key), ": ", literal, "}"))
+
+
+def dumps_result(
+    data: Dict[str, Any],
+    default: Optional[Callable[[Any], Any]] = None,
+    svg_encoding: str = "none",
+) -> str:
+    """
+    Serialise a tool result, splicing in the pre-escaped server-side SVG.
+
+    The SVG field is moved to the end of the object; everything else keeps
+    its order. With an svg_encoding other than "none" the SVG is sent
+    compressed and `_server_svg_encoding` says how.
+    """
+    svg = data.get(SVG_FIELD)
+    if not isinstance(svg, str):
+        return dumps(data, default)
+    rest = {key: value for key, value in data.items() if key != SVG_FIELD}
+    if svg_encoding == "none":
+        literal = escape_svg(svg)
+    else:
+        rest[SVG_ENCODING_FIELD] = f"{svg_encoding}+base64"
+        # base64 needs no JSON escaping
+        literal = '"' + compress_svg(svg, svg_encoding) + '"'
+    return splice(dumps(rest, default), SVG_FIELD, literal)
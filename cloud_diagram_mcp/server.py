@@ -13,15 +13,35 @@ from __future__ import annotations
 
 import json
 import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from fastmcp import FastMCP
 from fastmcp.server.apps import AppConfig
 
+from cloud_diagram_mcp import render_pool
+from cloud_diagram_mcp.layout_memory import get_layout_memory, positions_from_svg, seed_positions
+from cloud_diagram_mcp.metrics import get_metrics, stage, timed_tool
+from cloud_diagram_mcp.plan_store import get_plan_store
+from cloud_diagram_mcp.render_cache import (
+    architecture_layout_subset,
+    get_render_cache,
+    layout_key,
+    plan_layout_subset,
+)
+from cloud_diagram_mcp.serialization import SVG_ENCODINGS, dumps_result
+from cloud_diagram_mcp.svg_minify import minify_stats
+
 mcp = FastMCP("cloud-diagram-mcp")
 
 VIEW_URI = "ui://cloud-diagram/visualization"
+METRICS_URI = "metrics://cloud-diagram"
 
 
 # ---------------------------------------------------------------------------
@@ -40,13 +60,269 @@ def _load_ui_html() -> str:
     )
 
 
+# ---------------------------------------------------------------------------
+# Server-side rendering — cached by a hash of the layout-relevant fields and
+# dispatched to the pre-warmed render worker pool on a miss. A call waits for
+# its render only until its latency budget runs out; the render then finishes
+# in the background and is fetched with get_rendered_svg.
+# ---------------------------------------------------------------------------
+
+# Default per-call latency budget in milliseconds; 0 waits for the render
+_RENDER_BUDGET_MS = int(os.environ.get("CLOUD_DIAGRAM_RENDER_BUDGET_MS", "0"))
+
+# Recent renders by render id (their layout key). Concurrent calls for the
+# same layout share one render, and failures stay reportable.
+_RENDERS_MAX = 64
+_renders: OrderedDict[str, Future[str]] = OrderedDict()
+_renders_lock = threading.Lock()
+
+
+class RenderDeferred(Exception):
+    """The render outlived the call's latency budget and continues in the background."""
+
+    def __init__(self, render_id: str) -> None:
+        super().__init__(f"render {render_id} is still running")
+        self.render_id = render_id
+
+
+def _finish_render(key: str, job: Future[str], future: Future[str]) -> None:
+    try:
+        svg = job.result()  # already sanitised by the renderer
+        get_render_cache().put(key, svg)
+    except BaseException as e:
+        future.set_exception(e)
+        return
+    future.set_result(svg)
+
+
+def _render_key(kind: str, layout: dict[str, Any], options: dict[str, Any] | None) -> str:
+    """Return the render id of a layout subset: its cache key."""
+    return layout_key(kind, {"layout": layout, "options": options} if options else layout)
+
+
+def _start_render(
+    kind: str, layout: dict[str, Any], options: dict[str, Any] | None
+) -> tuple[str, Future[str]]:
+    """Return the render id and a Future of the SVG, starting a render on a cache miss."""
+    key = _render_key(kind, layout, options)
+    future: Future[str] = Future()
+    svg = get_render_cache().get(key)
+    if svg is not None:
+        future.set_result(svg)
+        return key, future
+    with _renders_lock:
+        running = _renders.get(key)
+        if running is not None and not (running.done() and running.exception() is not None):
+            _renders.move_to_end(key)
+            return key, running
+        _renders[key] = future
+        while len(_renders) > _RENDERS_MAX:
+            _renders.popitem(last=False)
+    job = render_pool.submit(kind, layout, options)
+    job.add_done_callback(lambda job: _finish_render(key, job, future))
+    return key, future
+
+
+def _render_svg(
+    kind: str,
+    layout: dict[str, Any],
+    options: dict[str, Any] | None = None,
+    deadline: float | None = None,
+    on_svg: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Render a layout subset to an icon-embedded SVG, reusing cached renders.
+
+    Args:
+        deadline: time.monotonic() by which to give up waiting; the render
+            then continues and RenderDeferred is raised with its render id
+        on_svg: Called with the SVG once it exists, even after a deferral
+    """
+    with stage("render"):
+        key, future = _start_render(kind, layout, options)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            svg = future.result(timeout)
+        except FuturesTimeoutError:
+            if on_svg is not None:
+                future.add_done_callback(lambda f: f.exception() or on_svg(f.result()))
+            raise RenderDeferred(key) from None
+    if on_svg is not None:
+        on_svg(svg)
+    return svg
+
+
+def _add_svg_stats(result: dict[str, Any], svg: str) -> None:
+    """Report the minifier's size reduction under `_svg_stats`."""
+    stats = minify_stats(svg)
+    if stats is not None:
+        result["_svg_stats"] = stats
+
+
+def _budget(budget_ms: int) -> tuple[int, float | None]:
+    """A call's latency budget in ms and its deadline; (0, None) when unlimited."""
+    budget = budget_ms if budget_ms > 0 else _RENDER_BUDGET_MS
+    return budget, (time.monotonic() + budget / 1000 if budget > 0 else None)
+
+
+def _render_status(error: Exception, budget_ms: int) -> dict[str, Any]:
+    """Structured reason for a result that has no `_server_svg`."""
+    if isinstance(error, RenderDeferred):
+        return {
+            "status": "pending",
+            "reason": "budget_exceeded",
+            "budget_ms": budget_ms,
+            "render_id": error.render_id,
+        }
+    if isinstance(error, render_pool.RenderTimeout):
+        reason = "render_timeout"
+    elif isinstance(error, render_pool.RenderWorkerCrashed):
+        reason = "worker_crashed"
+    else:
+        reason = "render_failed"
+    if isinstance(error, render_pool.RenderError):
+        detail = str(error)
+    else:
+        detail = f"{type(error).__name__}: {error}"
+    return {"status": "failed", "reason": reason, "detail": detail}
+
+
+def _resolve_engine(layout_engine: str) -> str:
+    """Resolve a requested layout engine; raises ValueError for unknown names."""
+    from cloud_diagram_mcp.visualizer_hierarchical import resolve_layout_engine
+
+    return resolve_layout_engine(layout_engine or None)
+
+
+def _resolve_svg_encoding(svg_encoding: str) -> str:
+    """Resolve a requested SVG transport encoding; raises ValueError for unknown names."""
+    encoding = svg_encoding or os.environ.get("CLOUD_DIAGRAM_SVG_ENCODING") or "none"
+    if encoding not in SVG_ENCODINGS:
+        raise ValueError(
+            f"Unknown SVG encoding {encoding!r}; expected one of {', '.join(SVG_ENCODINGS)}"
+        )
+    return encoding
+
+
+def _engine_options(engine: str) -> dict[str, Any]:
+    # Graphviz is the generator default, so its renders keep their cache keys
+    return {"engine": engine} if engine != "graphviz" else {}
+
+
+def _render_plan_svg(
+    plan_data: dict[str, Any],
+    workspace: str = "",
+    engine: str = "graphviz",
+    deadline: float | None = None,
+) -> str:
+    """
+    Render a Terraform plan to an icon-embedded SVG.
+
+    With a workspace, nodes already placed by that workspace's previous render
+    are pinned to their old positions, and the new positions are remembered.
+    """
+    layout = plan_layout_subset(plan_data)
+    options = _engine_options(engine)
+    if not workspace:
+        return _render_svg("plan", layout, options, deadline)
+
+    memory = get_layout_memory()
+    if engine == "graphviz":
+        seed = seed_positions(
+            memory.get(workspace), (rc["address"] for rc in layout["resource_changes"])
+        )
+        if seed:
+            options["positions"] = seed
+    return _render_svg(
+        "plan",
+        layout,
+        options,
+        deadline,
+        on_svg=lambda svg: memory.update(workspace, positions_from_svg(svg)),
+    )
+
+
+def _render_architecture_svg(
+    arch_data: dict[str, Any], engine: str = "graphviz", deadline: float | None = None
+) -> str:
+    """Render an architecture description to an icon-embedded SVG."""
+    return _render_svg(
+        "architecture", architecture_layout_subset(arch_data), _engine_options(engine), deadline
+    )
+
+
+# ---------------------------------------------------------------------------
+# Plan ingestion — very large plans are scanned for the diagram fields only
+# ---------------------------------------------------------------------------
+
+_STREAM_THRESHOLD_BYTES = (
+    int(os.environ.get("CLOUD_DIAGRAM_STREAM_THRESHOLD_MB", "32")) * 1024 * 1024
+)
+
+
+# Plans with more resources than this are collapsed into aggregate nodes
+_LOD_MAX_NODES = int(os.environ.get("CLOUD_DIAGRAM_LOD_MAX_NODES", "300"))
+
+
+def _load_plan(plan: str, plan_file: str) -> dict[str, Any]:
+    """
+    Parse a plan, switching to streaming ingestion for files and large documents.
+
+    Streamed plans carry only the fields the diagram needs and are marked
+    with `_streamed` so clients know attribute values were left out.
+    """
+    from cloud_diagram_mcp.plan_ingest import ingest_plan_file, ingest_plan_text
+
+    if plan_file:
+        plan_data = ingest_plan_file(plan_file)
+    elif len(plan) >= _STREAM_THRESHOLD_BYTES:
+        plan_data = ingest_plan_text(plan)
+    else:
+        return json.loads(plan)
+    plan_data["_streamed"] = True
+    return plan_data
+
+
+def _lean_result(plan_data: dict[str, Any], original_bytes: int) -> dict[str, Any]:
+    """Project a plan to the UI's fields and record how much it saved."""
+    from cloud_diagram_mcp.projection import lean_plan
+
+    lean = lean_plan(plan_data)
+    # The SVG is identical in both modes, so leave it out of the comparison
+    svg = lean.pop("_server_svg", None)
+    lean_bytes = len(json.dumps(lean, ensure_ascii=True))
+    lean["_lean"] = {
+        "original_bytes": original_bytes,
+        "lean_bytes": lean_bytes,
+        "bytes_saved": max(0, original_bytes - lean_bytes),
+    }
+    if svg is not None:
+        lean["_server_svg"] = svg
+    return lean
+
+
 # ---------------------------------------------------------------------------
 # Tool — returns structured plan data; the UI resource renders it
 # ---------------------------------------------------------------------------
 
 
 @mcp.tool(app=AppConfig(resourceUri=VIEW_URI))
-def visualize_tf_diff(plan: str) -> str:
+@timed_tool
+def visualize_tf_diff(
+    plan: str = "",
+    plan_file: str = "",
+    plan_handle: str = "",
+    lean: bool = False,
+    workspace: str = "",
+    layout_engine: str = "",
+    max_nodes: int = 0,
+    module_depth: int | None = None,
+    budget_ms: int = 0,
+    svg_encoding: str = "",
+    focus: list[str] | None = None,
+    changes_only: bool = False,
+    hops: int = 1,
+) -> str:
     """
     Visualize Terraform plan changes as an interactive cloud architecture diagram.
 
@@ -56,39 +332,188 @@ def visualize_tf_diff(plan: str) -> str:
 
     Args:
         plan: Terraform plan JSON as a string (from `terraform show -json tfplan`)
+        plan_file: Alternatively, the path of a plan JSON file on the server
+            host. Use this for very large plans; only the fields the diagram
+            needs are read, so before/after attribute values are omitted.
+        plan_handle: Alternatively, a handle returned by upload_plan. Attribute
+            values are omitted; fetch them per resource with get_resource_detail.
+        lean: Return only the fields the UI displays: no prior_state or
+            planned_values, no attribute bodies for unchanged resources, and
+            a flat `_dependencies` map instead of the configuration tree.
+            The result reports the bytes saved under `_lean`, and the plan is
+            kept in the plan store so details stay available via `_plan_handle`.
+        workspace: Optional workspace name. Successive plans of the same
+            workspace keep resources where the previous diagram placed them
+            and only lay out new ones, so the diagram stays visually stable.
+        layout_engine: "graphviz" (default when Graphviz is installed) or
+            "layered", the built-in engine that needs no Graphviz and lays out
+            thousands of resources in well under a second.
+        max_nodes: Plans with more resources than this are drawn at a coarser
+            level of detail: instances of one resource (count/for_each) become
+            one node, then whole modules if needed. Aggregate nodes show their
+            per-action counts, described under `_lod`. 0 uses the server default.
+        module_depth: Explicit level of detail instead: instances are always
+            collapsed and modules nested deeper than this become one node
+            (0 = one node per top-level module).
+        budget_ms: Latency budget for the call in milliseconds. If the
+            server-side SVG is not ready in time, the plan data is returned
+            without it and `_server_svg_status` says why; the render keeps
+            running and get_rendered_svg fetches it by `render_id`.
+            0 uses the server default (unlimited unless configured).
+        svg_encoding: "gzip" or "deflate" returns `_server_svg` compressed
+            and base64-encoded, marked by `_server_svg_encoding`, for
+            clients that can inflate it; "none" (the default) is plain text.
+        focus: Resource or module addresses to center the diagram on. Only
+            these and the resources within `hops` dependency edges of them
+            are drawn and returned; the rest appear as summary stub nodes,
+            described under `_focus`. Use this for small changes to big estates.
+        changes_only: Center the diagram on every changed resource (together
+            with any `focus` addresses) in the same way.
+        hops: Dependency edges to follow out from the centers when focusing
+            (0 = the centers only).
 
     Returns:
         The parsed plan data as JSON for the MCP App UI to render
     """
+    if not plan and not plan_file and not plan_handle:
+        return json.dumps({"error": "Provide one of 'plan', 'plan_file' or 'plan_handle'."})
+    budget, deadline = _budget(budget_ms)
     try:
-        plan_data = json.loads(plan)
-    except json.JSONDecodeError as e:
-        return json.dumps({"error": f"Invalid JSON: {e}"})
+        engine = _resolve_engine(layout_engine)
+        encoding = _resolve_svg_encoding(svg_encoding)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+
+    store = get_plan_store()
+    if plan_handle:
+        stored = store.get(plan_handle)
+        if stored is None:
+            return json.dumps({"error": f"Unknown or expired plan handle: {plan_handle}"})
+        plan_data = dict(stored.plan_data, _plan_handle=stored.handle)
+        original_bytes = stored.size
+    else:
+        try:
+            with stage("parse"):
+                plan_data = _load_plan(plan, plan_file)
+        except json.JSONDecodeError as e:
+            return json.dumps({"error": f"Invalid JSON: {e}"})
+        except (OSError, ValueError) as e:
+            return json.dumps({"error": f"Cannot read plan file: {e}"})
+        original_bytes = len(plan) if plan else os.path.getsize(plan_file)
+        if lean and plan and "resource_changes" in plan_data:
+            # Lean results drop attribute bodies; keep them fetchable on demand
+            plan_data["_plan_handle"] = store.put(plan).handle
 
     if "resource_changes" not in plan_data:
         return json.dumps({"error": "Invalid Terraform plan — missing 'resource_changes'."})
 
+    diagram_plan = plan_data
+    if focus or changes_only:
+        from cloud_diagram_mcp.focus import focus_plan
+
+        try:
+            with stage("focus"):
+                plan_data, diagram_plan, focused = focus_plan(
+                    plan_data, focus or (), changes_only, hops
+                )
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
+        plan_data["_focus"] = focused
+
     # Try to generate SVG server-side with official cloud provider icons
     try:
-        from cloud_diagram_mcp.visualizer_hierarchical import generate_svg
-        from cloud_diagram_mcp.svg_embedder import embed_icons_in_svg_content
-
-        svg = generate_svg(plan_data)
-        svg = embed_icons_in_svg_content(svg)
-        # Remove surrogate characters that break UTF-8 JSON serialisation
-        # Use 'ignore' to strip surrogates completely
-        svg = svg.encode("utf-8", errors="ignore").decode("utf-8")
+        from cloud_diagram_mcp.level_of_detail import collapse_plan
+
+        with stage("level_of_detail"):
+            diagram_plan, lod = collapse_plan(
+                diagram_plan, max_nodes or _LOD_MAX_NODES, module_depth
+            )
+        if lod is not None:
+            plan_data["_lod"] = lod
+        svg = _render_plan_svg(diagram_plan, workspace, engine, deadline)
         plan_data["_server_svg"] = svg
-    except Exception:
-        pass  # Fall back to client-side icon rendering
+        _add_svg_stats(plan_data, svg)
+    except Exception as e:
+        # The UI falls back to client-side icon rendering
+        plan_data["_server_svg_status"] = _render_status(e, budget)
+
+    if lean:
+        plan_data = _lean_result(plan_data, original_bytes)
 
-    # Use ensure_ascii=True to prevent any Unicode issues in JSON
-    result = json.dumps(plan_data, ensure_ascii=True)
+    # ASCII-only JSON, with the pre-escaped SVG spliced in rather than rescanned
+    with stage("serialize"):
+        result = dumps_result(plan_data, svg_encoding=encoding)
     return result
 
 
+@mcp.tool()
+@timed_tool
+def upload_plan(plan: str = "", plan_file: str = "") -> str:
+    """
+    Store a Terraform plan on the server and return a handle for later calls.
+
+    Upload a plan once, then pass the handle to visualize_tf_diff and
+    get_resource_detail instead of re-sending the plan JSON. Identical plans
+    get the same handle. Handles expire after a period of inactivity.
+
+    Args:
+        plan: Terraform plan JSON as a string (from `terraform show -json tfplan`)
+        plan_file: Alternatively, the path of a plan JSON file on the server host
+
+    Returns:
+        JSON with the plan handle, resource count and stored size
+    """
+    if not plan and not plan_file:
+        return json.dumps({"error": "Provide either 'plan' or 'plan_file'."})
+
+    try:
+        document: str | bytes = plan if plan else Path(plan_file).read_bytes()
+        stored = get_plan_store().put(document)
+    except json.JSONDecodeError as e:
+        return json.dumps({"error": f"Invalid JSON: {e}"})
+    except OSError as e:
+        return json.dumps({"error": f"Cannot read plan file: {e}"})
+
+    if "resource_changes" not in stored.plan_data:
+        return json.dumps({"error": "Invalid Terraform plan — missing 'resource_changes'."})
+
+    return json.dumps(
+        {
+            "plan_handle": stored.handle,
+            "resources": len(stored.plan_data["resource_changes"]),
+            "size_kb": round(stored.size / 1024, 1),
+        }
+    )
+
+
+@mcp.tool()
+@timed_tool
+def get_resource_detail(plan_handle: str, address: str) -> str:
+    """
+    Fetch the full change (before/after attributes) of one resource from a stored plan.
+
+    Args:
+        plan_handle: Handle returned by upload_plan or a lean visualize_tf_diff result
+        address: Resource address, e.g. "aws_instance.web[0]"
+
+    Returns:
+        The resource_changes entry for the address as JSON
+    """
+    stored = get_plan_store().get(plan_handle)
+    if stored is None:
+        return json.dumps({"error": f"Unknown or expired plan handle: {plan_handle}"})
+
+    detail = stored.resource_detail(address)
+    if detail is None:
+        return json.dumps({"error": f"No resource change for address: {address}"})
+    return json.dumps(detail, ensure_ascii=True)
+
+
 @mcp.tool(app=AppConfig(resourceUri=VIEW_URI))
-def visualize_architecture(architecture: str) -> str:
+@timed_tool
+def visualize_architecture(
+    architecture: str, layout_engine: str = "", budget_ms: int = 0, svg_encoding: str = ""
+) -> str:
     """
     Visualize a cloud architecture as an interactive diagram.
 
@@ -112,38 +537,86 @@ def visualize_architecture(architecture: str) -> str:
             }
             Resource types use Terraform naming (aws_*, azurerm_*, google_*).
             Connection action: "create" (green), "delete" (red), or omit for grey.
+        layout_engine: "graphviz" (default when Graphviz is installed) or
+            "layered", the built-in engine that needs no Graphviz.
+        budget_ms: Latency budget in milliseconds, as for visualize_tf_diff.
+        svg_encoding: "gzip", "deflate" or "none", as for visualize_tf_diff.
 
     Returns:
         The architecture data as JSON for the MCP App UI to render
     """
+    budget, deadline = _budget(budget_ms)
     try:
-        arch_data = json.loads(architecture)
+        with stage("parse"):
+            arch_data = json.loads(architecture)
+        engine = _resolve_engine(layout_engine)
+        encoding = _resolve_svg_encoding(svg_encoding)
     except json.JSONDecodeError as e:
         return json.dumps({"error": f"Invalid JSON: {e}"})
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
 
     if "resources" not in arch_data:
         return json.dumps({"error": "Missing 'resources' array."})
 
     # Try to generate SVG server-side
     try:
-        from cloud_diagram_mcp.visualizer_hierarchical import generate_architecture_svg
-        from cloud_diagram_mcp.svg_embedder import embed_icons_in_svg_content
-
-        svg = generate_architecture_svg(arch_data)
-        svg = embed_icons_in_svg_content(svg)
-        svg = svg.encode("utf-8", errors="ignore").decode("utf-8")
+        svg = _render_architecture_svg(arch_data, engine, deadline)
         arch_data["_server_svg"] = svg
-    except Exception:
-        pass
+        _add_svg_stats(arch_data, svg)
+    except Exception as e:
+        arch_data["_server_svg_status"] = _render_status(e, budget)
 
     # Build a compatible structure for the UI
     arch_data["_mode"] = "architecture"
-    result = json.dumps(arch_data, ensure_ascii=True, default=str)
+    with stage("serialize"):
+        result = dumps_result(arch_data, default=str, svg_encoding=encoding)
+    return result
+
+
+@mcp.tool()
+@timed_tool
+def get_rendered_svg(render_id: str, svg_encoding: str = "") -> str:
+    """
+    Fetch a server-side SVG that was still rendering when its tool call returned.
+
+    Args:
+        render_id: The `render_id` from a result's `_server_svg_status`
+        svg_encoding: "gzip", "deflate" or "none", as for visualize_tf_diff
+
+    Returns:
+        JSON with `status` "done" and the `_server_svg`, "pending" while the
+        render is still running, or "failed" with a `reason`
+    """
+    try:
+        encoding = _resolve_svg_encoding(svg_encoding)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    with _renders_lock:
+        future = _renders.get(render_id)
+    if future is None:
+        svg = get_render_cache().get(render_id)
+        if svg is None:
+            return json.dumps({"error": f"Unknown or expired render id: {render_id}"})
+    elif not future.done():
+        return json.dumps({"render_id": render_id, "status": "pending"})
+    elif future.exception() is not None:
+        status = _render_status(future.exception(), 0)
+        return json.dumps(dict(status, render_id=render_id), ensure_ascii=True)
+    else:
+        svg = future.result()
+    with stage("serialize"):
+        result = dumps_result(
+            {"render_id": render_id, "status": "done", "_server_svg": svg}, svg_encoding=encoding
+        )
     return result
 
 
 @mcp.tool()
-def export_architecture_svg(architecture: str, output_path: str = "") -> str:
+@timed_tool
+def export_architecture_svg(
+    architecture: str, output_path: str = "", layout_engine: str = ""
+) -> str:
     """
     Export a cloud architecture diagram as an SVG file.
 
@@ -157,24 +630,25 @@ def export_architecture_svg(architecture: str, output_path: str = "") -> str:
         output_path: Optional file path for the SVG. If empty, a temp file
             is created. Use a path like "docs/architecture.svg" to place
             it in your repo.
+        layout_engine: "graphviz" (default when Graphviz is installed) or
+            "layered", the built-in engine that needs no Graphviz.
 
     Returns:
         The absolute path to the generated SVG file.
     """
     try:
-        arch_data = json.loads(architecture)
+        with stage("parse"):
+            arch_data = json.loads(architecture)
+        engine = _resolve_engine(layout_engine)
     except json.JSONDecodeError as e:
         return json.dumps({"error": f"Invalid JSON: {e}"})
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
 
     if "resources" not in arch_data:
         return json.dumps({"error": "Missing 'resources' array."})
 
-    from cloud_diagram_mcp.visualizer_hierarchical import generate_architecture_svg
-    from cloud_diagram_mcp.svg_embedder import embed_icons_in_svg_content
-
-    svg = generate_architecture_svg(arch_data)
-    svg = embed_icons_in_svg_content(svg)
-    svg = svg.encode("utf-8", errors="ignore").decode("utf-8")
+    svg = _render_architecture_svg(arch_data, engine)
 
     if output_path:
         target = Path(output_path).resolve()
@@ -187,7 +661,181 @@ def export_architecture_svg(architecture: str, output_path: str = "") -> str:
         target = Path(tmp)
 
     target.write_text(svg, encoding="utf-8")
-    return json.dumps({"path": str(target), "size_kb": round(len(svg) / 1024, 1)})
+    result: dict[str, Any] = {"path": str(target), "size_kb": round(len(svg) / 1024, 1)}
+    _add_svg_stats(result, svg)
+    return json.dumps(result)
+
+
+@mcp.tool()
+@timed_tool
+def export_architecture_tiles(
+    architecture: str,
+    output_dir: str = "",
+    layout_engine: str = "",
+    tile_format: str = "png",
+    tile_size: int = 256,
+    scale: float = 1.0,
+) -> str:
+    """
+    Export a cloud architecture diagram as a deep-zoom tile pyramid.
+
+    For estates too large to open as one SVG. The diagram is rendered once
+    and rasterised into a Deep Zoom (DZI) pyramid of PNG or WebP tiles that
+    viewers such as OpenSeadragon load per viewport, plus a low-resolution
+    overview image. Only the paths are returned.
+
+    Args:
+        architecture: JSON string with the architecture description (same
+            format as visualize_architecture).
+        output_dir: Directory for `diagram.dzi`, `diagram_files/` and
+            `diagram_overview.png`. If empty, a temp directory is created.
+        layout_engine: "graphviz" (default when Graphviz is installed) or
+            "layered", the built-in engine that needs no Graphviz.
+        tile_format: "png" (default) or "webp".
+        tile_size: Tile edge in pixels.
+        scale: Pixels per diagram point at the deepest zoom level.
+
+    Returns:
+        JSON with the manifest, tile directory and overview paths, the
+        full-resolution size, the number of levels and tiles, and their size.
+    """
+    from cloud_diagram_mcp.raster_tiles import export_tiles
+
+    try:
+        with stage("parse"):
+            arch_data = json.loads(architecture)
+        engine = _resolve_engine(layout_engine)
+    except json.JSONDecodeError as e:
+        return json.dumps({"error": f"Invalid JSON: {e}"})
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+
+    if "resources" not in arch_data:
+        return json.dumps({"error": "Missing 'resources' array."})
+
+    svg = _render_architecture_svg(arch_data, engine)
+
+    if not output_dir:
+        import tempfile as _tmp
+
+        output_dir = _tmp.mkdtemp(prefix="architecture_tiles_")
+
+    try:
+        result = export_tiles(
+            svg, output_dir, tile_size=tile_size, tile_format=tile_format, scale=scale
+        )
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    return json.dumps(result)
+
+
+def _batch_job(item: Any, engine: str) -> tuple[str, str | None, Any]:
+    """
+    Prepare one export_batch item: (output path, render id, start) or (output path, None, error).
+
+    Plans go through the same level-of-detail collapsing as visualize_tf_diff,
+    so a batch export matches what the tool shows.
+    """
+    if not isinstance(item, dict) or not item.get("output_path"):
+        return "", None, "Each item needs an 'output_path'."
+    output = str(item["output_path"])
+    try:
+        engine = _resolve_engine(item.get("layout_engine") or engine)
+        if "plan" in item or "plan_file" in item:
+            from cloud_diagram_mcp.level_of_detail import collapse_plan
+
+            plan = item.get("plan", "")
+            with stage("parse"):
+                plan_data = (
+                    plan if isinstance(plan, dict) else _load_plan(plan, item.get("plan_file", ""))
+                )
+            if "resource_changes" not in plan_data:
+                return output, None, "Invalid Terraform plan — missing 'resource_changes'."
+            with stage("level_of_detail"):
+                diagram_plan, _ = collapse_plan(
+                    plan_data, item.get("max_nodes") or _LOD_MAX_NODES, item.get("module_depth")
+                )
+            kind, layout = "plan", plan_layout_subset(diagram_plan)
+        elif "architecture" in item or "architecture_file" in item:
+            arch = item.get("architecture")
+            with stage("parse"):
+                if "architecture_file" in item:
+                    arch = Path(item["architecture_file"]).read_text(encoding="utf-8")
+                arch_data = arch if isinstance(arch, dict) else json.loads(arch)
+            if "resources" not in arch_data:
+                return output, None, "Missing 'resources' array."
+            kind, layout = "architecture", architecture_layout_subset(arch_data)
+        else:
+            return (
+                output,
+                None,
+                "Provide one of 'plan', 'plan_file', 'architecture' or 'architecture_file'.",
+            )
+    except json.JSONDecodeError as e:
+        return output, None, f"Invalid JSON: {e}"
+    except (OSError, ValueError) as e:
+        return output, None, str(e)
+
+    options = _engine_options(engine)
+    return (
+        output,
+        _render_key(kind, layout, options),
+        lambda: _start_render(kind, layout, options)[1],
+    )
+
+
+@mcp.tool()
+@timed_tool
+def export_batch(items: str, manifest_path: str = "", layout_engine: str = "") -> str:
+    """
+    Export many plans and architectures to SVG files in one call.
+
+    All renders run concurrently on the render worker processes, and files
+    are written as they finish. Outputs are compared by content hash: items
+    whose layout and file are unchanged since the last run are not rendered
+    at all, and files whose content would not change are not rewritten, so
+    regenerating documentation does not churn git.
+
+    Args:
+        items: JSON list of items, each with an "output_path" and one of
+            "plan" (plan JSON, as a string or object), "plan_file",
+            "architecture" (as a string or object) or "architecture_file".
+            Items may also set "layout_engine", and plans "max_nodes" and
+            "module_depth" as for visualize_tf_diff.
+        manifest_path: Optional JSON manifest recording each output's render
+            id and hash; it is read to skip unchanged items and rewritten
+            when anything changes.
+        layout_engine: Default layout engine for items that do not set one.
+
+    Returns:
+        JSON manifest with per-item `status` ("written", "unchanged",
+        "skipped" or "failed"), `bytes`, `sha256` and `render_ms`, and
+        per-status counts.
+    """
+    try:
+        with stage("parse"):
+            batch = json.loads(items)
+    except json.JSONDecodeError as e:
+        return json.dumps({"error": f"Invalid JSON: {e}"})
+    if not isinstance(batch, list):
+        return json.dumps({"error": "'items' must be a JSON list."})
+    return json.dumps(export_items(batch, manifest_path, layout_engine))
+
+
+def export_items(
+    items: list[Any], manifest_path: str = "", layout_engine: str = ""
+) -> dict[str, Any]:
+    """
+    Export already-parsed export_batch items in-process; returns the manifest dict.
+
+    The entry point for the command line, which has no JSON to round-trip.
+    """
+    from cloud_diagram_mcp.batch_export import export_batch as run_batch
+
+    # Prepared lazily: each render starts while the next item is parsed
+    jobs = (_batch_job(item, layout_engine) for item in items)
+    with stage("render"):
+        return run_batch(jobs, manifest_path or None)
 
 
 # ---------------------------------------------------------------------------
@@ -204,8 +852,57 @@ def visualization_view() -> str:
     return _load_ui_html()
 
 
+@mcp.resource(METRICS_URI, mime_type="text/plain")
+def metrics_view() -> str:
+    """Per-stage latency histograms and render cache/pool counters, in Prometheus text format."""
+    cache = get_render_cache().stats()
+    extra = {
+        "cloud_diagram_render_cache_hits_total": ("counter", "Render cache hits.", cache["hits"]),
+        "cloud_diagram_render_cache_disk_hits_total": (
+            "counter",
+            "Render cache hits served from disk.",
+            cache["disk_hits"],
+        ),
+        "cloud_diagram_render_cache_misses_total": (
+            "counter",
+            "Render cache misses.",
+            cache["misses"],
+        ),
+        "cloud_diagram_render_cache_evictions_total": (
+            "counter",
+            "Renders evicted from the cache.",
+            cache["evictions"],
+        ),
+        "cloud_diagram_render_cache_entries": ("gauge", "Renders in memory.", cache["entries"]),
+        "cloud_diagram_render_cache_bytes": ("gauge", "Size of cached renders.", cache["bytes"]),
+    }
+    pool = render_pool.pool_stats()
+    if pool is not None:
+        extra["cloud_diagram_render_workers"] = (
+            "gauge",
+            "Render worker processes.",
+            pool["workers"],
+        )
+        extra["cloud_diagram_render_workers_idle"] = ("gauge", "Idle render workers.", pool["idle"])
+        extra["cloud_diagram_render_worker_restarts_total"] = (
+            "counter",
+            "Render workers replaced after a timeout or crash.",
+            pool["restarts"],
+        )
+    return get_metrics().prometheus(extra)
+
+
 def main() -> None:
-    """Main entry point for the MCP server."""
+    """Main entry point for the MCP server, or a subcommand such as `watch` (see cli)."""
+    from cloud_diagram_mcp import cli
+
+    if len(sys.argv) > 1 and sys.argv[1] in cli.COMMANDS:
+        sys.exit(cli.main(sys.argv[1:]))
+
+    # Warm the renderer while the client is still initialising the session;
+    # CLOUD_DIAGRAM_WARMUP=0 defers all render setup to the first call
+    if os.environ.get("CLOUD_DIAGRAM_WARMUP", "1") != "0":
+        threading.Thread(target=render_pool.warm_up, name="render-warmup", daemon=True).start()
     mcp.run()
 
 
@@ -1,44 +1,129 @@
 """
 SVG icon embedder - Converts external image references to base64 data URIs.
+
+Encoded icons live in a process-wide table keyed by path and mtime, so each
+PNG is read and encoded once per process, and substitution is a single regex
+pass over the SVG regardless of how many distinct icons it references.
 """
 
 import base64
+import os
 import re
-from pathlib import Path
-from typing import Dict
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+_HREF_RE = re.compile(r'xlink:href="([^"]+\.png)"')
+_IMAGE_RE = re.compile(r"<image\b([^>]*?)/?>(?:</image>)?")
+_ATTR_RE = re.compile(r'([\w:-]+)="([^"]*)"')
+_SVG_OPEN_RE = re.compile(r"<svg\b[^>]*>")
+
+_DEF_ID_PREFIX = "cdm-icon-"
+
+# path -> (mtime_ns, data URI)
+_icon_table: Dict[str, Tuple[int, str]] = {}
+_icon_table_lock = threading.Lock()
+
+
+def _icon_data_uri(image_path: str) -> Optional[str]:
+    """Return the data URI for a PNG, encoding it only if new or modified."""
+    try:
+        mtime = os.stat(image_path).st_mtime_ns
+    except OSError:
+        return None
+
+    entry = _icon_table.get(image_path)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+
+    try:
+        with open(image_path, "rb") as img_file:
+            base64_data = base64.b64encode(img_file.read()).decode("utf-8")
+    except OSError:
+        return None
+
+    data_uri = f"data:image/png;base64,{base64_data}"
+    with _icon_table_lock:
+        _icon_table[image_path] = (mtime, data_uri)
+    return data_uri
+
+
+def preload_icons(image_paths: Iterable[str]) -> int:
+    """
+    Encode icons ahead of the first render.
+
+    Args:
+        image_paths: PNG paths to load into the process-wide icon table
+
+    Returns:
+        Number of icons available in the table afterwards
+    """
+    for image_path in image_paths:
+        _icon_data_uri(image_path)
+    return len(_icon_table)
 
 
-def embed_icons_in_svg_content(svg_content: str) -> str:
+def embed_icons_in_svg_content(svg_content: str, dedupe: bool = False) -> str:
     """
     Convert external image references in SVG content to embedded base64 data URIs.
 
     Args:
         svg_content: SVG content as a string
+        dedupe: Write each distinct icon once into <defs> and point every
+            node at it with <use>, instead of repeating the base64 payload
+            in every <image>. The result is still a self-contained SVG.
 
     Returns:
         SVG content with all icons embedded as base64 data URIs
     """
-    pattern = r'xlink:href="([^"]+\.png)"'
-    matches = re.findall(pattern, svg_content)
+    if dedupe:
+        return _embed_icons_as_defs(svg_content)
+
+    # Stat each distinct path once per call, not once per node
+    resolved: Dict[str, Optional[str]] = {}
+
+    def _substitute(match: "re.Match[str]") -> str:
+        image_path = match.group(1)
+        if image_path not in resolved:
+            resolved[image_path] = _icon_data_uri(image_path)
+        data_uri = resolved[image_path]
+        return f'xlink:href="{data_uri}"' if data_uri else match.group(0)
+
+    return _HREF_RE.sub(_substitute, svg_content)
 
-    encoded_cache: Dict[str, str] = {}
 
-    for image_path in set(matches):
-        if image_path in encoded_cache:
-            continue
+def _embed_icons_as_defs(svg_content: str) -> str:
+    """Embed each distinct icon once in <defs> and reference it with <use>."""
+    resolved: Dict[str, Optional[str]] = {}
+    # (path, sizing attributes) -> (def id, <image> element for <defs>)
+    defs: Dict[Tuple[str, str], Tuple[str, str]] = {}
 
-        if not Path(image_path).exists():
-            continue
+    def _substitute(match: "re.Match[str]") -> str:
+        attrs = dict(_ATTR_RE.findall(match.group(1)))
+        image_path = attrs.pop("xlink:href", "")
+        if not image_path.endswith(".png"):
+            return match.group(0)
+        if image_path not in resolved:
+            resolved[image_path] = _icon_data_uri(image_path)
+        data_uri = resolved[image_path]
+        if not data_uri:
+            return match.group(0)
 
-        try:
-            with open(image_path, "rb") as img_file:
-                img_data = img_file.read()
-                base64_data = base64.b64encode(img_data).decode("utf-8")
-                encoded_cache[image_path] = f"data:image/png;base64,{base64_data}"
-        except Exception:
-            continue
+        # Position moves to <use>; everything else is shared by the definition
+        x = attrs.pop("x", "0")
+        y = attrs.pop("y", "0")
+        sizing = " ".join(f'{k}="{v}"' for k, v in attrs.items())
+        key = (image_path, sizing)
+        if key not in defs:
+            def_id = f"{_DEF_ID_PREFIX}{len(defs)}"
+            defs[key] = (def_id, f'<image id="{def_id}" xlink:href="{data_uri}" {sizing}/>')
+        return f'<use xlink:href="#{defs[key][0]}" x="{x}" y="{y}"/>'
 
-    for image_path, data_uri in encoded_cache.items():
-        svg_content = svg_content.replace(f'xlink:href="{image_path}"', f'xlink:href="{data_uri}"')
+    body = _IMAGE_RE.sub(_substitute, svg_content)
+    if not defs:
+        return body
 
-    return svg_content
+    svg_open = _SVG_OPEN_RE.search(body)
+    if svg_open is None:
+        return svg_content
+    block = "\n<defs>\n" + "\n".join(element for _, element in defs.values()) + "\n</defs>"
+    return body[: svg_open.end()] + block + body[svg_open.end() :]
@@ -0,0 +1,134 @@
+"""
+SVG minifier - Shrinks layout engine output before icons are embedded.
+
+Graphviz SVG carries a comment per node and edge, a DOCTYPE, newlines
+between every element and coordinates with two decimals. One regex pass
+over the document drops the comments, the DOCTYPE and the whitespace
+between tags, rounds the numbers in geometry attributes to a configurable
+precision and shortens Graphviz's generated ids (node12 -> n12).
+
+Everything the viewer and the layout memory read is kept: `class="node"`
+groups, their `<title>` with the resource address, and the text content
+of labels, which is never rewritten.
+
+The root element is marked with `data-minified="<source bytes>,<minified
+bytes>"` so the saving can be reported for cached renders too (see
+`minify_stats`).
+
+Configured via environment variables:
+    CLOUD_DIAGRAM_SVG_MINIFY: "0" disables minification (default on)
+    CLOUD_DIAGRAM_SVG_PRECISION: decimals kept in coordinates (default 1)
+"""
+
+import os
+import re
+from typing import Dict, Optional
+
+_DEFAULT_PRECISION = 1
+
+# Geometry attributes whose numbers are rounded. Label text is XML-escaped by
+# both engines, so a `name="..."` pattern can only match inside a tag.
+_GEOMETRY_ATTRS = "x|y|x1|y1|x2|y2|cx|cy|rx|ry|width|height|points|d|transform|viewBox|font-size"
+
+# Every alternative starts with "<" or whitespace; the leading lookahead lets
+# the scanner skip all other positions cheaply
+_TOKEN_RE = re.compile(
+    r"(?=[<\s])(?:"
+    r"(?P<comment><!--.*?-->)"
+    r"|(?P<doctype><!DOCTYPE[^>]*>)"
+    r"|(?P<between>(?<=>)\s+(?=<))"
+    r"|(?P<wrap>\n\s*)(?=[\w:-]+=\")"
+    r'| id="(?P<prefix>graph|clust|node|edge|a_node|a_edge|a_clust)(?P<num>\d+(?:_\d+)?)"'
+    rf'|(?P<geometry> (?:{_GEOMETRY_ATTRS})="[^"]*")'
+    r")",
+    re.S,
+)
+_NUMBER_RE = re.compile(r"-?\d+\.\d+")
+_STATS_RE = re.compile(r'<svg\b[^>]*?\bdata-minified="(\d+),(\d+)"')
+
+# Graphviz id prefix -> short prefix
+_ID_PREFIXES = {
+    "graph": "g",
+    "clust": "c",
+    "node": "n",
+    "edge": "e",
+    "a_node": "an",
+    "a_edge": "ae",
+    "a_clust": "ac",
+}
+
+
+def minify_precision() -> Optional[int]:
+    """Decimals minify_svg keeps by default, or None when minification is off."""
+    if os.environ.get("CLOUD_DIAGRAM_SVG_MINIFY", "1") == "0":
+        return None
+    return int(os.environ.get("CLOUD_DIAGRAM_SVG_PRECISION", _DEFAULT_PRECISION))
+
+
+def minify_svg(svg: str, precision: Optional[int] = None) -> str:
+    """
+    Minify an SVG document in one pass.
+
+    Args:
+        svg: SVG text from a layout engine, before icon embedding
+        precision: Decimals kept in coordinates; None reads
+            CLOUD_DIAGRAM_SVG_PRECISION, and returns the SVG unchanged
+            when CLOUD_DIAGRAM_SVG_MINIFY=0
+
+    Returns:
+        The minified SVG, its root marked with the before/after sizes
+    """
+    if precision is None:
+        precision = minify_precision()
+        if precision is None:
+            return svg
+    precision = max(0, precision)
+
+    # Layouts repeat the same coordinates and attributes over and over;
+    # round each distinct number and attribute once
+    rounded: Dict[str, str] = {}
+
+    def _round(match: "re.Match[str]") -> str:
+        number = match.group(0)
+        text = rounded.get(number)
+        if text is None:
+            text = f"{float(number):.{precision}f}"
+            if "." in text:
+                text = text.rstrip("0").rstrip(".")
+            rounded[number] = text = "0" if text == "-0" else text
+        return text
+
+    def _substitute(match: "re.Match[str]") -> str:
+        kind = match.lastgroup
+        if kind == "geometry":
+            attr = match.group(0)
+            text = rounded.get(attr)
+            if text is None:
+                rounded[attr] = text = _NUMBER_RE.sub(_round, attr)
+            return text
+        if kind == "num":
+            return f' id="{_ID_PREFIXES[match.group("prefix")]}{match.group("num")}"'
+        if kind == "wrap":
+            return " "
+        return ""
+
+    minified = _TOKEN_RE.sub(_substitute, svg)
+    return minified.replace("<svg ", f'<svg data-minified="{len(svg)},{len(minified)}" ', 1)
+
+
+def minify_stats(svg: str) -> Optional[Dict[str, int]]:
+    """
+    Return the size reduction recorded by minify_svg, or None if not minified.
+
+    `bytes` is the size of the SVG as sent, i.e. including embedded icons.
+    """
+    match = _STATS_RE.search(svg, 0, 4096)
+    if match is None:
+        return None
+    source, minified = int(match.group(1)), int(match.group(2))
+    return {
+        "source_bytes": source,
+        "minified_bytes": minified,
+        "saved_pct": round(100 * (source - minified) / source, 1) if source else 0,
+        "bytes": len(svg),
+    }
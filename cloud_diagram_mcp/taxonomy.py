@@ -0,0 +1,480 @@
+"""
+Resource taxonomy - Classifies Terraform resource types for the diagram.
+
+Every resource type maps to a Classification: the architectural layer it is
+drawn in, its sub-cluster inside that layer, and the Diagrams icon it is
+drawn with. Lookup goes through three tiers built once at import:
+
+1. an exact table for the types the diagram has always known
+2. prefix rules per provider (`aws_lambda_` -> compute/Lambda), compiled into
+   one regular expression that matches the longest known prefix
+3. a generic icon per provider, so an unknown Azure resource no longer shows
+   up as an EC2 instance
+
+Results are memoised per type, so classifying a plan is one dictionary
+lookup per resource.
+
+Icons are named by "module.Class" specs relative to the `diagrams` package
+and only imported by icon_class(), when a renderer draws them. Importing or
+classifying does not import Diagrams (or Graphviz), and a render only loads
+the provider modules it draws.
+"""
+
+import importlib
+import re
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+# Architectural layers, top to bottom of the diagram
+LAYERS = (
+    "dns",
+    "cdn",
+    "network",
+    "load_balancer",
+    "compute",
+    "database",
+    "cache",
+    "storage",
+    "security",
+)
+
+# Layer of types matched by no rule at all
+DEFAULT_LAYER = "compute"
+
+
+class Classification(NamedTuple):
+    """Where and how a resource type is drawn."""
+
+    layer: str
+    # Sub-cluster inside the network layer: "vpc", "subnet", "gateway" or None
+    group: Optional[str]
+    # Icon spec, e.g. "aws.compute.EC2"; icon_class() resolves it to a Diagrams class
+    icon: str
+
+
+# ---------------------------------------------------------------------------
+# Icon mapping for Terraform resource types to Diagrams classes, as specs;
+# ICON_MAPPING (below) resolves them to the classes
+# ---------------------------------------------------------------------------
+ICON_SPECS = {
+    # AWS Resources
+    "aws_instance": "aws.compute.EC2",
+    "aws_vpc": "aws.network.VPC",
+    "aws_subnet": "aws.network.VPC",
+    "aws_security_group": "aws.security.IAM",
+    "aws_db_instance": "aws.database.RDS",
+    "aws_rds_cluster": "aws.database.RDS",
+    "aws_elasticache_cluster": "aws.database.ElastiCache",
+    "aws_elasticache_replication_group": "aws.database.ElastiCache",
+    "aws_s3_bucket": "aws.storage.S3",
+    "aws_ebs_volume": "aws.storage.EBS",
+    "aws_efs_file_system": "aws.storage.EFS",
+    "aws_elb": "aws.network.ELB",
+    "aws_lb": "aws.network.ELB",
+    "aws_alb": "aws.network.ELB",
+    "aws_internet_gateway": "aws.network.InternetGateway",
+    "aws_nat_gateway": "aws.network.NATGateway",
+    "aws_route53_zone": "aws.network.Route53",
+    "aws_route53_record": "aws.network.Route53",
+    "aws_cloudfront_distribution": "aws.network.CloudFront",
+    "aws_iam_role": "aws.security.IAM",
+    "aws_iam_user": "aws.security.IAM",
+    "aws_iam_policy": "aws.security.IAM",
+    "aws_secretsmanager_secret": "aws.security.SecretsManager",
+    "aws_wafv2_web_acl": "aws.security.WAF",
+    # Azure Resources
+    "azurerm_virtual_machine": "azure.compute.VM",
+    "azurerm_linux_virtual_machine": "azure.compute.VM",
+    "azurerm_windows_virtual_machine": "azure.compute.VM",
+    "azurerm_virtual_network": "azure.network.VirtualNetworks",
+    "azurerm_subnet": "azure.network.VirtualNetworks",
+    "azurerm_network_security_group": "azure.network.VirtualNetworks",
+    "azurerm_mssql_server": "azure.database.SQLDatabases",
+    "azurerm_mssql_database": "azure.database.SQLDatabases",
+    "azurerm_cosmosdb_account": "azure.database.CosmosDb",
+    "azurerm_storage_account": "azure.storage.StorageAccounts",
+    "azurerm_storage_blob": "azure.storage.BlobStorage",
+    "azurerm_storage_container": "azure.storage.BlobStorage",
+    "azurerm_lb": "azure.network.LoadBalancers",
+    "azurerm_application_gateway": "azure.network.ApplicationGateway",
+    "azurerm_dns_zone": "azure.network.DNSZones",
+    "azurerm_user_assigned_identity": "azure.identity.ManagedIdentities",
+    "azurerm_container_group": "azure.compute.ContainerInstances",
+    "azurerm_app_service": "azure.compute.AppServices",
+    # GCP Resources
+    "google_compute_instance": "gcp.compute.ComputeEngine",
+    "google_compute_network": "gcp.network.VPC",
+    "google_compute_subnetwork": "gcp.network.VPC",
+    "google_sql_database_instance": "gcp.database.SQL",
+    "google_firestore_database": "gcp.database.Firestore",
+    "google_storage_bucket": "gcp.storage.GCS",
+    "google_compute_forwarding_rule": "gcp.network.LoadBalancing",
+    "google_container_cluster": "gcp.compute.GKE",
+    "google_app_engine_application": "gcp.compute.AppEngine",
+}
+
+# Map resource types to architectural layers
+LAYER_MAPPING = {
+    "aws_route53_zone": "dns",
+    "aws_route53_record": "dns",
+    "aws_cloudfront_distribution": "cdn",
+    "aws_vpc": "network",
+    "aws_subnet": "network",
+    "aws_internet_gateway": "network",
+    "aws_nat_gateway": "network",
+    "aws_lb": "load_balancer",
+    "aws_elb": "load_balancer",
+    "aws_alb": "load_balancer",
+    "aws_instance": "compute",
+    "aws_db_instance": "database",
+    "aws_rds_cluster": "database",
+    "aws_elasticache_cluster": "cache",
+    "aws_elasticache_replication_group": "cache",
+    "aws_s3_bucket": "storage",
+    "aws_ebs_volume": "storage",
+    "aws_efs_file_system": "storage",
+    "aws_security_group": "security",
+    "aws_iam_role": "security",
+    "aws_iam_policy": "security",
+    "aws_secretsmanager_secret": "security",
+    "aws_wafv2_web_acl": "security",
+    # Azure
+    "azurerm_dns_zone": "dns",
+    "azurerm_virtual_network": "network",
+    "azurerm_subnet": "network",
+    "azurerm_lb": "load_balancer",
+    "azurerm_application_gateway": "load_balancer",
+    "azurerm_virtual_machine": "compute",
+    "azurerm_linux_virtual_machine": "compute",
+    "azurerm_windows_virtual_machine": "compute",
+    "azurerm_container_group": "compute",
+    "azurerm_app_service": "compute",
+    "azurerm_mssql_server": "database",
+    "azurerm_mssql_database": "database",
+    "azurerm_cosmosdb_account": "database",
+    "azurerm_storage_account": "storage",
+    "azurerm_storage_blob": "storage",
+    "azurerm_storage_container": "storage",
+    "azurerm_user_assigned_identity": "security",
+    "azurerm_network_security_group": "security",
+    # GCP
+    "google_compute_network": "network",
+    "google_compute_subnetwork": "network",
+    "google_compute_forwarding_rule": "load_balancer",
+    "google_compute_instance": "compute",
+    "google_container_cluster": "compute",
+    "google_app_engine_application": "compute",
+    "google_sql_database_instance": "database",
+    "google_firestore_database": "database",
+    "google_storage_bucket": "storage",
+}
+
+# ---------------------------------------------------------------------------
+# Prefix rules: (type prefix, layer, icon). The longest matching prefix wins,
+# so `aws_route53_` and `aws_vpc_endpoint` override `aws_route` and `aws_vpc`.
+# ---------------------------------------------------------------------------
+PREFIX_RULES: Tuple[Tuple[str, str, str], ...] = (
+    # AWS
+    ("aws_route53", "dns", "aws.network.Route53"),
+    ("aws_cloudfront", "cdn", "aws.network.CloudFront"),
+    ("aws_vpc", "network", "aws.network.VPC"),
+    ("aws_default_vpc", "network", "aws.network.VPC"),
+    ("aws_subnet", "network", "aws.network.VPC"),
+    ("aws_default_subnet", "network", "aws.network.VPC"),
+    ("aws_internet_gateway", "network", "aws.network.InternetGateway"),
+    ("aws_egress_only_internet_gateway", "network", "aws.network.InternetGateway"),
+    ("aws_nat_gateway", "network", "aws.network.NATGateway"),
+    ("aws_route", "network", "aws.network.RouteTable"),
+    ("aws_default_route_table", "network", "aws.network.RouteTable"),
+    ("aws_main_route_table", "network", "aws.network.RouteTable"),
+    ("aws_eip", "network", "aws.compute.EC2ElasticIpAddress"),
+    ("aws_network_interface", "network", "aws.network.VPCElasticNetworkInterface"),
+    ("aws_network_acl", "network", "aws.network.Nacl"),
+    ("aws_default_network_acl", "network", "aws.network.Nacl"),
+    ("aws_vpc_endpoint", "network", "aws.network.Endpoint"),
+    ("aws_vpc_peering_connection", "network", "aws.network.VPCPeering"),
+    ("aws_ec2_transit_gateway", "network", "aws.network.TransitGateway"),
+    ("aws_vpn", "network", "aws.network.VpnConnection"),
+    ("aws_customer_gateway", "network", "aws.network.VPCCustomerGateway"),
+    ("aws_dx_", "network", "aws.network.DirectConnect"),
+    ("aws_lb", "load_balancer", "aws.network.ELB"),
+    ("aws_alb", "load_balancer", "aws.network.ELB"),
+    ("aws_elb", "load_balancer", "aws.network.ELB"),
+    ("aws_api_gateway", "load_balancer", "aws.network.APIGateway"),
+    ("aws_apigatewayv2", "load_balancer", "aws.network.APIGateway"),
+    ("aws_globalaccelerator", "load_balancer", "aws.network.GlobalAccelerator"),
+    ("aws_instance", "compute", "aws.compute.EC2"),
+    ("aws_launch_", "compute", "aws.compute.EC2"),
+    ("aws_spot_", "compute", "aws.compute.EC2"),
+    ("aws_ami", "compute", "aws.compute.AMI"),
+    ("aws_autoscaling", "compute", "aws.compute.AutoScaling"),
+    ("aws_ecs_", "compute", "aws.compute.ECS"),
+    ("aws_eks_", "compute", "aws.compute.EKS"),
+    ("aws_ecr_", "compute", "aws.compute.ECR"),
+    ("aws_lambda_", "compute", "aws.compute.Lambda"),
+    ("aws_batch_", "compute", "aws.compute.Batch"),
+    ("aws_elastic_beanstalk_", "compute", "aws.compute.EB"),
+    ("aws_apprunner_", "compute", "aws.compute.AppRunner"),
+    ("aws_sqs_", "compute", "aws.integration.SQS"),
+    ("aws_sns_", "compute", "aws.integration.SNS"),
+    ("aws_sfn_", "compute", "aws.integration.StepFunctions"),
+    ("aws_cloudwatch_event_", "compute", "aws.integration.Eventbridge"),
+    ("aws_scheduler_", "compute", "aws.integration.Eventbridge"),
+    ("aws_mq_", "compute", "aws.integration.MQ"),
+    ("aws_db_", "database", "aws.database.RDS"),
+    ("aws_rds_", "database", "aws.database.RDS"),
+    ("aws_dynamodb_", "database", "aws.database.Dynamodb"),
+    ("aws_redshift", "database", "aws.database.Redshift"),
+    ("aws_docdb_", "database", "aws.database.DocumentDB"),
+    ("aws_neptune_", "database", "aws.database.Neptune"),
+    ("aws_dms_", "database", "aws.database.DMS"),
+    ("aws_timestreamwrite_", "database", "aws.database.Timestream"),
+    ("aws_elasticache_", "cache", "aws.database.ElastiCache"),
+    ("aws_memorydb_", "cache", "aws.database.ElastiCache"),
+    ("aws_dax_", "cache", "aws.database.DAX"),
+    ("aws_s3", "storage", "aws.storage.S3"),
+    ("aws_ebs_", "storage", "aws.storage.EBS"),
+    ("aws_volume_attachment", "storage", "aws.storage.EBS"),
+    ("aws_efs_", "storage", "aws.storage.EFS"),
+    ("aws_fsx_", "storage", "aws.storage.FSx"),
+    ("aws_backup_", "storage", "aws.storage.Backup"),
+    ("aws_glacier_", "storage", "aws.storage.S3Glacier"),
+    ("aws_storagegateway_", "storage", "aws.storage.StorageGateway"),
+    ("aws_iam_", "security", "aws.security.IAM"),
+    ("aws_security_group", "security", "aws.security.IAM"),
+    ("aws_default_security_group", "security", "aws.security.IAM"),
+    ("aws_vpc_security_group_", "security", "aws.security.IAM"),
+    ("aws_kms_", "security", "aws.security.KMS"),
+    ("aws_secretsmanager_", "security", "aws.security.SecretsManager"),
+    ("aws_ssm_parameter", "security", "aws.security.SecretsManager"),
+    ("aws_waf", "security", "aws.security.WAF"),
+    ("aws_networkfirewall_", "security", "aws.network.NetworkFirewall"),
+    ("aws_acm_", "security", "aws.security.ACM"),
+    ("aws_acmpca_", "security", "aws.security.ACM"),
+    ("aws_cognito_", "security", "aws.security.Cognito"),
+    ("aws_guardduty_", "security", "aws.security.Guardduty"),
+    ("aws_shield_", "security", "aws.security.Shield"),
+    ("aws_securityhub_", "security", "aws.security.SecurityHub"),
+    # Azure
+    ("azurerm_dns_", "dns", "azure.network.DNSZones"),
+    ("azurerm_private_dns_", "dns", "azure.network.DNSPrivateZones"),
+    ("azurerm_cdn_", "cdn", "azure.network.CDNProfiles"),
+    ("azurerm_frontdoor", "cdn", "azure.network.FrontDoors"),
+    ("azurerm_virtual_network", "network", "azure.network.VirtualNetworks"),
+    ("azurerm_virtual_network_gateway", "network", "azure.network.VirtualNetworkGateways"),
+    ("azurerm_subnet", "network", "azure.network.Subnets"),
+    ("azurerm_network_interface", "network", "azure.network.NetworkInterfaces"),
+    ("azurerm_public_ip", "network", "azure.network.PublicIpAddresses"),
+    ("azurerm_route", "network", "azure.network.RouteTables"),
+    ("azurerm_nat_gateway", "network", "azure.network.VirtualNetworkGateways"),
+    ("azurerm_local_network_gateway", "network", "azure.network.LocalNetworkGateways"),
+    ("azurerm_express_route_", "network", "azure.network.ExpressrouteCircuits"),
+    ("azurerm_private_endpoint", "network", "azure.network.PrivateEndpoint"),
+    ("azurerm_virtual_wan", "network", "azure.network.VirtualWans"),
+    ("azurerm_virtual_hub", "network", "azure.network.VirtualWans"),
+    ("azurerm_lb", "load_balancer", "azure.network.LoadBalancers"),
+    ("azurerm_application_gateway", "load_balancer", "azure.network.ApplicationGateway"),
+    ("azurerm_traffic_manager_", "load_balancer", "azure.network.TrafficManagerProfiles"),
+    ("azurerm_api_management", "load_balancer", "azure.integration.APIManagement"),
+    ("azurerm_virtual_machine", "compute", "azure.compute.VM"),
+    ("azurerm_linux_virtual_machine", "compute", "azure.compute.VM"),
+    ("azurerm_windows_virtual_machine", "compute", "azure.compute.VM"),
+    ("azurerm_virtual_machine_scale_set", "compute", "azure.compute.VMScaleSets"),
+    ("azurerm_linux_virtual_machine_scale_set", "compute", "azure.compute.VMScaleSets"),
+    ("azurerm_windows_virtual_machine_scale_set", "compute", "azure.compute.VMScaleSets"),
+    ("azurerm_orchestrated_virtual_machine_scale_set", "compute", "azure.compute.VMScaleSets"),
+    ("azurerm_kubernetes_", "compute", "azure.compute.AKS"),
+    ("azurerm_container_group", "compute", "azure.compute.ContainerInstances"),
+    ("azurerm_container_app", "compute", "azure.compute.ContainerApps"),
+    ("azurerm_container_registry", "compute", "azure.compute.ACR"),
+    ("azurerm_app_service", "compute", "azure.compute.AppServices"),
+    ("azurerm_linux_web_app", "compute", "azure.compute.AppServices"),
+    ("azurerm_windows_web_app", "compute", "azure.compute.AppServices"),
+    ("azurerm_service_plan", "compute", "azure.web.AppServicePlans"),
+    ("azurerm_function_app", "compute", "azure.compute.FunctionApps"),
+    ("azurerm_linux_function_app", "compute", "azure.compute.FunctionApps"),
+    ("azurerm_windows_function_app", "compute", "azure.compute.FunctionApps"),
+    ("azurerm_batch_", "compute", "azure.compute.BatchAccounts"),
+    ("azurerm_servicebus_", "compute", "azure.integration.ServiceBus"),
+    ("azurerm_eventgrid_", "compute", "azure.integration.EventGridTopics"),
+    ("azurerm_eventhub", "compute", "azure.analytics.EventHubs"),
+    ("azurerm_logic_app_", "compute", "azure.integration.LogicApps"),
+    ("azurerm_mssql_", "database", "azure.database.SQLDatabases"),
+    ("azurerm_sql_", "database", "azure.database.SQLDatabases"),
+    ("azurerm_cosmosdb_", "database", "azure.database.CosmosDb"),
+    ("azurerm_postgresql_", "database", "azure.database.DatabaseForPostgresqlServers"),
+    ("azurerm_mysql_", "database", "azure.database.DatabaseForMysqlServers"),
+    ("azurerm_mariadb_", "database", "azure.database.DatabaseForMariadbServers"),
+    ("azurerm_redis_", "cache", "azure.database.CacheForRedis"),
+    ("azurerm_storage_", "storage", "azure.storage.StorageAccounts"),
+    ("azurerm_storage_blob", "storage", "azure.storage.BlobStorage"),
+    ("azurerm_storage_container", "storage", "azure.storage.BlobStorage"),
+    ("azurerm_storage_share", "storage", "azure.storage.AzureFileshares"),
+    ("azurerm_storage_queue", "storage", "azure.storage.QueuesStorage"),
+    ("azurerm_storage_table", "storage", "azure.storage.TableStorage"),
+    ("azurerm_storage_data_lake_", "storage", "azure.storage.DataLakeStorage"),
+    ("azurerm_managed_disk", "storage", "azure.compute.Disks"),
+    ("azurerm_recovery_services_vault", "storage", "azure.storage.RecoveryServicesVaults"),
+    ("azurerm_netapp_", "storage", "azure.storage.NetappFiles"),
+    ("azurerm_user_assigned_identity", "security", "azure.identity.ManagedIdentities"),
+    ("azurerm_role_", "security", "azure.identity.ManagedIdentities"),
+    ("azurerm_key_vault", "security", "azure.security.KeyVaults"),
+    ("azurerm_network_security_", "security", "azure.network.VirtualNetworks"),
+    ("azurerm_application_security_group", "security", "azure.network.ApplicationSecurityGroups"),
+    ("azurerm_firewall", "security", "azure.network.Firewall"),
+    ("azurerm_web_application_firewall_", "security", "azure.network.Firewall"),
+    ("azurerm_security_center_", "security", "azure.security.SecurityCenter"),
+    ("azurerm_sentinel_", "security", "azure.security.Sentinel"),
+    ("azuread_", "security", "azure.identity.ActiveDirectory"),
+    # GCP
+    ("google_dns_", "dns", "gcp.network.DNS"),
+    ("google_compute_backend_bucket", "cdn", "gcp.network.CDN"),
+    ("google_compute_network", "network", "gcp.network.VPC"),
+    ("google_compute_shared_vpc_", "network", "gcp.network.VPC"),
+    ("google_vpc_access_", "network", "gcp.network.VPC"),
+    ("google_compute_subnetwork", "network", "gcp.network.VPC"),
+    ("google_compute_router", "network", "gcp.network.Router"),
+    ("google_compute_router_nat", "network", "gcp.network.NAT"),
+    ("google_compute_route", "network", "gcp.network.Routes"),
+    ("google_compute_address", "network", "gcp.network.ExternalIpAddresses"),
+    ("google_compute_global_address", "network", "gcp.network.ExternalIpAddresses"),
+    ("google_compute_vpn_", "network", "gcp.network.VPN"),
+    ("google_compute_ha_vpn_gateway", "network", "gcp.network.VPN"),
+    ("google_compute_interconnect_", "network", "gcp.network.DedicatedInterconnect"),
+    ("google_compute_forwarding_rule", "load_balancer", "gcp.network.LoadBalancing"),
+    ("google_compute_global_forwarding_rule", "load_balancer", "gcp.network.LoadBalancing"),
+    ("google_compute_backend_service", "load_balancer", "gcp.network.LoadBalancing"),
+    ("google_compute_region_backend_service", "load_balancer", "gcp.network.LoadBalancing"),
+    ("google_compute_url_map", "load_balancer", "gcp.network.LoadBalancing"),
+    ("google_compute_target_", "load_balancer", "gcp.network.LoadBalancing"),
+    ("google_compute_health_check", "load_balancer", "gcp.network.LoadBalancing"),
+    ("google_api_gateway_", "load_balancer", "gcp.api.APIGateway"),
+    ("google_compute_instance", "compute", "gcp.compute.ComputeEngine"),
+    ("google_compute_region_instance_", "compute", "gcp.compute.ComputeEngine"),
+    ("google_compute_autoscaler", "compute", "gcp.compute.ComputeEngine"),
+    ("google_container_", "compute", "gcp.compute.GKE"),
+    ("google_app_engine_", "compute", "gcp.compute.AppEngine"),
+    ("google_cloudfunctions", "compute", "gcp.compute.Functions"),
+    ("google_cloud_run_", "compute", "gcp.compute.Run"),
+    ("google_pubsub_", "compute", "gcp.analytics.PubSub"),
+    ("google_cloud_tasks_", "compute", "gcp.devtools.Tasks"),
+    ("google_cloud_scheduler_", "compute", "gcp.devtools.Scheduler"),
+    ("google_artifact_registry_", "compute", "gcp.devtools.GCR"),
+    ("google_sql_", "database", "gcp.database.SQL"),
+    ("google_spanner_", "database", "gcp.database.Spanner"),
+    ("google_bigtable_", "database", "gcp.database.Bigtable"),
+    ("google_firestore_", "database", "gcp.database.Firestore"),
+    ("google_datastore_", "database", "gcp.database.Datastore"),
+    ("google_bigquery_", "database", "gcp.analytics.BigQuery"),
+    ("google_redis_", "cache", "gcp.database.Memorystore"),
+    ("google_memcache_", "cache", "gcp.database.Memorystore"),
+    ("google_storage_", "storage", "gcp.storage.GCS"),
+    ("google_compute_disk", "storage", "gcp.storage.PersistentDisk"),
+    ("google_compute_region_disk", "storage", "gcp.storage.PersistentDisk"),
+    ("google_compute_snapshot", "storage", "gcp.storage.PersistentDisk"),
+    ("google_filestore_", "storage", "gcp.storage.Filestore"),
+    ("google_project_iam_", "security", "gcp.security.Iam"),
+    ("google_organization_iam_", "security", "gcp.security.Iam"),
+    ("google_folder_iam_", "security", "gcp.security.Iam"),
+    ("google_service_account", "security", "gcp.security.Iam"),
+    ("google_kms_", "security", "gcp.security.KMS"),
+    ("google_secret_manager_", "security", "gcp.security.SecretManager"),
+    ("google_compute_firewall", "security", "gcp.network.FirewallRules"),
+    ("google_compute_security_policy", "security", "gcp.network.Armor"),
+    ("google_iap_", "security", "gcp.security.IAP"),
+)
+
+# Generic icon per provider for types no rule knows; anything else gets a rack
+PROVIDER_FALLBACKS: Tuple[Tuple[str, str], ...] = (
+    ("aws_", "aws.general.General"),
+    ("azurerm_", "azure.general.Allresources"),
+    ("azuread_", "azure.general.Allresources"),
+    ("google_", "gcp.management.Project"),
+)
+GENERIC_ICON = "generic.compute.Rack"
+
+
+def _compile(rules: Tuple[Tuple[str, ...], ...]) -> "re.Pattern[str]":
+    """One alternation of all prefixes, longest first, so the first match is the longest."""
+    prefixes = sorted({rule[0] for rule in rules}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(prefix) for prefix in prefixes))
+
+
+_PREFIX_RE = _compile(PREFIX_RULES)
+_PREFIXES: Dict[str, Tuple[str, str]] = {
+    prefix: (layer, icon) for prefix, layer, icon in PREFIX_RULES
+}
+_PROVIDER_RE = _compile(PROVIDER_FALLBACKS)
+_PROVIDERS = dict(PROVIDER_FALLBACKS)
+
+
+@lru_cache(maxsize=None)
+def icon_class(spec: str) -> Any:
+    """Import the Diagrams node class named by an icon spec, e.g. "aws.compute.EC2"."""
+    module, _, name = spec.rpartition(".")
+    return getattr(importlib.import_module(f"diagrams.{module}"), name)
+
+
+def _network_group(resource_type: str) -> Optional[str]:
+    """Sub-cluster of a network resource: its VPC, a subnet group, or a gateway."""
+    if "vpc" in resource_type or "virtual_network" in resource_type:
+        return "vpc"
+    if "subnet" in resource_type:
+        return "subnet"
+    if "gateway" in resource_type:
+        return "gateway"
+    return None
+
+
+def _match_rules(resource_type: str) -> Tuple[str, str]:
+    """(layer, icon spec) from the prefix rules or the provider fallbacks."""
+    match = _PREFIX_RE.match(resource_type)
+    if match is not None:
+        return _PREFIXES[match.group(0)]
+    match = _PROVIDER_RE.match(resource_type)
+    return DEFAULT_LAYER, _PROVIDERS[match.group(0)] if match is not None else GENERIC_ICON
+
+
+def _build_exact() -> Dict[str, Tuple[str, str]]:
+    exact = {}
+    for resource_type in ICON_SPECS.keys() | LAYER_MAPPING.keys():
+        layer, icon = _match_rules(resource_type)
+        exact[resource_type] = (
+            LAYER_MAPPING.get(resource_type, layer),
+            ICON_SPECS.get(resource_type, icon),
+        )
+    return exact
+
+
+_EXACT: Dict[str, Tuple[str, str]] = _build_exact()
+
+# Resolved classifications, filled as types are seen
+_INDEX: Dict[str, Classification] = {}
+
+
+def classify(resource_type: str) -> Classification:
+    """
+    Classify a Terraform resource type.
+
+    Args:
+        resource_type: Terraform type, e.g. "aws_lambda_function"
+
+    Returns:
+        The type's (layer, group, icon) Classification
+    """
+    classification = _INDEX.get(resource_type)
+    if classification is None:
+        layer, icon = _EXACT.get(resource_type) or _match_rules(resource_type)
+        group = _network_group(resource_type) if layer == "network" else None
+        classification = _INDEX[resource_type] = Classification(layer, group, icon)
+    return classification
+
+
+def __getattr__(name: str) -> Any:
+    # ICON_MAPPING (type -> Diagrams class) imports every mapped icon module,
+    # so it is only built when someone asks for it
+    if name == "ICON_MAPPING":
+        mapping = {rtype: icon_class(spec) for rtype, spec in ICON_SPECS.items()}
+        globals()["ICON_MAPPING"] = mapping
+        return mapping
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
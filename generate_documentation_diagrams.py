@@ -3,73 +3,62 @@
 Generate example diagrams for documentation purposes.
 This script creates diagrams from the example Terraform plans
 and saves them to the examples/diagrams/ directory.
+
+All diagrams are rendered concurrently by the batch export. Diagrams whose
+plans have not changed since the last run (per examples/diagrams/manifest.json)
+are skipped, and unchanged files are never rewritten.
 """
 
-import asyncio
 import json
 import os
-from pathlib import Path
-
-from fastmcp import Client
-from cloud_diagram_mcp.server import mcp
 
+from cloud_diagram_mcp.server import export_batch
 
-async def generate_diagram(plan_file: str, output_name: str):
-    """Generate a diagram from a Terraform plan file."""
-    print(f"\nGenerating diagram for {plan_file}...")
-    
-    with open(plan_file) as f:
-        plan = json.load(f)
-    
-    async with Client(mcp) as client:
-        result = await client.call_tool(
-            "visualize_tf_diff", 
-            {"plan": json.dumps(plan)}
-        )
-        
-        # The SVG is embedded in the response
-        for item in result.content:
-            data = json.loads(item.text)
-            if "_server_svg" in data:
-                svg_content = data["_server_svg"]
-                
-                # Save SVG to examples/diagrams directory
-                output_dir = Path("examples/diagrams")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                
-                output_file = output_dir / f"{output_name}.svg"
-                with open(output_file, "w") as f:
-                    f.write(svg_content)
-                
-                print(f"  Saved to {output_file}")
-                print(f"  Size: {len(svg_content) // 1024} KB")
-                return True
-    
-    return False
+OUTPUT_DIR = "examples/diagrams"
 
 
-async def main():
+def main():
     """Generate all example diagrams."""
     examples = [
         ("examples/sample-plan.json", "sample-aws"),
         ("examples/azure-plan.json", "azure"),
         ("examples/complex-aws-plan.json", "complex-aws"),
     ]
-    
+
     print("=" * 60)
     print("Generating Documentation Diagrams")
     print("=" * 60)
-    
+
+    items = []
     for plan_file, output_name in examples:
         if os.path.exists(plan_file):
-            await generate_diagram(plan_file, output_name)
+            items.append({"plan_file": plan_file, "output_path": f"{OUTPUT_DIR}/{output_name}.svg"})
         else:
             print(f"\nSkipping {plan_file} (not found)")
-    
+
+    summary = json.loads(
+        export_batch(json.dumps(items), manifest_path=f"{OUTPUT_DIR}/manifest.json")
+    )
+    if "error" in summary:
+        raise SystemExit(summary["error"])
+
+    for item in summary["items"]:
+        line = f"  {item['status']:<9} {os.path.relpath(item['output'])}"
+        if "bytes" in item:
+            line += f"  {item['bytes'] // 1024} KB"
+        if "render_ms" in item:
+            line += f"  {item['render_ms']:.0f} ms"
+        if "error" in item:
+            line += f"  {item['error']}"
+        print(line)
+
     print("\n" + "=" * 60)
-    print("Done! Diagrams saved to examples/diagrams/")
+    print(
+        f"Done in {summary['total_ms'] / 1000:.1f}s: {summary['written']} written, "
+        f"{summary['unchanged'] + summary['skipped']} unchanged, {summary['failed']} failed"
+    )
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
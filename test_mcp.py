@@ -3,12 +3,25 @@
 import asyncio
 import json
 import os
+import tempfile
 import time
 
 from fastmcp import Client
 from cloud_diagram_mcp.server import mcp
 
 
+def graphviz_available(what):
+    """Whether `dot` is installed; skips `what` without it, unless CI requires Graphviz."""
+    import shutil
+
+    if shutil.which("dot") is not None:
+        return True
+    # Set in CI, which installs Graphviz, so these tests cannot pass by skipping
+    assert os.environ.get("CLOUD_DIAGRAM_TEST_GRAPHVIZ") != "1", f"{what} needs Graphviz (dot)"
+    print(f"  Skipping {what}: Graphviz (dot) is not installed", flush=True)
+    return False
+
+
 async def test_visualize_tf_diff():
     """Test the visualize_tf_diff tool with sample plans."""
     for plan_file in ["examples/sample-plan.json", "examples/complex-aws-plan.json"]:
@@ -103,10 +116,1251 @@ async def test_export_architecture_svg():
                 print(f"  Has edges: {has_edges}", flush=True)
 
 
+async def test_render_cache():
+    """Test the layout-keyed render cache and its on-disk tier."""
+    from cloud_diagram_mcp.render_cache import RenderCache, plan_layout_key
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing render cache", flush=True)
+
+    with open("examples/sample-plan.json") as f:
+        plan = json.load(f)
+
+    # Attribute values do not affect layout, so they must not change the key
+    key = plan_layout_key(plan)
+    edited = json.loads(json.dumps(plan))
+    edited["resource_changes"][0]["change"]["after"] = {"tags": {"edited": "yes"}}
+    assert plan_layout_key(edited) == key, "attribute edit changed the layout key"
+    edited["resource_changes"][0]["change"]["actions"] = ["delete"]
+    assert plan_layout_key(edited) != key, "action change kept the layout key"
+
+    # Cached SVGs are minified, so the minify settings are part of the key
+    for name, value in (("CLOUD_DIAGRAM_SVG_PRECISION", "3"), ("CLOUD_DIAGRAM_SVG_MINIFY", "0")):
+        saved = os.environ.get(name)
+        os.environ[name] = value
+        try:
+            assert plan_layout_key(plan) != key, f"{name}={value} kept the layout key"
+        finally:
+            if saved is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = saved
+    assert plan_layout_key(plan) == key
+
+    with tempfile.TemporaryDirectory() as disk_dir:
+        cache = RenderCache(max_entries=2, disk_dir=disk_dir)
+        assert cache.get(key) is None
+        cache.put(key, "<svg/>")
+        assert cache.get(key) == "<svg/>"
+
+        # A fresh cache over the same directory survives a "restart"
+        restarted = RenderCache(max_entries=2, disk_dir=disk_dir)
+        assert restarted.get(key) == "<svg/>"
+        stats = restarted.stats()
+        print(f"  Stats after restart: {stats}", flush=True)
+        assert stats["disk_hits"] == 1
+
+    # The in-memory tier is bounded
+    cache = RenderCache(max_entries=2)
+    for i in range(3):
+        cache.put(f"k{i}", "<svg/>")
+    assert cache.get("k0") is None
+    print(f"  Stats after eviction: {cache.stats()}", flush=True)
+
+
+async def test_render_pool():
+    """Test that the render pool renders off-process and replaces hung workers."""
+    from cloud_diagram_mcp.render_cache import plan_layout_subset
+    from cloud_diagram_mcp.render_pool import RenderPool, RenderTimeout
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing render pool", flush=True)
+
+    with open("examples/sample-plan.json") as f:
+        layout = plan_layout_subset(json.load(f))
+
+    pool = RenderPool(2, timeout=60)
+    try:
+        start = time.time()
+        svg = pool.render("plan", layout)
+        print(f"  First render in {time.time() - start:.1f}s", flush=True)
+        assert "<svg" in svg
+
+        # A plan large enough that even the layered engine needs well over 1 ms
+        large = {
+            "resource_changes": [
+                {
+                    "address": f"aws_instance.slow_{i}",
+                    "type": "aws_instance",
+                    "name": f"slow_{i}",
+                    "change": {"actions": ["create"]},
+                }
+                for i in range(2000)
+            ]
+        }
+        try:
+            pool.render("plan", large, timeout=0.001)
+            raise AssertionError("expected the job to time out")
+        except RenderTimeout:
+            pass
+        stats = pool.stats()
+        print(f"  Stats after timeout: {stats}", flush=True)
+        assert stats["restarts"] == 1
+
+        # The replacement worker keeps serving jobs
+        assert "<svg" in pool.render("plan", layout)
+    finally:
+        pool.shutdown()
+
+    # A timed-out worker is killed together with the `dot` it is waiting on
+    if hasattr(os, "killpg") and os.path.isdir("/proc"):
+        with tempfile.TemporaryDirectory() as bin_dir:
+            pid_file = os.path.join(bin_dir, "dot.pid")
+            with open(os.path.join(bin_dir, "dot"), "w") as f:
+                f.write(
+                    "#!/bin/sh\n"
+                    'case "$(cat)" in *orphan_probe*) ;; *) exit 1 ;; esac\n'
+                    f"echo $$ > {pid_file}\n"
+                    "exec sleep 60\n"
+                )
+            os.chmod(os.path.join(bin_dir, "dot"), 0o755)
+            path = os.environ["PATH"]
+            os.environ["PATH"] = bin_dir + os.pathsep + path
+            try:
+                pool = RenderPool(1, timeout=5)
+            finally:
+                os.environ["PATH"] = path
+            try:
+                probe = {
+                    "resource_changes": [dict(large["resource_changes"][0], name="orphan_probe")]
+                }
+                try:
+                    pool.render("plan", probe, {"engine": "graphviz"})
+                    raise AssertionError("expected the job to time out")
+                except RenderTimeout:
+                    pass
+                with open(pid_file) as f:
+                    pid = f.read().strip()
+                deadline = time.time() + 5
+                while time.time() < deadline:
+                    try:
+                        with open(f"/proc/{pid}/stat") as f:
+                            alive = f.read().rsplit(")", 1)[1].split()[0] != "Z"
+                    except OSError:
+                        alive = False
+                    if not alive:
+                        break
+                    time.sleep(0.1)
+                assert not alive, f"dot ({pid}) outlived its worker"
+                print("  Hung dot killed with its worker", flush=True)
+            finally:
+                pool.shutdown()
+
+
+async def test_plan_ingest():
+    """Test that streaming ingestion feeds the same layout data as json.loads."""
+    from cloud_diagram_mcp.plan_ingest import ingest_plan_file, ingest_plan_text
+    from cloud_diagram_mcp.render_cache import plan_layout_subset
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing streaming plan ingestion", flush=True)
+
+    for plan_file in [
+        "examples/sample-plan.json",
+        "examples/complex-aws-plan.json",
+        "examples/azure-plan.json",
+    ]:
+        with open(plan_file) as f:
+            text = f.read()
+        expected = plan_layout_subset(json.loads(text))
+        assert plan_layout_subset(ingest_plan_text(text)) == expected, plan_file
+        assert plan_layout_subset(ingest_plan_file(plan_file)) == expected, plan_file
+        print(f"  {plan_file}: {len(expected['resource_changes'])} resources match", flush=True)
+
+    # Truncated documents (e.g. a plan still being written) must fail fast,
+    # not backtrack in the bracket scanner
+    with open("examples/complex-aws-plan.json") as f:
+        text = f.read()
+    for truncated in (
+        '{"prior_state": {"a": ' + ", ".join(["1"] * 20000),
+        '{"prior_state": {"a": "' + "x" * 20000,
+        text[: len(text) * 3 // 5],
+    ):
+        start = time.perf_counter()
+        # Text and bytes (as from a memory-mapped file) take different paths
+        for document in (truncated, truncated.encode()):
+            try:
+                ingest_plan_text(document)
+            except json.JSONDecodeError:
+                pass
+            else:
+                raise AssertionError("truncated plan was accepted")
+        assert time.perf_counter() - start < 1.0, "truncated plan took too long to fail"
+
+
+async def test_lean_output():
+    """Test that lean mode keeps the UI fields and shrinks the result."""
+    plan_file = "examples/complex-aws-plan.json"
+    with open(plan_file) as f:
+        plan = f.read()
+    print(f"\n{'='*60}", flush=True)
+    print(f"Testing visualize_tf_diff lean mode with {plan_file}", flush=True)
+
+    async with Client(mcp) as client:
+        full = await client.call_tool("visualize_tf_diff", {"plan": plan})
+        lean = await client.call_tool("visualize_tf_diff", {"plan": plan, "lean": True})
+
+    full_data = json.loads(full.content[0].text)
+    lean_data = json.loads(lean.content[0].text)
+    print(f"  Lean stats: {lean_data['_lean']}", flush=True)
+    assert "configuration" not in lean_data and "planned_values" not in lean_data
+    assert len(lean_data["resource_changes"]) == len(full_data["resource_changes"])
+    assert lean_data["_lean"]["bytes_saved"] > 0
+    for rc in lean_data["resource_changes"]:
+        if rc["change"]["actions"] == ["no-op"]:
+            assert rc["change"]["before"] is None and rc["change"]["after"] is None
+
+
+async def test_focus_mode():
+    """Test that focus mode renders only the neighbourhood of the focused resources."""
+    from cloud_diagram_mcp.dependencies import resolve_dependencies
+
+    plan_file = "examples/complex-aws-plan.json"
+    with open(plan_file) as f:
+        plan = f.read()
+    print(f"\n{'='*60}", flush=True)
+    print(f"Testing visualize_tf_diff focus mode with {plan_file}", flush=True)
+    deps = resolve_dependencies(json.loads(plan))
+    neighbours = {"aws_vpc.main"} | {a for a, d in deps.items() if "aws_vpc.main" in d}
+
+    async with Client(mcp) as client:
+        result = await client.call_tool(
+            "visualize_tf_diff",
+            {"plan": plan, "focus": ["aws_vpc.main"], "hops": 1, "layout_engine": "layered"},
+        )
+        data = json.loads(result.content[0].text)
+        focus = data["_focus"]
+        print(f"  Focus: kept {focus['kept']} of {focus['resources']}", flush=True)
+        assert {rc["address"] for rc in data["resource_changes"]} == neighbours
+        assert "configuration" not in data and "_server_svg" in data
+        omitted = sum(stub["count"] for stub in focus["stubs"].values())
+        assert focus["kept"] + omitted == focus["resources"]
+        assert all(dep in neighbours for deps in data["_dependencies"].values() for dep in deps)
+
+        result = await client.call_tool(
+            "visualize_tf_diff",
+            {"plan": plan, "changes_only": True, "hops": 0, "layout_engine": "layered"},
+        )
+        data = json.loads(result.content[0].text)
+        assert all(rc["change"]["actions"] != ["no-op"] for rc in data["resource_changes"])
+        assert data["_focus"]["kept"] == data["_focus"]["seeds"] == 15
+
+        result = await client.call_tool(
+            "visualize_tf_diff", {"plan": plan, "focus": ["aws_nothing.here"]}
+        )
+        assert "error" in json.loads(result.content[0].text)
+
+
+async def test_plan_store():
+    """Test upload-once plan handles and per-resource detail fetch."""
+    plan_file = "examples/complex-aws-plan.json"
+    with open(plan_file) as f:
+        plan = f.read()
+    print(f"\n{'='*60}", flush=True)
+    print(f"Testing plan store with {plan_file}", flush=True)
+
+    async with Client(mcp) as client:
+        result = await client.call_tool("upload_plan", {"plan": plan})
+        upload = json.loads(result.content[0].text)
+        print(f"  Upload: {upload}", flush=True)
+        handle = upload["plan_handle"]
+
+        result = await client.call_tool("visualize_tf_diff", {"plan_handle": handle})
+        data = json.loads(result.content[0].text)
+        assert data["_plan_handle"] == handle
+        assert len(data["resource_changes"]) == upload["resources"]
+        print(f"  Result size via handle: {len(result.content[0].text) // 1024} KB", flush=True)
+
+        address = data["resource_changes"][0]["address"]
+        result = await client.call_tool(
+            "get_resource_detail", {"plan_handle": handle, "address": address}
+        )
+        detail = json.loads(result.content[0].text)
+        assert detail["address"] == address and "after" in detail["change"]
+        print(f"  Detail for {address}: {len(result.content[0].text)} bytes", flush=True)
+
+    # Concurrent uploads of one plan store it, and count its bytes, once
+    from concurrent.futures import ThreadPoolExecutor
+
+    from cloud_diagram_mcp.plan_store import PlanStore
+
+    # Large enough that the uploads' scans overlap
+    data = json.loads(plan)
+    data["resource_changes"] = [
+        dict(rc, address=f"{rc['address']}_{i}")
+        for i in range(40)
+        for rc in data["resource_changes"]
+    ]
+    large = json.dumps(data)
+    store = PlanStore()
+    with ThreadPoolExecutor(8) as pool:
+        handles = set(pool.map(lambda _: store.put(large).handle, range(8)))
+    assert len(handles) == 1
+    assert store.stats() == {"plans": 1, "bytes": len(large.encode("utf-8"))}
+
+    # Sizes are UTF-8 bytes, and details still decode past non-ASCII text
+    data = json.loads(plan)
+    data["resource_changes"][0]["change"]["after"] = {"tags": {"Name": "café ☕ 東京"}}
+    text = json.dumps(data, ensure_ascii=False)
+    stored = PlanStore().put(text)
+    assert stored.size == len(text.encode("utf-8")) > len(text)
+    for rc in data["resource_changes"]:
+        assert stored.resource_detail(rc["address"]) == rc, rc["address"]
+
+
+async def test_layout_memory():
+    """Test recovering node positions from an SVG and seeding the next render."""
+    from cloud_diagram_mcp.layout_memory import positions_from_svg, seed_positions
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing layout memory", flush=True)
+    svg = (
+        '<svg><defs><image id="cdm-icon-0" width="64px" height="64px"/></defs>'
+        '<g id="node1" class="node"><title>aws_vpc.main</title>'
+        '<image xlink:href="vpc.png" width="64px" height="64px" x="10" y="-100"/></g>'
+        '<g id="node2" class="node"><title>aws_subnet.a</title>'
+        '<use xlink:href="#cdm-icon-0" x="110" y="-200"/></g></svg>'
+    )
+    positions = positions_from_svg(svg)
+    assert positions == {"aws_vpc.main": (42.0, 68.0), "aws_subnet.a": (142.0, 168.0)}
+    seed = seed_positions(positions, ["aws_vpc.main", "aws_subnet.a", "aws_subnet.b"])
+    assert seed == positions
+    assert seed_positions(positions, ["aws_vpc.main", "x.a", "x.b", "x.c"]) is None
+    print(f"  Positions: {positions}", flush=True)
+
+    # Graphviz nodes carry their box: its centre, not the icon's, is the node position
+    svg = (
+        '<svg><g id="graph0" class="graph" transform="translate(4 296)">'
+        '<g id="node1" class="node"><title>aws_instance.web[0]</title>'
+        '<polygon fill="none" stroke="transparent" points="181.64,-276.36 73.64,-276.36 '
+        '73.64,-139.56 181.64,-139.56 181.64,-276.36"/>'
+        '<image xlink:href="ec2.png" width="96px" height="96px" x="79.64" y="-270.36"/>'
+        "</g></g></svg>"
+    )
+    assert positions_from_svg(svg) == {"aws_instance.web[0]": (127.64, 207.96)}
+
+    # Seeded layouts keep remembered nodes in place and give new ones free slots
+    from cloud_diagram_mcp.graphviz_layout import _NODE_W, _seed_layout, build_dot
+
+    pinned = {"aws_vpc.main": (200.0, 500.0), "aws_subnet.a": (100.0, 250.0)}
+    network = {
+        "label": "Network",
+        "children": [
+            {"address": a, "type": t, "name": a, "action": "no-op", "pos": pinned.get(a)}
+            for a, t in (
+                ("aws_vpc.main", "aws_vpc"),
+                ("aws_subnet.a", "aws_subnet"),
+                ("aws_subnet.b", "aws_subnet"),
+            )
+        ],
+    }
+    compute = {
+        "label": "Compute",
+        "children": [
+            {"address": "aws_instance.web", "type": "aws_instance", "name": "web", "pos": None}
+        ],
+    }
+    edges = [
+        ("aws_subnet.a", "aws_vpc.main", "no-op", None),
+        ("aws_subnet.b", "aws_vpc.main", "create", None),
+        ("aws_instance.web", "aws_subnet.b", "create", None),
+    ]
+    boxes = _seed_layout([network, compute], edges)
+    placed = {item["address"]: item["pos"] for c in (network, compute) for item in c["children"]}
+    assert {a: placed[a] for a in pinned} == pinned
+    points = list(placed.values())
+    for i, (x0, y0) in enumerate(points):
+        for x1, y1 in points[i + 1 :]:
+            assert abs(x0 - x1) >= _NODE_W or abs(y0 - y1) >= 136.8, placed
+    for cluster in (network, compute):
+        bx0, by0, bx1, by1 = boxes[id(cluster)]
+        for item in cluster["children"]:
+            assert bx0 < item["pos"][0] < bx1 and by0 < item["pos"][1] < by1
+    source = build_dot("Terraform Plan", [network, compute], edges, seeded=True).source
+    assert "bb=" in source and 'pos="100,250!"' in source
+    print(f"  Seeded positions: {placed}", flush=True)
+
+    if not graphviz_available("the Graphviz round trip"):
+        return
+    from cloud_diagram_mcp.server import _render_plan_svg
+
+    with open("examples/complex-aws-plan.json") as f:
+        plan = json.load(f)
+    workspace = f"layout-memory-test-{os.getpid()}"
+    first = positions_from_svg(_render_plan_svg(plan, workspace, "graphviz"))
+    # Renders are cached by layout; drop one resource so the seeded path runs
+    smaller = dict(plan, resource_changes=plan["resource_changes"][:-1])
+    second = positions_from_svg(_render_plan_svg(smaller, workspace, "graphviz"))
+    third = positions_from_svg(_render_plan_svg(plan, workspace, "graphviz"))
+    for address, position in second.items():
+        assert position == first[address], (address, position, first[address])
+        assert third[address] == position, (address, third[address], position)
+    print(f"  {len(second)} positions stable across seeded Graphviz renders", flush=True)
+
+
+async def test_seeded_graphviz():
+    """Test that a seeded Graphviz render keeps every remembered node exactly in place."""
+    from cloud_diagram_mcp.graphviz_layout import _NODE_H, _NODE_W
+    from cloud_diagram_mcp.layout_memory import _NODE_RE, positions_from_svg
+    from cloud_diagram_mcp.visualizer_hierarchical import generate_svg
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing seeded Graphviz layout", flush=True)
+    if not graphviz_available("the seeded Graphviz render"):
+        return
+
+    with open("examples/sample-plan.json") as f:
+        plan = json.load(f)
+    first = positions_from_svg(generate_svg(plan, engine="graphviz"))
+    assert len(first) == len(plan["resource_changes"]), first
+
+    # Every remembered node is pinned; the forgotten one gets a free slot
+    new = plan["resource_changes"][-1]["address"]
+    seeds = {address: pos for address, pos in first.items() if address != new}
+    svg = generate_svg(plan, positions=seeds, engine="graphviz")
+    second = positions_from_svg(svg)
+    for address, position in seeds.items():
+        assert second[address] == position, (address, second[address], position)
+    x, y = second[new]
+    for address, (x1, y1) in seeds.items():
+        assert abs(x - x1) >= _NODE_W or abs(y - y1) >= _NODE_H, (new, address)
+
+    # Nodes carry their invisible box, and neato -n2 still routes the edges
+    nodes = _NODE_RE.findall(svg)
+    assert len(nodes) == len(first)
+    for title, body in nodes:
+        assert 'stroke="transparent"' in body, title
+    assert 'class="edge"' in svg and "<path" in svg
+    print(f"  {len(seeds)} pinned nodes kept, {new} placed at {second[new]}", flush=True)
+
+
+async def test_layered_layout():
+    """Test the built-in layered layout engine, which runs without Graphviz."""
+    import shutil
+
+    from cloud_diagram_mcp.visualizer_hierarchical import resolve_layout_engine
+
+    plan_file = "examples/complex-aws-plan.json"
+    with open(plan_file) as f:
+        plan = f.read()
+    print(f"\n{'='*60}", flush=True)
+    print(f"Testing layered layout engine with {plan_file}", flush=True)
+
+    async with Client(mcp) as client:
+        start = time.perf_counter()
+        result = await client.call_tool(
+            "visualize_tf_diff", {"plan": plan, "layout_engine": "layered"}
+        )
+        elapsed = time.perf_counter() - start
+        data = json.loads(result.content[0].text)
+        svg = data["_server_svg"]
+        assert svg.count('class="node"') == len(data["resource_changes"])
+        assert 'class="edge"' in svg and "data:image/png;base64," in svg
+        print(f"  Rendered {len(data['resource_changes'])} nodes in {elapsed:.2f}s", flush=True)
+
+        result = await client.call_tool(
+            "visualize_tf_diff", {"plan": plan, "layout_engine": "circo"}
+        )
+        assert "error" in json.loads(result.content[0].text)
+
+        # Without Graphviz only the default falls back; an explicit request is an error
+        if shutil.which("dot") is None:
+            result = await client.call_tool(
+                "visualize_tf_diff", {"plan": plan, "layout_engine": "graphviz"}
+            )
+            assert "not installed" in json.loads(result.content[0].text)["error"]
+            assert resolve_layout_engine() == "layered"
+
+
+async def test_no_temp_files():
+    """Test that repeated Graphviz renders leave nothing behind in the temp directory."""
+    from cloud_diagram_mcp.visualizer_hierarchical import generate_svg, resolve_layout_engine
+
+    plan_file = "examples/complex-aws-plan.json"
+    with open(plan_file) as f:
+        plan = json.load(f)
+    print(f"\n{'='*60}", flush=True)
+    print("Testing temp directory after Graphviz renders", flush=True)
+    # Graphviz renders need dot; the layered engine never touches the
+    # filesystem, so the dot.pipe path cannot be tested without it
+    if not graphviz_available("the temp directory check"):
+        return
+    assert resolve_layout_engine("graphviz") == "graphviz"
+
+    saved_tempdir = tempfile.tempdir
+    with tempfile.TemporaryDirectory() as scratch:
+        tempfile.tempdir = scratch
+        try:
+            for _ in range(5):
+                assert 'class="node"' in generate_svg(plan, engine="graphviz")
+            leftovers = os.listdir(scratch)
+        finally:
+            tempfile.tempdir = saved_tempdir
+    assert leftovers == [], leftovers
+    print("  5 renders, no temp files left", flush=True)
+
+
+async def test_level_of_detail():
+    """Test collapsing count/for_each instances and modules into aggregate nodes."""
+    resource_changes = [
+        {
+            "address": f'module.app["{env}"].aws_instance.web[{i}]',
+            "type": "aws_instance",
+            "name": "web",
+            "change": {"actions": ["create"] if i < 3 else ["no-op"]},
+        }
+        for env in ("blue", "green")
+        for i in range(50)
+    ]
+    resource_changes.append(
+        {"address": "aws_vpc.main", "type": "aws_vpc", "name": "main", "change": {"actions": []}}
+    )
+    plan = {"resource_changes": resource_changes, "configuration": {"root_module": {}}}
+    print(f"\n{'='*60}", flush=True)
+    print(f"Testing level of detail with {len(resource_changes)} resources", flush=True)
+
+    async with Client(mcp) as client:
+        result = await client.call_tool(
+            "visualize_tf_diff", {"plan": json.dumps(plan), "max_nodes": 20}
+        )
+        data = json.loads(result.content[0].text)
+        lod = data["_lod"]
+        assert lod["nodes"] == 2 and len(data["resource_changes"]) == len(resource_changes)
+        web = lod["aggregates"]["module.app.aws_instance.web"]
+        assert web == {"count": 100, "actions": {"create": 6, "no-op": 94}}
+        assert data["_server_svg"].count('class="node"') == 2
+        print(f"  Collapsed to {lod['nodes']} nodes: {web}", flush=True)
+
+        result = await client.call_tool(
+            "visualize_tf_diff", {"plan": json.dumps(plan), "module_depth": 0}
+        )
+        lod = json.loads(result.content[0].text)["_lod"]
+        assert lod["aggregates"]["module.app"]["count"] == 100
+
+
+async def test_dependency_extraction():
+    """Test edges from nested module_calls, expression references and indexed addresses."""
+    from cloud_diagram_mcp.dependencies import resolve_dependencies
+    from cloud_diagram_mcp.plan_ingest import ingest_plan_text
+
+    addresses = [
+        "aws_vpc.main",
+        "aws_subnet.private[0]",
+        "aws_subnet.private[1]",
+        "aws_instance.web[0]",
+        'module.app["a"].aws_lb.front',
+        'module.app["a"].module.db.aws_db_instance.main',
+    ]
+    configuration = {
+        "root_module": {
+            "resources": [
+                {
+                    "address": "aws_subnet.private",
+                    "expressions": {"vpc_id": {"references": ["aws_vpc.main.id", "aws_vpc.main"]}},
+                },
+                {
+                    "address": "aws_instance.web",
+                    "depends_on": ["aws_vpc.main"],
+                    "expressions": {
+                        "subnet_id": {
+                            "references": [
+                                "aws_subnet.private[1].id",
+                                "aws_subnet.private[1]",
+                                "aws_subnet.private",
+                            ]
+                        }
+                    },
+                },
+            ],
+            "module_calls": {
+                "app": {
+                    "expressions": {"subnets": {"references": ["aws_subnet.private"]}},
+                    "module": {
+                        "resources": [
+                            {
+                                "address": "aws_lb.front",
+                                "expressions": {
+                                    "subnets": {"references": ["var.subnets"]},
+                                    "db": {"references": ["module.db.endpoint", "module.db"]},
+                                },
+                            }
+                        ],
+                        "module_calls": {
+                            "db": {
+                                "module": {
+                                    "resources": [{"address": "aws_db_instance.main"}],
+                                    "outputs": {
+                                        "endpoint": {
+                                            "expression": {
+                                                "references": ["aws_db_instance.main.endpoint"]
+                                            }
+                                        }
+                                    },
+                                }
+                            }
+                        },
+                    },
+                }
+            },
+        }
+    }
+    plan = {
+        "resource_changes": [
+            {"address": a, "type": a.split(".")[-2], "name": "x", "change": {"actions": []}}
+            for a in addresses
+        ],
+        "configuration": configuration,
+    }
+    print(f"\n{'='*60}", flush=True)
+    print("Testing dependency extraction", flush=True)
+
+    deps = resolve_dependencies(plan)
+    assert deps["aws_subnet.private[0]"] == ["aws_vpc.main"]
+    assert deps["aws_instance.web[0]"] == ["aws_vpc.main", "aws_subnet.private[1]"]
+    assert deps['module.app["a"].aws_lb.front'] == [
+        "aws_subnet.private[0]",
+        "aws_subnet.private[1]",
+        'module.app["a"].module.db.aws_db_instance.main',
+    ]
+    # Streamed plans carry the resolved edges
+    assert resolve_dependencies(ingest_plan_text(json.dumps(plan))) == deps
+
+    # An unkeyed reference between counted resources links every pair
+    counted = {
+        "resource_changes": [
+            {"address": f"{t}[{i}]", "type": t.split(".")[0], "name": "x", "change": {}}
+            for t in ("aws_subnet.a", "aws_instance.b")
+            for i in range(2)
+        ],
+        "configuration": {
+            "root_module": {
+                "resources": [
+                    {
+                        "address": "aws_instance.b",
+                        "expressions": {"subnet_id": {"references": ["aws_subnet.a"]}},
+                    }
+                ]
+            }
+        },
+    }
+    assert resolve_dependencies(counted) == {
+        f"aws_instance.b[{i}]": ["aws_subnet.a[0]", "aws_subnet.a[1]"] for i in range(2)
+    }
+
+    # Module instances reach their own resources by lookup, not by scanning all instances
+    fan_out = {
+        "resource_changes": [
+            {"address": f'module.m["{i}"].{t}', "type": t.split(".")[0], "name": "x", "change": {}}
+            for i in range(4000)
+            for t in ("aws_instance.a", "aws_eip.b")
+        ],
+        "configuration": {
+            "root_module": {
+                "module_calls": {
+                    "m": {
+                        "module": {
+                            "resources": [
+                                {
+                                    "address": "aws_instance.a",
+                                    "expressions": {"eip": {"references": ["aws_eip.b"]}},
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        },
+    }
+    start = time.perf_counter()
+    fanned = resolve_dependencies(fan_out)
+    elapsed = time.perf_counter() - start
+    assert fanned['module.m["7"].aws_instance.a'] == ['module.m["7"].aws_eip.b']
+    assert len(fanned) == 4000
+    assert elapsed < 2, f"{elapsed:.2f}s for 4000 module instances"
+    print(f"  {sum(len(d) for d in deps.values())} edges from {len(deps)} resources", flush=True)
+
+
+async def test_taxonomy():
+    """Test classifying exact, prefix-matched and unknown resource types."""
+    import subprocess
+    import sys
+    from diagrams.azure.general import Allresources
+    from cloud_diagram_mcp.taxonomy import classify, icon_class
+    from cloud_diagram_mcp.visualizer_hierarchical import _plan_graph
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing resource taxonomy", flush=True)
+    assert classify("aws_instance") == ("compute", None, "aws.compute.EC2")
+    assert classify("aws_iam_user").layer == "security"
+    assert classify("aws_lambda_function") == ("compute", None, "aws.compute.Lambda")
+    assert classify("aws_route53_health_check").layer == "dns"
+    assert classify("aws_route_table").layer == "network"
+    assert classify("aws_vpc_endpoint").group == "vpc"
+    assert classify("azurerm_subnet_nat_gateway_association").group == "subnet"
+    assert classify("azurerm_redis_cache").layer == "cache"
+    assert classify("google_sql_user").layer == "database"
+    assert classify("aws_made_up_service") == ("compute", None, "aws.general.General")
+    assert icon_class(classify("azurerm_made_up_service").icon) is Allresources
+    assert classify("random_password").icon == "generic.compute.Rack"
+
+    plan = {
+        "resource_changes": [
+            {
+                "address": "aws_lambda_function.api",
+                "type": "aws_lambda_function",
+                "name": "api",
+                "change": {"actions": ["create"]},
+            }
+        ]
+    }
+    layers, _ = _plan_graph(plan)
+    assert [r["address"] for r in layers["compute"]] == ["aws_lambda_function.api"]
+
+    # Classifying a plan does not import Diagrams; only drawing its icons does
+    code = (
+        "import json, sys\n"
+        "from cloud_diagram_mcp.visualizer_hierarchical import _plan_graph\n"
+        f"_plan_graph(json.loads({json.dumps(plan)!r}))\n"
+        "assert 'diagrams' not in sys.modules, 'diagrams imported by classification'\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    print("  Exact, prefix and provider fallbacks classified", flush=True)
+
+
+async def test_lazy_imports():
+    """Test that importing the server defers Diagrams until the first render."""
+    import subprocess
+    import sys
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing lazy imports", flush=True)
+    code = (
+        "import sys, cloud_diagram_mcp.server, cloud_diagram_mcp.visualizer_hierarchical as v\n"
+        "assert 'diagrams' not in sys.modules, 'diagrams imported eagerly'\n"
+        "assert v.ICON_MAPPING['aws_instance'].__name__ == 'EC2'\n"
+        "from cloud_diagram_mcp import render_pool\n"
+        "render_pool.warm_up()\n"
+        "assert 'diagrams' in sys.modules\n"
+    )
+    env = dict(os.environ, CLOUD_DIAGRAM_RENDER_WORKERS="0")
+    proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    print("  Diagrams loaded by warm-up, not by import", flush=True)
+
+
+async def test_metrics():
+    """Test per-stage instrumentation, `_timings` and the metrics resource."""
+    from cloud_diagram_mcp.metrics import Metrics, get_metrics
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing metrics", flush=True)
+
+    # A nested stage's peak also counts towards its enclosing stage
+    metrics = Metrics(trace_memory=True)
+    with metrics.collect() as stages:
+        with metrics.stage("outer"):
+            with metrics.stage("inner"):
+                block = bytearray(4 * 1024 * 1024)
+            del block
+    assert stages["inner"][2] >= 4 * 1024 * 1024, stages
+    assert stages["outer"][2] >= stages["inner"][2], stages
+    assert Metrics(enabled=False).stage("x") is Metrics(enabled=False).stage("y")
+
+    with open("examples/sample-plan.json") as f:
+        plan = f.read()
+    metrics = get_metrics()
+    metrics.attach_timings = True
+    try:
+        async with Client(mcp) as client:
+            result = await client.call_tool("visualize_tf_diff", {"plan": plan})
+            timings = json.loads(result.content[0].text)["_timings"]
+            print(f"  _timings: {timings}", flush=True)
+            for name in ("parse", "render", "serialize"):
+                assert timings[name]["wall_ms"] >= 0, name
+            assert timings["total_ms"] >= timings["render"]["wall_ms"]
+
+            text = (await client.read_resource("metrics://cloud-diagram"))[0].text
+    finally:
+        metrics.attach_timings = False
+    assert 'cloud_diagram_stage_seconds_count{stage="serialize"}' in text
+    assert 'cloud_diagram_tool_seconds_bucket{tool="visualize_tf_diff",le="+Inf"}' in text
+    assert "cloud_diagram_render_cache_misses_total" in text
+    print(f"  Metrics resource: {len(text.splitlines())} lines", flush=True)
+
+
+async def test_latency_budget():
+    """Test that a render over budget is deferred and fetched with get_rendered_svg."""
+    print(f"\n{'='*60}", flush=True)
+    print("Testing latency budget", flush=True)
+
+    # Fresh addresses so the render cannot come from the cache
+    suffix = str(time.time_ns())
+    plan = {
+        "resource_changes": [
+            {
+                "address": f"aws_instance.budget_{suffix}_{i}",
+                "type": "aws_instance",
+                "name": f"budget_{i}",
+                "change": {"actions": ["create"]},
+            }
+            for i in range(40)
+        ]
+    }
+    async with Client(mcp) as client:
+        result = await client.call_tool(
+            "visualize_tf_diff", {"plan": json.dumps(plan), "budget_ms": 1}
+        )
+        data = json.loads(result.content[0].text)
+        assert "_server_svg" not in data
+        status = data["_server_svg_status"]
+        print(f"  Status: {status}", flush=True)
+        assert status["status"] == "pending" and status["reason"] == "budget_exceeded"
+        assert len(data["resource_changes"]) == 40
+
+        for _ in range(600):
+            result = await client.call_tool("get_rendered_svg", {"render_id": status["render_id"]})
+            fetched = json.loads(result.content[0].text)
+            if fetched["status"] != "pending":
+                break
+            await asyncio.sleep(0.1)
+        assert fetched["status"] == "done", fetched
+        assert fetched["_server_svg"].startswith("<?xml") or "<svg" in fetched["_server_svg"]
+
+        # The finished render is cached, so the same call now fits the budget
+        result = await client.call_tool(
+            "visualize_tf_diff", {"plan": json.dumps(plan), "budget_ms": 1000}
+        )
+        assert "_server_svg" in json.loads(result.content[0].text)
+
+        result = await client.call_tool("get_rendered_svg", {"render_id": "missing"})
+        assert "error" in json.loads(result.content[0].text)
+    print("  Deferred render fetched with get_rendered_svg", flush=True)
+
+
+async def test_serialization():
+    """Test that spliced results decode to the same data as json.dumps."""
+    from cloud_diagram_mcp.serialization import dumps_result, sanitize_svg
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing result serialization", flush=True)
+
+    svg = sanitize_svg('<svg><text>caf\u00e9 "x" \ud800</text>\n</svg>')
+    assert "\ud800" not in svg and "caf\u00e9" in svg
+    data = {"resource_changes": [{"name": "\u00fcber"}], "_server_svg": svg, "n": 2**70}
+    text = dumps_result(data)
+    assert text.isascii()
+    assert json.loads(text) == data
+    assert json.loads(dumps_result({"_server_svg": svg})) == {"_server_svg": svg}
+    assert json.loads(dumps_result({"a": 1})) == {"a": 1}
+    print("  Spliced SVG round-trips through json.loads", flush=True)
+
+
+async def test_svg_encoding():
+    """Test that compressed SVG transport inflates to the plain SVG."""
+    import base64
+    import gzip
+    import zlib
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing compressed SVG transport", flush=True)
+
+    # Icons are embedded once per type, so larger diagrams compress better
+    types = ("aws_instance", "aws_s3_bucket", "aws_subnet", "aws_db_instance")
+    plan = json.dumps(
+        {
+            "resource_changes": [
+                {
+                    "address": f"{types[i % 4]}.r{i}",
+                    "type": types[i % 4],
+                    "name": f"r{i}",
+                    "change": {"actions": ["create" if i % 3 else "no-op"]},
+                }
+                for i in range(250)
+            ]
+        }
+    )
+    async with Client(mcp) as client:
+        result = await client.call_tool("visualize_tf_diff", {"plan": plan})
+        plain = json.loads(result.content[0].text)
+        assert "_server_svg_encoding" not in plain
+        for encoding, inflate in (("gzip", gzip.decompress), ("deflate", zlib.decompress)):
+            result = await client.call_tool(
+                "visualize_tf_diff", {"plan": plan, "svg_encoding": encoding}
+            )
+            packed = json.loads(result.content[0].text)
+            assert packed["_server_svg_encoding"] == f"{encoding}+base64"
+            svg = inflate(base64.b64decode(packed["_server_svg"])).decode("utf-8")
+            assert svg == plain["_server_svg"]
+            ratio = len(plain["_server_svg"]) / len(packed["_server_svg"])
+            print(f"  {encoding}: {ratio:.1f}x smaller", flush=True)
+            assert ratio > 1.5
+
+        result = await client.call_tool("visualize_tf_diff", {"plan": plan, "svg_encoding": "br"})
+        assert "error" in json.loads(result.content[0].text)
+
+
+async def test_svg_minify():
+    """Test that minified SVG keeps what the viewer and layout memory read."""
+    from cloud_diagram_mcp.layout_memory import positions_from_svg
+    from cloud_diagram_mcp.svg_minify import minify_stats, minify_svg
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing SVG minifier", flush=True)
+
+    # Shaped like Graphviz output
+    svg = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN"\n'
+        ' "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">\n'
+        "<!-- Generated by graphviz version 2.43.0 (0)\n -->\n"
+        '<svg width="453pt" height="300pt"\n viewBox="0.00 0.00 452.80 300.20" '
+        'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+        '<g id="graph0" class="graph" transform="scale(1 1) rotate(0) translate(4 296.04)">\n'
+        "<!-- aws_instance.web[0] -->\n"
+        '<g id="node1" class="node">\n<title>aws_instance.web[0]</title>\n'
+        '<image xlink:href="/icons/ec2.png" width="96px" height="96px" '
+        'preserveAspectRatio="xMinYMin meet" x="79.64" y="-270.36"/>\n'
+        '<text text-anchor="middle" x="127.60" y="-145.80" font-size="11.00">'
+        "[+] web v1.25 &quot;x=1.25&quot;</text>\n</g>\n"
+        '<g id="edge1" class="edge">\n<title>a&#45;&gt;b</title>\n'
+        '<path fill="none" stroke="gray" d="M127.64,-145.04C127.6,-100.33 -0.04,-3.05"/>\n'
+        "</g>\n</g>\n</svg>\n"
+    )
+    minified = minify_svg(svg, precision=1)
+    assert "<!--" not in minified and "DOCTYPE" not in minified and ">\n<" not in minified
+    assert '<g id="n1" class="node"><title>aws_instance.web[0]</title>' in minified
+    assert "[+] web v1.25 &quot;x=1.25&quot;" in minified, "label text was rewritten"
+    assert 'x="79.6" y="-270.4"' in minified and 'd="M127.6,-145C127.6,-100.3 0,-3"' in minified
+    (x0, y0), (x1, y1) = (
+        positions_from_svg(svg)["aws_instance.web[0]"],
+        positions_from_svg(minified)["aws_instance.web[0]"],
+    )
+    assert abs(x0 - x1) <= 0.1 and abs(y0 - y1) <= 0.1
+    stats = minify_stats(minified)
+    print(f"  Stats: {stats}", flush=True)
+    assert stats["source_bytes"] == len(svg) and stats["minified_bytes"] < len(svg)
+
+    with open("examples/complex-aws-plan.json") as f:
+        plan = f.read()
+    async with Client(mcp) as client:
+        result = await client.call_tool("visualize_tf_diff", {"plan": plan})
+        data = json.loads(result.content[0].text)
+        assert data["_svg_stats"]["bytes"] == len(data["_server_svg"])
+        assert data["_server_svg"].count('class="node"') > 0
+
+
+async def test_raster_tiles():
+    """Test the deep-zoom tile pyramid export."""
+    import base64
+    import filecmp
+    import io
+    import math
+
+    from PIL import Image
+
+    from cloud_diagram_mcp.raster_tiles import export_tiles
+    from cloud_diagram_mcp.server import _render_architecture_svg, _resolve_engine
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing raster tile export", flush=True)
+    with open("examples/architecture-azure.json") as f:
+        arch = f.read()
+
+    with tempfile.TemporaryDirectory() as tiles_dir:
+        async with Client(mcp) as client:
+            result = await client.call_tool(
+                "export_architecture_tiles", {"architecture": arch, "output_dir": tiles_dir}
+            )
+            data = json.loads(result.content[0].text)
+            print(
+                f"  {data['levels']} levels, {data['tiles']} tiles, {data['size_kb']} KB",
+                flush=True,
+            )
+            with open(data["manifest"]) as f:
+                assert f'Width="{data["width"]}" Height="{data["height"]}"' in f.read()
+            assert data["levels"] == math.ceil(math.log2(max(data["width"], data["height"]))) + 1
+            deepest = os.path.join(data["tiles_dir"], str(data["levels"] - 1))
+            assert len(os.listdir(deepest)) == math.ceil(data["width"] / 256) * math.ceil(
+                data["height"] / 256
+            )
+            with Image.open(os.path.join(deepest, "0_0.png")) as tile:
+                assert tile.size == (257, 257), tile.size
+            with Image.open(data["overview"]) as overview:
+                assert max(overview.size) <= 1024
+                assert len(overview.convert("RGB").getcolors(1 << 16) or []) > 16, "blank overview"
+
+            result = await client.call_tool(
+                "export_architecture_tiles", {"architecture": arch, "tile_format": "tiff"}
+            )
+            assert "error" in json.loads(result.content[0].text)
+
+    # Worker processes draw the same tiles as the calling process
+    svg = _render_architecture_svg(json.loads(arch), _resolve_engine(""))
+    with tempfile.TemporaryDirectory() as single, tempfile.TemporaryDirectory() as parallel:
+        export_tiles(svg, single, scale=2.0, workers=1)
+        summary = export_tiles(svg, parallel, scale=2.0, workers=2)
+        assert summary["tiles"] >= 64, summary
+        for level in range(summary["levels"]):
+            names = os.listdir(os.path.join(single, "diagram_files", str(level)))
+            _, mismatch, errors = filecmp.cmpfiles(
+                os.path.join(single, "diagram_files", str(level)),
+                os.path.join(parallel, "diagram_files", str(level)),
+                names,
+                shallow=False,
+            )
+            assert not mismatch and not errors, (level, mismatch, errors)
+    print(f"  {summary['tiles']} tiles identical with 2 workers", flush=True)
+
+    # Icons of one export do not leak into the next one in the same process
+    for color in ("red", "blue"):
+        png = io.BytesIO()
+        Image.new("RGB", (32, 32), color).save(png, "PNG")
+        href = "data:image/png;base64," + base64.b64encode(png.getvalue()).decode()
+        icon_svg = (
+            '<svg xmlns="http://www.w3.org/2000/svg" width="200" height="200">'
+            f'<image x="0" y="0" width="200" height="200" href="{href}"/></svg>'
+        )
+        with tempfile.TemporaryDirectory() as out:
+            tiles = export_tiles(icon_svg, out, workers=1)
+            with Image.open(tiles["overview"]) as overview:
+                pixel = overview.convert("RGB").getpixel((100, 100))
+        assert pixel == Image.new("RGB", (1, 1), color).getpixel((0, 0)), (color, pixel)
+
+
+async def test_batch_export():
+    """Test that export_batch renders every item and skips unchanged outputs."""
+    print(f"\n{'='*60}", flush=True)
+    print("Testing batch export", flush=True)
+    with tempfile.TemporaryDirectory() as out:
+        manifest = os.path.join(out, "manifest.json")
+        with open("examples/sample-plan.json") as f:
+            sample = json.load(f)
+        items = [
+            {"plan_file": "examples/complex-aws-plan.json", "output_path": f"{out}/complex.svg"},
+            {"plan": sample, "output_path": f"{out}/sample.svg"},
+            {
+                "architecture_file": "examples/architecture-azure.json",
+                "output_path": f"{out}/arch.svg",
+            },
+            {"plan": "{not json", "output_path": f"{out}/broken.svg"},
+        ]
+
+        async with Client(mcp) as client:
+
+            async def run(batch):
+                result = await client.call_tool(
+                    "export_batch", {"items": json.dumps(batch), "manifest_path": manifest}
+                )
+                return json.loads(result.content[0].text)
+
+            first = await run(items)
+            print(
+                f"  First run: {first['written']} written, {first['failed']} failed "
+                f"in {first['total_ms']:.0f} ms",
+                flush=True,
+            )
+            assert [item["status"] for item in first["items"]] == [
+                "written",
+                "written",
+                "written",
+                "failed",
+            ], first
+            assert "Invalid JSON" in first["items"][3]["error"]
+            with open(f"{out}/arch.svg") as f:
+                assert 'class="node"' in f.read()
+            mtimes = {
+                name: os.stat(f"{out}/{name}").st_mtime_ns for name in ("complex.svg", "sample.svg")
+            }
+
+            second = await run(items)
+            assert second["skipped"] == 3 and second["written"] == 0, second
+
+            # Without the manifest everything is rendered, but identical files stay untouched
+            os.remove(manifest)
+            third = await run(items)
+            assert third["unchanged"] == 3 and third["written"] == 0, third
+            for name, mtime in mtimes.items():
+                assert os.stat(f"{out}/{name}").st_mtime_ns == mtime, f"{name} was rewritten"
+
+            changed = dict(sample, resource_changes=sample["resource_changes"][:-1])
+            fourth = await run([items[0], dict(items[1], plan=changed)])
+            assert [item["status"] for item in fourth["items"]] == ["skipped", "written"], fourth
+
+            # Two items cannot share an output file; the first one keeps it
+            fifth = await run([items[2], dict(items[0], output_path=items[2]["output_path"])])
+            assert [item["status"] for item in fifth["items"]] == ["skipped", "failed"], fifth
+            assert "Same output as item 0" in fifth["items"][1]["error"]
+            with open(manifest) as f:
+                assert "arch.svg" in f.read()
+
+
+async def test_watch_mode():
+    """Test that watch mode re-renders only layout-relevant plan changes."""
+    import queue
+    import shutil
+    import threading
+
+    from cloud_diagram_mcp.cli import watch
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing watch mode", flush=True)
+    with tempfile.TemporaryDirectory() as src, tempfile.TemporaryDirectory() as out:
+        plan_path = os.path.join(src, "plan.json")
+        shutil.copy("examples/sample-plan.json", plan_path)
+        batches = queue.Queue()
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=watch,
+            args=([src], out),
+            kwargs={"debounce_ms": 100, "stop_event": stop, "on_batch": batches.put},
+            daemon=True,
+        )
+        watcher.start()
+
+        def statuses(timeout=60):
+            return [item["status"] for item in batches.get(timeout=timeout)["items"]]
+
+        def rewrite(plan):
+            with open(plan_path, "w") as f:
+                json.dump(plan, f)
+
+        try:
+            assert statuses() == ["written"]
+            svg_path = os.path.join(out, "plan.svg")
+            assert os.path.exists(svg_path)
+            with open(plan_path) as f:
+                plan = json.load(f)
+
+            # Attribute values do not affect the layout: no render
+            plan["resource_changes"][0]["change"]["after"] = {"tags": {"edited": "yes"}}
+            await asyncio.to_thread(rewrite, plan)
+            assert statuses() == ["skipped"]
+
+            start = time.time()
+            plan["resource_changes"] = plan["resource_changes"][:-1]
+            await asyncio.to_thread(rewrite, plan)
+            assert statuses() == ["written"]
+            print(f"  Layout change re-rendered in {time.time() - start:.2f}s", flush=True)
+        finally:
+            stop.set()
+            watcher.join(timeout=10)
+
+
+async def test_cli_render():
+    """Test the render subcommand writes each file and reports failures."""
+    import contextlib
+    import io
+    import shutil
+    import subprocess
+    import sys
+
+    from cloud_diagram_mcp import cli, render_pool
+
+    print(f"\n{'='*60}", flush=True)
+    print("Testing render subcommand", flush=True)
+    with tempfile.TemporaryDirectory() as out:
+        argv = [
+            "render",
+            "examples/sample-plan.json",
+            "examples/architecture-azure.json",
+            "-o",
+            out,
+            "--jobs",
+            "0",
+        ]
+        # In a fresh process, as the command runs
+        code = "import sys\nfrom cloud_diagram_mcp import cli\nsys.exit(cli.main(sys.argv[1:]))"
+        proc = await asyncio.to_thread(
+            subprocess.run, [sys.executable, "-c", code, *argv], capture_output=True, text=True
+        )
+        assert proc.returncode == 0, proc.stderr
+        report = proc.stdout
+        print(report, end="", flush=True)
+        for name in ("sample-plan.svg", "architecture-azure.svg"):
+            with open(os.path.join(out, name)) as f:
+                assert f.read().lstrip().startswith("<")
+            assert name in report
+        assert " ms" in report
+
+        # --jobs cannot resize a pool that is already running
+        pool = render_pool.get_render_pool()
+        jobs = pool.size if pool is not None else 0
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                missing = argv[:3] + ["missing.json"] + argv[3:-1] + [str(jobs)]
+                assert await asyncio.to_thread(cli.main, missing) == 1
+            if pool is not None:
+                with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                    try:
+                        cli.main(argv[:-1] + [str(jobs + 1)])
+                    except SystemExit as exc:
+                        assert exc.code == 2
+                    else:
+                        raise AssertionError("--jobs resized a running pool")
+                assert "already running" in stderr.getvalue()
+        finally:
+            render_pool.configure_render_pool(None)
+        summary = cli.render(["examples/sample-plan.json"], out)
+        assert [item["status"] for item in summary["items"]] == ["unchanged"]
+
+        # Unchanged diagrams keep their tile pyramid instead of being tiled again
+        arch = ["examples/architecture-azure.json"]
+        dzi = cli.render(arch, out, output_format="dzi")["items"][0]["dzi"]
+        mtime = os.stat(dzi).st_mtime_ns
+        summary = cli.render(arch, out, output_format="dzi")
+        assert summary["items"][0]["status"] == "unchanged", summary
+        assert summary["items"][0]["dzi"] == dzi and os.stat(dzi).st_mtime_ns == mtime
+
+        # Same-named files in different directories fail instead of overwriting each other
+        with tempfile.TemporaryDirectory() as src:
+            for sub in ("a", "b"):
+                os.makedirs(os.path.join(src, sub))
+                shutil.copy("examples/sample-plan.json", os.path.join(src, sub, "plan.json"))
+            files = [os.path.join(src, sub, "plan.json") for sub in ("a", "b")]
+            manifest = os.path.join(out, "clash.json")
+            for expected in (["written", "failed"], ["skipped", "failed"]):
+                summary = cli.render(files, out, manifest_path=manifest)
+                assert [item["status"] for item in summary["items"]] == expected, summary
+
+
 async def main():
     await test_visualize_tf_diff()
     await test_visualize_architecture()
     await test_export_architecture_svg()
+    await test_render_cache()
+    await test_render_pool()
+    await test_plan_ingest()
+    await test_lean_output()
+    await test_focus_mode()
+    await test_plan_store()
+    await test_layout_memory()
+    await test_seeded_graphviz()
+    await test_layered_layout()
+    await test_no_temp_files()
+    await test_level_of_detail()
+    await test_dependency_extraction()
+    await test_taxonomy()
+    await test_lazy_imports()
+    await test_metrics()
+    await test_latency_budget()
+    await test_serialization()
+    await test_svg_encoding()
+    await test_svg_minify()
+    await test_raster_tiles()
+    await test_batch_export()
+    await test_watch_mode()
+    await test_cli_render()
     print("\nDone", flush=True)
 
 
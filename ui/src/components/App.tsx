@@ -1,6 +1,7 @@
-import React, { useState, useCallback } from "react";
-import type { PlanData, ResourceItem } from "../types";
+import React, { useState, useCallback, useEffect } from "react";
+import type { PlanData, RenderedSvg, ResourceChange, ResourceItem } from "../types";
 import { parsePlanData } from "../types";
+import { decodeServerSvg } from "../svgEncoding";
 import { Header } from "./Header";
 import { Legend } from "./Legend";
 import { DetailPanel } from "./DetailPanel";
@@ -9,14 +10,66 @@ import { DiagramView } from "./DiagramView";
 
 interface AppProps {
   planData: PlanData;
+  fetchResourceDetail?: (planHandle: string, address: string) => Promise<ResourceChange | null>;
+  fetchRenderedSvg?: (renderId: string) => Promise<RenderedSvg | null>;
 }
 
-export const App: React.FC<AppProps> = ({ planData }) => {
+// Polling interval for a server-side SVG that missed the call's latency budget
+const RENDER_POLL_MS = 1000;
+
+export const App: React.FC<AppProps> = ({ planData, fetchResourceDetail, fetchRenderedSvg }) => {
   const [selectedResource, setSelectedResource] = useState<ResourceItem | null>(null);
   const [sidebarOpen, setSidebarOpen] = useState(false);
   const { items, counts, connections, isArchMode } = parsePlanData(planData);
 
-  const serverSvg = planData._server_svg || null;
+  const [deferredSvg, setDeferredSvg] = useState<string | null>(null);
+  const [inflatedSvg, setInflatedSvg] = useState<string | null>(null);
+  const svgEncoding = planData._server_svg_encoding;
+  const serverSvg = (svgEncoding ? inflatedSvg : planData._server_svg) || deferredSvg;
+
+  // Compressed SVGs are inflated off the render path; until then (or if the
+  // browser cannot inflate them) the client-side diagram is shown
+  useEffect(() => {
+    setInflatedSvg(null);
+    if (!planData._server_svg || !svgEncoding) return;
+    let cancelled = false;
+    decodeServerSvg(planData._server_svg, svgEncoding)
+      .then((svg) => {
+        if (!cancelled) setInflatedSvg(svg);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [planData._server_svg, svgEncoding]);
+
+  // Show the client-side diagram now and swap in the server SVG once rendered
+  const pendingRenderId =
+    planData._server_svg_status?.status === "pending" ? planData._server_svg_status.render_id : undefined;
+  useEffect(() => {
+    setDeferredSvg(null);
+    if (!pendingRenderId || !fetchRenderedSvg) return;
+    let cancelled = false;
+    const poll = () => {
+      fetchRenderedSvg(pendingRenderId)
+        .then((rendered) => {
+          if (cancelled || !rendered) return;
+          if (rendered.status === "done" && rendered._server_svg) {
+            decodeServerSvg(rendered._server_svg, rendered._server_svg_encoding)
+              .then((svg) => {
+                if (!cancelled) setDeferredSvg(svg);
+              })
+              .catch(() => {});
+          } else if (rendered.status === "pending") timer = setTimeout(poll, RENDER_POLL_MS);
+        })
+        .catch(() => {});
+    };
+    let timer = setTimeout(poll, RENDER_POLL_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [pendingRenderId, fetchRenderedSvg]);
 
   const title = isArchMode
     ? (planData.title || "Cloud Architecture")
@@ -26,6 +79,8 @@ export const App: React.FC<AppProps> = ({ planData }) => {
     ? `${items.length} resources`
     : `Terraform &mdash; ${items.length} resources &mdash; v${planData.terraform_version || "?"}`;
 
+  const planHandle = planData._plan_handle;
+
   const handleSelectResource = useCallback((item: ResourceItem) => {
     setSelectedResource((prev) => {
       if (prev && prev.address === item.address) {
@@ -37,7 +92,21 @@ export const App: React.FC<AppProps> = ({ planData }) => {
       setSidebarOpen(true);
       return item;
     });
-  }, []);
+
+    // Lean/handle results omit attributes; fetch them for this resource only
+    if (planHandle && fetchResourceDetail && !item.before && !item.after) {
+      fetchResourceDetail(planHandle, item.address)
+        .then((detail) => {
+          if (!detail) return;
+          setSelectedResource((prev) =>
+            prev && prev.address === item.address
+              ? { ...prev, before: detail.change.before, after: detail.change.after }
+              : prev
+          );
+        })
+        .catch(() => {});
+    }
+  }, [planHandle, fetchResourceDetail]);
 
   const handleCloseSidebar = useCallback(() => {
     setSidebarOpen(false);
@@ -2,11 +2,40 @@ import React, { StrictMode, useState, useEffect } from "react";
 import { createRoot } from "react-dom/client";
 import { App as McpApp } from "@modelcontextprotocol/ext-apps";
 import { App } from "./components/App";
-import type { PlanData } from "./types";
+import type { PlanData, RenderedSvg, ResourceChange } from "./types";
+import { canInflate } from "./svgEncoding";
 import "./styles/global.css";
 
 const APP_INFO = { name: "Cloud Diagram", version: "3.0.0" };
 
+/** Fetch one resource's before/after from the server-side plan store. */
+async function fetchResourceDetail(planHandle: string, address: string): Promise<ResourceChange | null> {
+  const app = (window as any).__mcpApp as McpApp | undefined;
+  if (!app) return null;
+  const result = await app.callServerTool({
+    name: "get_resource_detail",
+    arguments: { plan_handle: planHandle, address },
+  });
+  const text = result.content?.find((c: { type: string }) => c.type === "text") as { text: string } | undefined;
+  if (!text) return null;
+  const detail = JSON.parse(text.text);
+  return detail.error ? null : (detail as ResourceChange);
+}
+
+/** Fetch a server-side SVG that was still rendering when the tool returned. */
+async function fetchRenderedSvg(renderId: string): Promise<RenderedSvg | null> {
+  const app = (window as any).__mcpApp as McpApp | undefined;
+  if (!app) return null;
+  const result = await app.callServerTool({
+    name: "get_rendered_svg",
+    arguments: { render_id: renderId, svg_encoding: canInflate() ? "gzip" : "none" },
+  });
+  const text = result.content?.find((c: { type: string }) => c.type === "text") as { text: string } | undefined;
+  if (!text) return null;
+  const rendered = JSON.parse(text.text);
+  return rendered.error ? null : (rendered as RenderedSvg);
+}
+
 function Root() {
   const [planData, setPlanData] = useState<PlanData | null>(null);
   const [error, setError] = useState<string | null>(null);
@@ -71,7 +100,13 @@ function Root() {
     );
   }
 
-  return <App planData={planData} />;
+  return (
+    <App
+      planData={planData}
+      fetchResourceDetail={fetchResourceDetail}
+      fetchRenderedSvg={fetchRenderedSvg}
+    />
+  );
 }
 
 const rootEl = document.getElementById("root")!;
@@ -0,0 +1,25 @@
+/**
+ * Decoding of compressed `_server_svg` payloads.
+ *
+ * The server sends the SVG gzip- or deflate-compressed and base64-encoded
+ * when asked to (`svg_encoding`), marked "gzip+base64" or "deflate+base64".
+ */
+
+/** Whether this browser can inflate compressed SVGs. */
+export function canInflate(): boolean {
+  return typeof DecompressionStream !== "undefined";
+}
+
+/** Return the SVG text of a `_server_svg` value; plain text is returned as is. */
+export async function decodeServerSvg(data: string, encoding?: string): Promise<string> {
+  if (!encoding) return data;
+  const format = encoding.replace(/\+base64$/, "");
+  if ((format !== "gzip" && format !== "deflate") || !canInflate()) {
+    throw new Error(`Unsupported SVG encoding: ${encoding}`);
+  }
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream(format));
+  return new Response(stream).text();
+}
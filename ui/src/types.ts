@@ -30,10 +30,55 @@ export interface ResourceItem {
   deps: string[];
 }
 
+/** get_rendered_svg result */
+export interface RenderedSvg {
+  render_id: string;
+  status: "pending" | "done" | "failed";
+  reason?: string;
+  _server_svg?: string;
+  _server_svg_encoding?: string;
+}
+
 /** Data shape received from ext-apps tool result */
 export interface PlanData {
   _mode?: "architecture";
   _server_svg?: string;
+  /** Server-side plan store handle; attribute details are fetched on demand */
+  _plan_handle?: string;
+  /** Lean mode: flat address → depends_on map replacing `configuration` */
+  _dependencies?: Record<string, string[]>;
+  _lean?: {
+    original_bytes: number;
+    lean_bytes: number;
+    bytes_saved: number;
+  };
+  /** Level of detail: the server diagram shows aggregate nodes for large plans */
+  _lod?: {
+    resources: number;
+    nodes: number;
+    module_depth: number | null;
+    aggregates: Record<string, { count: number; actions: Record<string, number> }>;
+  };
+  /** Focus mode: only the neighbourhood of these resources is included */
+  _focus?: {
+    resources: number;
+    seeds: number;
+    hops: number;
+    kept: number;
+    nodes: number;
+    stubs: Record<string, { count: number; actions: Record<string, number> }>;
+    unmatched?: string[];
+  };
+  /** Set when `_server_svg` is compressed: "gzip+base64" or "deflate+base64" */
+  _server_svg_encoding?: string;
+  /** Why `_server_svg` is missing; a pending render is fetched by `render_id` */
+  _server_svg_status?: {
+    status: "pending" | "failed";
+    reason: string;
+    budget_ms?: number;
+    render_id?: string;
+    detail?: string;
+  };
   terraform_version?: string;
   title?: string;
   resource_changes?: ResourceChange[];
@@ -97,7 +142,7 @@ export function parsePlanData(planData: PlanData): {
     }));
   } else {
     const changes = planData.resource_changes || [];
-    const depMap = (
+    const depMap = planData._dependencies || (
       planData.configuration?.root_module?.resources || []
     ).reduce<Record<string, string[]>>((m, r) => {
       m[r.address] = r.depends_on || [];